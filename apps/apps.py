@@ -6,4 +6,4 @@ class AppsConfig(AppConfig):
     name = 'apps'
 
     def ready(self):
-        pass
+        import apps.signals  # noqa: F401  — receiverlarni ro'yxatdan o'tkazadi
@@ -0,0 +1,100 @@
+"""
+benchmark_recommendations.py
+============================
+RecommendationEngine benchmarki — sintetik katalogda tavsiya sahifasining har
+bosqichi uchun vaqt (ms), SQL so'rovlar soni va eng yuqori xotira (KB).
+
+ - Katalog va foydalanuvchilar `apps.recommendations.benchmark` bilan
+   yaratiladi; oxirida tranzaksiya ROLLBACK qilinadi (bazaga iz qolmaydi).
+ - Profillar: anon, cold (tarixsiz), light (bir necha interaksiya),
+   heavy (~2000 interaksiya) — og'ir foydalanuvchi narxi ko'rinib tursin.
+ - --max-page-ms / --max-queries berilsa, chegaradan oshganda buyruq xato
+   bilan tugaydi (CI'da regressiyani ushlash uchun).
+
+Foydalanish:
+    python manage.py benchmark_recommendations
+    python manage.py benchmark_recommendations --sizes 1000,10000,100000 --repeat 5
+    python manage.py benchmark_recommendations --sizes 10000 --max-page-ms 400 --max-queries 12
+    python manage.py benchmark_recommendations --json bench.json
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recommendations.benchmark import STEPS, run_benchmark
+
+
+class Command(BaseCommand):
+    help = "Sintetik katalogda RecommendationEngine vaqti, so'rovlari va xotirasini o'lchaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=str, default="1000,10000",
+                            help="Vergul bilan katalog hajmlari (default 1000,10000)")
+        parser.add_argument("--users", type=int, default=300,
+                            help="Collab savatlari uchun fon foydalanuvchilari soni (default 300)")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Har profil uchun o'lchov takrori — median olinadi (default 3)")
+        parser.add_argument("--seed", type=int, default=1, help="Tasodifiy generator urug'i")
+        parser.add_argument("--json", type=str, default="",
+                            help="Natijani JSON faylga ham yozish")
+        parser.add_argument("--max-page-ms", type=float, default=None,
+                            help="Sahifa (barcha bosqichlar) vaqti chegarasi, ms")
+        parser.add_argument("--max-queries", type=int, default=None,
+                            help="Bitta sahifadagi SQL so'rovlar chegarasi")
+
+    # ------------------------------------------------------------------
+    def handle(self, *args, **opts):
+        sizes = [int(s) for s in opts["sizes"].split(",") if s.strip()]
+        results = []
+        failures = []
+
+        for size in sizes:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{size:,} destination — katalog yaratilmoqda..."))
+            result = run_benchmark(size, users=opts["users"], repeat=opts["repeat"], seed=opts["seed"])
+            results.append(result)
+            self._print(result)
+            failures += self._check(result, opts["max_page_ms"], opts["max_queries"])
+
+        if opts["json"]:
+            with open(opts["json"], "w", encoding="utf-8") as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(f"\nJSON: {opts['json']}")
+
+        if failures:
+            raise CommandError("Chegaradan oshdi:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("\n✓ Tugadi."))
+
+    # ------------------------------------------------------------------
+    def _print(self, result):
+        profiles = result["profiles"]
+        names = list(profiles)
+        self.stdout.write(
+            f"nomzodlar: {result['candidates']:,}   generatsiya: {result['generate_ms'] / 1000:.1f}s   "
+            f"snapshot: {result['snapshot_ms']:.0f} ms   item index: {result['item_index_ms']:.0f} ms   "
+            f"similar index: {result['similar_index_ms']:.0f} ms")
+        self.stdout.write(f"{'bosqich (ms, median)':<24}" + "".join(f"{n:>10}" for n in names))
+        for step in STEPS:
+            self.stdout.write(f"{step:<24}" + "".join(f"{profiles[n][step]['ms']:>10.1f}" for n in names))
+        self.stdout.write(f"{'sahifa jami':<24}" + "".join(f"{_page_ms(profiles[n]):>10.1f}" for n in names))
+        self.stdout.write(f"{'SQL so`rovlar':<24}" + "".join(f"{_page_queries(profiles[n]):>10}" for n in names))
+        self.stdout.write(f"{'peak xotira (KB)':<24}" + "".join(
+            f"{max(s['peak_kb'] for s in profiles[n].values()):>10.0f}" for n in names))
+
+    @staticmethod
+    def _check(result, max_ms, max_queries):
+        failures = []
+        for name, steps in result["profiles"].items():
+            label = f"{result['size']:,} / {name}"
+            if max_ms is not None and _page_ms(steps) > max_ms:
+                failures.append(f"{label}: {_page_ms(steps):.1f} ms > {max_ms} ms")
+            if max_queries is not None and _page_queries(steps) > max_queries:
+                failures.append(f"{label}: {_page_queries(steps)} so'rov > {max_queries}")
+        return failures
+
+
+def _page_ms(steps):
+    return sum(s["ms"] for s in steps.values())
+
+
+def _page_queries(steps):
+    return sum(s["queries"] for s in steps.values())
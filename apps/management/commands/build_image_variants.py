@@ -0,0 +1,52 @@
+"""
+build_image_variants.py
+=======================
+Mavjud rasmlar (DestinationImage, HotelImage, City) uchun WebP variantlarini
+(card / thumb / hero) yaratadi, image_variants belgisini qo'yadi (shu vaqtgacha
+*_url asl faylni beradi) va Destination.cover_image ni qayta yozadi.
+Yangi yuklangan rasmlar variantlari Celery task'da (process_uploaded_image)
+tayyorlanadi — bu buyruq eski fayllar va bulk import (save() chaqirilmaydigan
+yozuvlar) uchun.
+
+Foydalanish:
+    python manage.py build_image_variants            # faqat varianti yo'qlari
+    python manage.py build_image_variants --force    # hammasini qayta yaratish
+"""
+from django.core.management.base import BaseCommand
+
+from apps.models import City, Destination
+from apps.models.destinations import DestinationImage, HotelImage
+from apps.utils.uplode_image import IMAGE_VARIANTS, build_variants, variant_name
+
+
+class Command(BaseCommand):
+    help = "Mavjud rasmlar uchun WebP variantlarini (card / thumb / hero) yaratadi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Bor variantlarni ham qayta yaratish")
+
+    def handle(self, *args, **options):
+        created = skipped = failed = 0
+        for model in (DestinationImage, HotelImage, City):
+            images = model.objects.exclude(image='').exclude(image__isnull=True).filter(image_processing=False)
+            for obj in images.only('pk', 'image', 'image_variants').iterator():
+                storage, name = obj.image.storage, obj.image.name
+                if not options['force'] and (obj.image_variants
+                                             or all(storage.exists(variant_name(name, v)) for v in IMAGE_VARIANTS)):
+                    skipped += 1
+                    if not obj.image_variants:
+                        model.objects.filter(pk=obj.pk, image=name).update(image_variants=True)
+                    continue
+                try:
+                    build_variants(storage, name)
+                    model.objects.filter(pk=obj.pk, image=name).update(image_variants=True)
+                    created += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} #{obj.pk} ({name}): {e}")
+
+        covers = Destination.objects.refresh_cover_images()
+        self.stdout.write(self.style.SUCCESS(
+            f"Variantlar: {created} ta yaratildi, {skipped} ta bor edi, {failed} ta xato; "
+            f"muqova rasmi yangilandi: {covers} ta destination"
+        ))
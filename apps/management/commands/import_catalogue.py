@@ -0,0 +1,44 @@
+"""
+import_catalogue.py
+===================
+Destinationlarni JSON / CSV fayldan ommaviy import qiladi (apps/utils/importer.py):
+bulk_create, rasmlarni parallel yuklab olish va WebP variantlarini jarayonlar
+pulida tayyorlash. Mavjud slug'lar o'tkazib yuboriladi — qayta ishga tushirish xavfsiz.
+
+Foydalanish:
+    python manage.py import_catalogue catalogue.json
+    python manage.py import_catalogue catalogue.csv --images-dir ./photos --offline
+    python manage.py import_catalogue catalogue.json --workers 16 --processes 4
+    python manage.py import_catalogue catalogue.json --no-images
+"""
+from django.core.management.base import BaseCommand
+
+from apps.utils.importer import CatalogueImporter, load_records
+
+
+class Command(BaseCommand):
+    help = "Destinationlarni JSON / CSV fayldan ommaviy import qiladi (rasmlar bilan)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON yoki CSV fayl")
+        parser.add_argument('--images-dir', help="Nisbiy rasm yo'llari shu papkadan olinadi")
+        parser.add_argument('--offline', action='store_true', help="URL manbalarni o'tkazib yuborish")
+        parser.add_argument('--no-images', action='store_true', help="Rasmlarsiz import")
+        parser.add_argument('--workers', type=int, default=8, help="Parallel yuklab olishlar soni")
+        parser.add_argument('--processes', type=int, default=None, help="WebP jarayonlari soni (standart: CPU soni)")
+
+    def handle(self, *args, **options):
+        importer = CatalogueImporter(
+            image_dir=options['images_dir'],
+            download_workers=options['workers'],
+            process_workers=options['processes'],
+            offline=options['offline'],
+            with_images=not options['no_images'],
+        )
+        report = importer.run(load_records(options['path']))
+
+        for error in report.errors:
+            self.stderr.write(error)
+        for line in report.lines():
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f"Import tugadi: {report.created} ta yangi destination"))
@@ -0,0 +1,21 @@
+"""
+rebuild_search_index.py
+=======================
+Destination qidiruv indeksini (DestinationSearchIndex) butun katalog uchun
+qayta quradi. Migratsiyadan keyin bir marta va `.update()` / bulk import kabi
+signal chaqirmaydigan yozuvlardan keyin ishlatiladi.
+
+Foydalanish:
+    python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+
+from apps.utils.search import refresh_search_index
+
+
+class Command(BaseCommand):
+    help = "Destination qidiruv indeksini (tsvector + trigram) qayta quradi."
+
+    def handle(self, *args, **options):
+        count = refresh_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Qidiruv indeksi yangilandi: {count} ta destination"))
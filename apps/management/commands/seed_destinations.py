@@ -6,8 +6,10 @@ Mashhur ~30 shahar uchun har biriga 10 tadan realistik Destination yaratadi.
  - Ma'lumot generatsiya qilinadi (booking.com'dan EMAS) — narx, chegirma,
    trip_type, mavsum, tag/activity hammasi realistik shablonlardan.
  - Turlar aralash: flash sale, trending, popular, featured va oddiy.
- - Rasm: LoremFlickr (sayohat mavzusi) -> fallback Picsum.
-   Rasm local `media/` ga yuklab olinadi va model orqali .webp ga aylanadi.
+ - Rasm: LoremFlickr (sayohat mavzusi) -> fallback Picsum, parallel yuklab
+   olinadi; .webp va variantlar import paytida jarayonlar pulida tayyorlanadi
+   (apps/utils/importer.py). --images-dir — tarmoqsiz, mahalliy fayllardan.
+ - Yozuvlar bulk_create bilan bitta import'da (import_catalogue bilan bir xil).
  - Idempotent: qayta ishga tushirsa, mavjud destinationlarni o'tkazib yuboradi,
    faqat rasmi yo'qlariga rasm qo'shadi.
 
@@ -15,26 +17,21 @@ Foydalanish:
     python manage.py seed_destinations
     python manage.py seed_destinations --limit 30 --per-city 10
     python manage.py seed_destinations --no-images
+    python manage.py seed_destinations --images-dir ./photos
     python manage.py seed_destinations --cities "Paris,Rome,Tokyo"
 """
-import io
+import os
 import random
-import time
 from datetime import timedelta
 
-import requests
-from PIL import Image
-
-from django.core.files.base import ContentFile
 from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils import timezone
 from django.utils.text import slugify
 
-from apps.models.activities import Activity
 from apps.models.categories import City
-from apps.models.destinations import Destination, DestinationImage
-from apps.models.tags import Tag
+from apps.models.destinations import Destination
+from apps.utils.importer import CatalogueImporter
+from apps.utils.ratings import seed_rating_fields
 
 # ----------------------------------------------------------------------
 #  Nomzod shaharlar — bazada mavjud bo'lganlaridan birinchi --limit tasi olinadi
@@ -125,11 +122,6 @@ FLAG_PLAN = [
 ]
 
 
-def _norm(s):
-    """Nomni solishtirish uchun normalizatsiya: kichik harf + ortiqcha bo'shliqsiz."""
-    return " ".join(s.lower().split())
-
-
 class Command(BaseCommand):
     help = "Mashhur ~30 shahar uchun har biriga 10 tadan realistik Destination yaratadi."
 
@@ -140,6 +132,10 @@ class Command(BaseCommand):
                             help="Har shaharda nechta destination (default 10)")
         parser.add_argument("--no-images", action="store_true",
                             help="Rasmsiz — faqat ma'lumot yaratiladi (tez)")
+        parser.add_argument("--images-dir", type=str, default="",
+                            help="Tarmoqsiz: rasmlar shu papkadagi fayllardan navbat bilan olinadi")
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Parallel yuklab olishlar soni (default 8)")
         parser.add_argument("--cities", type=str, default="",
                             help="Vergul bilan ajratilgan shahar ro'yxati (nomzodlar o'rniga)")
 
@@ -148,6 +144,7 @@ class Command(BaseCommand):
         limit = opts["limit"]
         per_city = opts["per_city"]
         do_images = not opts["no_images"]
+        images_dir = opts["images_dir"]
 
         # --- shaharlarni aniqlash ---
         wanted = ([c.strip() for c in opts["cities"].split(",") if c.strip()]
@@ -171,64 +168,42 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR("Hech qanday shahar topilmadi — to'xtatildi."))
             return
 
-        # --- tag / activity lug'atlari ---
-        tag_by = {_norm(t.name): t for t in Tag.objects.all()}
-        act_by = {_norm(a.name): a for a in Activity.objects.all()}
+        local_images = sorted(os.listdir(images_dir)) if images_dir else []
 
         self.stdout.write(self.style.MIGRATE_HEADING(
             f"\n{len(cities)} shahar × {per_city} destination "
             f"= {len(cities) * per_city} ta  |  rasm: {'HA' if do_images else 'YO‘Q'}\n"))
 
-        created_total = 0
-        skipped_total = 0
-        images_total = 0
-
+        records = []
         for ci, city in enumerate(cities):
-            country = city.country
-            country_name = country.name if country else city.name
-            had = city.destinations.count()
-            line = f"[{ci + 1:>2}/{len(cities)}] {city.name:<16}"
-
-            made = 0
+            country_name = city.country.name if city.country else city.name
             for i in range(per_city):
                 arch = ARCHETYPES[(ci + i) % len(ARCHETYPES)]
-                flag = FLAG_PLAN[i % len(FLAG_PLAN)]
-                name = f"{city.name}: {arch['title']}"
-                slug = slugify(name)
-
-                dest = Destination.objects.filter(slug=slug).first()
-
-                if dest is None:
-                    try:
-                        dest = self._create_destination(
-                            city, country, country_name, arch, flag, tag_by, act_by)
-                        created_total += 1
-                        made += 1
-                    except Exception as exc:  # noqa: BLE001
-                        self.stdout.write(self.style.ERROR(
-                            f"\n   ✗ {name}: {exc}"))
-                        continue
+                record = self._record(city, country_name, arch, FLAG_PLAN[i % len(FLAG_PLAN)])
+                if local_images:
+                    record["images"] = [local_images[len(records) % len(local_images)]]
                 else:
-                    skipped_total += 1
-
-                # rasm — yo'q bo'lsa qo'shamiz (qayta ishga tushirishga chidamli)
-                if do_images and not dest.images.exists():
-                    if self._attach_image(dest, city, arch):
-                        images_total += 1
-                    time.sleep(0.2)
-
-            self.stdout.write(
-                f"{line} oldin: {had:>2}  yangi: +{made}  jami: {city.destinations.count()}")
-
+                    record["images"] = [_image_urls(city, arch, slugify(record["name"]))]
+                records.append(record)
+
+        # Bitta bulk import: destinationlar, teg/activity, rasmlar (parallel), indekslar
+        importer = CatalogueImporter(image_dir=images_dir or None, download_workers=opts["workers"],
+                                     offline=bool(images_dir), with_images=do_images)
+        report = importer.run(records)
+
+        for error in report.errors:
+            self.stdout.write(self.style.ERROR(f"   ✗ {error}"))
+        for line in report.lines():
+            self.stdout.write(f"   {line}")
         self.stdout.write(self.style.SUCCESS(
-            f"\n✓ Tugadi.  Yangi destination: {created_total}   "
-            f"O'tkazib yuborilgan (mavjud): {skipped_total}   "
-            f"Rasm yuklab olindi: {images_total}"))
+            f"\n✓ Tugadi.  Yangi destination: {report.created}   "
+            f"O'tkazib yuborilgan (mavjud): {report.skipped}   "
+            f"Rasm yuklab olindi: {report.images}"))
 
     # ------------------------------------------------------------------
-    @transaction.atomic
-    def _create_destination(self, city, country, country_name, arch, flag, tag_by, act_by):
-        """Bitta Destination + tags/activities yaratadi (atomik)."""
+    @staticmethod
+    def _record(city, country_name, arch, flag):
+        """Bitta Destination yozuvi (apps/utils/importer.py formatida)."""
         price = int(round(random.randint(*arch["price"]) / 5.0) * 5)
         disc_range = flag.get("discount")
         discount = random.randint(*disc_range) if disc_range else 0
@@ -247,9 +222,9 @@ class Command(BaseCommand):
         short, desc, why, included, restrict, extra = _descriptions(
             city.name, country_name, arch)
 
-        dest = Destination(
-            city=city,
-            country=country,
+        return dict(
+            city=city.name,
+            country=city.country.name if city.country else None,     # bir xil nomli shaharlar farqlansin
             name=f"{city.name}: {arch['title']}",
             short_description=short,
             description=desc,
@@ -265,7 +240,7 @@ class Command(BaseCommand):
             trip_type=arch["trip"],
             duration=arch["dur"],
             season=arch["season"],
-            visible_reviews_count=random.randint(180, 4200),
+            **seed_rating_fields(random.randint(180, 4200), random.uniform(4.2, 4.9)),
             is_free_cancellation=random.random() < 0.82,
             free_cancellation_hours=random.choice([24, 24, 48, 72]),
             is_popular=bool(flag.get("popular")),
@@ -277,51 +252,19 @@ class Command(BaseCommand):
             restrictions=restrict,
             additional_info=extra,
             package_type=arch["pkg"],
+            tags=arch["tags"],
+            activities=arch["acts"],
         )
-        dest.save()
 
-        tags = [tag_by[t] for t in arch["tags"] if t in tag_by]
-        acts = [act_by[a] for a in arch["acts"] if a in act_by]
-        if tags:
-            dest.tags.set(tags)
-        if acts:
-            dest.activities.set(acts)
-        return dest
 
-    # ------------------------------------------------------------------
-    def _attach_image(self, dest, city, arch):
-        """Destinationga rasm yuklab oladi va biriktiradi (DestinationImage)."""
-        data = self._fetch_image(city, arch, dest.slug)
-        if not data:
-            return False
-        try:
-            img = DestinationImage(destination=dest, order=0)
-            img.image = ContentFile(data, name=f"{dest.slug}.jpg")
-            img.save()  # ImageBaseModel.save() avtomatik .webp ga aylantiradi
-            return True
-        except Exception as exc:  # noqa: BLE001
-            self.stdout.write(self.style.WARNING(f"\n   ! rasm saqlanmadi {dest.slug}: {exc}"))
-            return False
-
-    @staticmethod
-    def _fetch_image(city, arch, seed):
-        """LoremFlickr (sayohat) -> fallback Picsum. Bytes qaytaradi yoki None."""
-        city_kw = city.name.lower().replace(" ", "").replace("'", "")
-        urls = [
-            f"https://loremflickr.com/800/600/{city_kw},{arch['kw']}",
-            f"https://loremflickr.com/800/600/{arch['kw']},travel",
-            f"https://picsum.photos/seed/{seed}/800/600",
-        ]
-        headers = {"User-Agent": "Mozilla/5.0 (TravelHub seeder)"}
-        for url in urls:
-            try:
-                resp = requests.get(url, timeout=15, headers=headers)
-                if resp.status_code == 200 and len(resp.content) > 2000:
-                    Image.open(io.BytesIO(resp.content)).verify()  # haqiqiy rasmmi?
-                    return resp.content
-            except Exception:  # noqa: BLE001
-                time.sleep(0.5)
-        return None
+def _image_urls(city, arch, seed):
+    """Muqobil manbalar: LoremFlickr (sayohat) -> fallback Picsum."""
+    city_kw = city.name.lower().replace(" ", "").replace("'", "")
+    return [
+        f"https://loremflickr.com/800/600/{city_kw},{arch['kw']}",
+        f"https://loremflickr.com/800/600/{arch['kw']},travel",
+        f"https://picsum.photos/seed/{seed}/800/600",
+    ]
 
 
 # ----------------------------------------------------------------------
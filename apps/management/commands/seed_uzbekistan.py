@@ -9,7 +9,9 @@ joylarini bazaga qo'shadi.
  - 64 ta real destination — Registan, Po-i-Kalyan, Itchan Kala va h.k.
    Har biri uchun aniq, haqiqatga mos tavsif.
  - Turlar aralash: featured / trending / popular / flash sale / oddiy.
- - Rasm: LoremFlickr -> fallback Picsum, local media/ ga .webp.
+ - Rasm: LoremFlickr -> fallback Picsum, local media/ ga .webp. Destination
+   rasmlari parallel yuklab olinadi, yozuvlar bulk_create bilan
+   (apps/utils/importer.py).
  - Idempotent: qayta ishga tushirsa dublikat yaratmaydi.
 
 Foydalanish:
@@ -19,6 +21,7 @@ Foydalanish:
 import io
 import random
 import time
+from collections import Counter
 from datetime import timedelta
 
 import requests
@@ -26,15 +29,14 @@ from PIL import Image
 
 from django.core.files.base import ContentFile
 from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils import timezone
 from django.utils.text import slugify
 
-from apps.models.activities import Activity
 from apps.models.categories import City
 from apps.models.countries import Country
-from apps.models.destinations import Destination, DestinationImage
-from apps.models.tags import Tag
+from apps.models.destinations import Destination
+from apps.utils.importer import CatalogueImporter
+from apps.utils.ratings import seed_rating_fields
 
 T = Destination.TripType
 D = Destination.Duration
@@ -212,16 +214,14 @@ UZ_DESTINATIONS = {
 }
 
 
-def _norm(s):
-    return " ".join(s.lower().split())
-
-
 class Command(BaseCommand):
     help = "O'zbekiston turistik shaharlari va real destinationlarini bazaga qo'shadi."
 
     def add_arguments(self, parser):
         parser.add_argument("--no-images", action="store_true",
                             help="Rasmsiz — faqat ma'lumot (tez)")
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Parallel yuklab olishlar soni (default 8)")
 
     # ------------------------------------------------------------------
     def handle(self, *args, **opts):
@@ -232,18 +232,13 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR("Uzbekistan davlati bazada yo'q — to'xtatildi."))
             return
 
-        tag_by = {_norm(t.name): t for t in Tag.objects.all()}
-        act_by = {_norm(a.name): a for a in Activity.objects.all()}
-
         total_dests = sum(len(v) for v in UZ_DESTINATIONS.values())
         self.stdout.write(self.style.MIGRATE_HEADING(
             f"\nO'zbekiston:  {len(UZ_CITIES)} shahar  ·  {total_dests} destination"
             f"  ·  rasm: {'HA' if do_images else 'YO‘Q'}\n"))
 
         cities_made = 0
-        created_total = 0
-        skipped_total = 0
-        images_total = 0
+        cities = []
 
         for city_name, (has_air, city_kw) in UZ_CITIES.items():
             # --- shahar ---
@@ -266,46 +261,36 @@ class Command(BaseCommand):
                     except Exception:  # noqa: BLE001
                         pass
 
-            made = 0
-            for row in UZ_DESTINATIONS[city_name]:
-                name, trip, price, season, flag, tags, kw, blurb = row
-                full_name = f"{name}, {city_name}"
-                slug = slugify(full_name)
+            cities.append((city, city_state, has_air))
 
-                dest = Destination.objects.filter(slug=slug).first()
-                if dest is None:
-                    try:
-                        dest = self._create(city, country, has_air, full_name, name,
-                                             trip, price, season, flag, tags, blurb,
-                                             tag_by, act_by)
-                        created_total += 1
-                        made += 1
-                    except Exception as exc:  # noqa: BLE001
-                        self.stdout.write(self.style.ERROR(f"   ✗ {full_name}: {exc}"))
-                        continue
-                else:
-                    skipped_total += 1
-
-                if do_images and not dest.images.exists():
-                    if self._attach_image(dest, kw):
-                        images_total += 1
-                    time.sleep(0.2)
+        records = [
+            self._record(city, has_air, *row)
+            for city, _, has_air in cities for row in UZ_DESTINATIONS[city.name]
+        ]
+        # Bitta bulk import: destinationlar, teg/activity, rasmlar (parallel), indekslar
+        report = CatalogueImporter(download_workers=opts["workers"], with_images=do_images).run(records)
+        made = Counter(Destination.objects.filter(pk__in=report.created_ids).values_list("city_id", flat=True))
 
+        for city, city_state, _ in cities:
             # things_to_do ni yangilash
             city.things_to_do = city.destinations.count()
             city.save(update_fields=["things_to_do"])
-
             self.stdout.write(
-                f"  {city_name:<12} ({city_state})  yangi: +{made}  jami: {city.destinations.count()}")
+                f"  {city.name:<12} ({city_state})  yangi: +{made[city.pk]}  jami: {city.things_to_do}")
 
+        for error in report.errors:
+            self.stdout.write(self.style.ERROR(f"   ✗ {error}"))
+        for line in report.lines():
+            self.stdout.write(f"   {line}")
         self.stdout.write(self.style.SUCCESS(
-            f"\n✓ Tugadi.  Yangi shahar: {cities_made}   Yangi destination: {created_total}   "
-            f"O'tkazib yuborilgan: {skipped_total}   Rasm: {images_total}"))
+            f"\n✓ Tugadi.  Yangi shahar: {cities_made}   Yangi destination: {report.created}   "
+            f"O'tkazib yuborilgan: {report.skipped}   Rasm: {report.images}"))
 
     # ------------------------------------------------------------------
-    @transaction.atomic
-    def _create(self, city, country, has_air, full_name, short_name, trip, price,
-                season, flag, tags, blurb, tag_by, act_by):
+    @staticmethod
+    def _record(city, has_air, name, trip, price, season, flag, tags, kw, blurb):
+        """Bitta Destination yozuvi (apps/utils/importer.py formatida)."""
+        full_name = f"{name}, {city.name}"
         is_flash = flag == "flash"
         is_feat = flag == "feat"
         discount = 0
@@ -328,11 +313,11 @@ class Command(BaseCommand):
             act_keys = ["photography"]
 
         short, desc, why, included, restrict, extra = _descriptions(
-            city.name, short_name, blurb)
+            city.name, name, blurb)
 
-        dest = Destination(
-            city=city,
-            country=country,
+        return dict(
+            city=city.name,
+            country="Uzbekistan",
             name=full_name,
             short_description=short,
             description=desc,
@@ -348,7 +333,7 @@ class Command(BaseCommand):
             trip_type=trip,
             duration=dur,
             season=season,
-            visible_reviews_count=random.randint(60, 2600),
+            **seed_rating_fields(random.randint(60, 2600), random.uniform(4.2, 4.9)),
             is_free_cancellation=True,
             free_cancellation_hours=random.choice([24, 24, 48]),
             is_popular=flag == "pop",
@@ -359,41 +344,18 @@ class Command(BaseCommand):
             whats_included=included,
             restrictions=restrict,
             additional_info=extra,
+            tags=tags,
+            activities=act_keys,
+            # muqobil manbalar: LoremFlickr (kalit so'z) -> fallback Picsum
+            images=[_image_urls(kw, slugify(full_name))],
         )
-        dest.save()
-
-        t_objs = [tag_by[t] for t in tags if t in tag_by]
-        a_objs = [act_by[a] for a in act_keys if a in act_by]
-        if t_objs:
-            dest.tags.set(t_objs)
-        if a_objs:
-            dest.activities.set(a_objs)
-        return dest
 
     # ------------------------------------------------------------------
-    def _attach_image(self, dest, kw):
-        data = self._fetch(kw, dest.slug)
-        if not data:
-            return False
-        try:
-            img = DestinationImage(destination=dest, order=0)
-            img.image = ContentFile(data, name=f"{dest.slug}.jpg")
-            img.save()
-            return True
-        except Exception as exc:  # noqa: BLE001
-            self.stdout.write(self.style.WARNING(f"   ! rasm: {dest.slug}: {exc}"))
-            return False
-
     @staticmethod
     def _fetch(kw, seed):
-        """LoremFlickr (kalit so'z) -> fallback Picsum. Bytes yoki None."""
-        urls = [
-            f"https://loremflickr.com/800/600/{kw}",
-            f"https://loremflickr.com/800/600/uzbekistan,architecture",
-            f"https://picsum.photos/seed/{seed}/800/600",
-        ]
+        """Shahar rasmi: LoremFlickr (kalit so'z) -> fallback Picsum. Bytes yoki None."""
         headers = {"User-Agent": "Mozilla/5.0 (TravelHub seeder)"}
-        for url in urls:
+        for url in _image_urls(kw, seed):
             try:
                 resp = requests.get(url, timeout=15, headers=headers)
                 if resp.status_code == 200 and len(resp.content) > 2000:
@@ -404,6 +366,14 @@ class Command(BaseCommand):
         return None
 
 
+def _image_urls(kw, seed):
+    return [
+        f"https://loremflickr.com/800/600/{kw}",
+        "https://loremflickr.com/800/600/uzbekistan,architecture",
+        f"https://picsum.photos/seed/{seed}/800/600",
+    ]
+
+
 # ----------------------------------------------------------------------
 def _descriptions(city, name, blurb):
     """Real blurb asosida CKEditor HTML matnlari."""
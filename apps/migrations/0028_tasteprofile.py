@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0027_activity_name_en_activity_name_ru_activity_name_uz_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TasteProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_at', models.DateTimeField(auto_now_add=True)),
+                ('created_at', models.DateTimeField(auto_now=True)),
+                ('ref_time', models.DateTimeField()),
+                ('seeds', models.JSONField(blank=True, default=dict, help_text="destination_id -> og'irlik")),
+                ('feedback', models.JSONField(blank=True, default=dict, help_text='destination_id -> down | dismiss')),
+                ('catalog_version', models.BigIntegerField(blank=True, null=True)),
+                ('trip_types', models.JSONField(blank=True, default=dict)),
+                ('tags', models.JSONField(blank=True, default=dict)),
+                ('activities', models.JSONField(blank=True, default=dict)),
+                ('countries', models.JSONField(blank=True, default=dict)),
+                ('price_sum', models.FloatField(default=0.0)),
+                ('price_w', models.FloatField(default=0.0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='taste_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Taste Profile',
+                'verbose_name_plural': 'Taste Profiles',
+            },
+        ),
+    ]
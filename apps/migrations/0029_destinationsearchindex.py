@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:24
+
+import unicodedata
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+LANGUAGES = ('en', 'uz', 'ru')
+BATCH_SIZE = 500
+APOSTROPHES = str.maketrans({'ʻ': "'", 'ʼ': "'", '’': "'", '‘': "'", '`': "'"})
+NAME_FIELDS = ['name'] + [f'name_{lang}' for lang in LANGUAGES]
+PLACE_FIELDS = ([f'city__name_{lang}' for lang in LANGUAGES]
+                + [f'country__name_{lang}' for lang in LANGUAGES]
+                + [f'city__country__name_{lang}' for lang in LANGUAGES])
+LOCATION_FIELDS = [f'location_{lang}' for lang in LANGUAGES]
+
+
+def _fold(text):
+    # apps.utils.search.fold bilan bir xil
+    return unicodedata.normalize('NFKC', text or '').casefold().translate(APOSTROPHES).replace("'", '')
+
+
+def _join(values):
+    seen = []
+    for value in values:
+        value = _fold(value).strip()
+        if value and value not in seen:
+            seen.append(value)
+    return ' '.join(seen)
+
+
+def backfill_search_index(apps, schema_editor):
+    Destination = apps.get_model('apps', 'Destination')
+    DestinationSearchIndex = apps.get_model('apps', 'DestinationSearchIndex')
+    rows = Destination.objects.order_by('pk').values('pk', *NAME_FIELDS, *PLACE_FIELDS, *LOCATION_FIELDS)
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        names = _join(row[f] for f in NAME_FIELDS)
+        places = _join(row[f] for f in PLACE_FIELDS)
+        batch.append(DestinationSearchIndex(
+            destination_id=row['pk'], names=names, places=places,
+            document=_join([names, places, *(row[f] for f in LOCATION_FIELDS)]),
+        ))
+        if len(batch) >= BATCH_SIZE:
+            DestinationSearchIndex.objects.bulk_create(batch)
+            batch = []
+    DestinationSearchIndex.objects.bulk_create(batch)
+    if schema_editor.connection.vendor == 'postgresql':
+        DestinationSearchIndex.objects.update(
+            search_vector=(SearchVector('names', weight='A', config='simple')
+                           + SearchVector('places', weight='B', config='simple')
+                           + SearchVector('document', weight='D', config='simple')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0028_tasteprofile'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.CreateModel(
+            name='DestinationSearchIndex',
+            fields=[
+                ('destination', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_index', serialize=False, to='apps.destination')),
+                ('names', models.TextField(blank=True)),
+                ('places', models.TextField(blank=True)),
+                ('document', models.TextField(blank=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Destination Search Index',
+                'verbose_name_plural': 'Destination Search Index',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='dest_search_vector_gin'), django.contrib.postgres.indexes.GinIndex(fields=['document'], name='dest_search_document_trgm', opclasses=['gin_trgm_ops'])],
+            },
+        ),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:05
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+RATING_SUMS = {
+    'rating_sum': 'rating',
+    'service_sum': 'service_quality',
+    'cleanliness_sum': 'cleanliness',
+    'facilities_sum': 'facilities',
+    'location_sum': 'location_rating',
+    'value_sum': 'value_for_money',
+}
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Destination = apps.get_model('apps', 'Destination')
+    Review = apps.get_model('apps', 'Review')
+    visible = Review.objects.filter(destination=OuterRef('pk'), is_visible=True).order_by().values('destination')
+
+    def aggregate(expression, default=0):
+        return Coalesce(Subquery(visible.annotate(value=expression).values('value')), Value(default))
+
+    Destination.objects.update(
+        visible_reviews_count=aggregate(Count('id')),
+        avg_rating=aggregate(Avg('rating'), 0.0),
+        **{column: aggregate(Sum(field)) for column, field in RATING_SUMS.items()},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0029_destinationsearchindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='avg_rating',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='cleanliness_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='facilities_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='location_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='service_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='value_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_cover_images(apps, schema_editor):
+    Destination = apps.get_model('apps', 'Destination')
+    DestinationImage = apps.get_model('apps', 'DestinationImage')
+    first = DestinationImage.objects.filter(destination=OuterRef('pk')).order_by('order', 'pk')
+    Destination.objects.update(cover_image=Coalesce(Subquery(first.values('image')[:1]), Value('')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0030_destination_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='cover_image',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_cover_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0031_destination_cover_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='image_processing',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='destinationimage',
+            name='image_processing',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='hotelimage',
+            name='image_processing',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:10
+
+import os
+
+from django.db import migrations, models
+
+VARIANTS = ('card', 'thumb', 'hero')
+IMAGE_MODELS = ('City', 'DestinationImage', 'HotelImage')
+
+
+def backfill_image_variants(apps, schema_editor):
+    # Variantlari storage'da bor rasmlar belgilanadi; qolganlari asl faylni ko'rsatadi (build_image_variants)
+    for model_name in IMAGE_MODELS:
+        model = apps.get_model('apps', model_name)
+        storage = model._meta.get_field('image').storage
+        ready = []
+        for pk, name in model.objects.exclude(image='').exclude(image__isnull=True).values_list('pk', 'image'):
+            base = os.path.splitext(name)[0]
+            if all(storage.exists(f'{base}_{variant}.webp') for variant in VARIANTS):
+                ready.append(pk)
+        model.objects.filter(pk__in=ready).update(image_variants=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0032_image_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='image_variants',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='destinationimage',
+            name='image_variants',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='hotelimage',
+            name='image_variants',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_image_variants, migrations.RunPython.noop),
+    ]
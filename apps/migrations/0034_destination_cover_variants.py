@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:30
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_cover_variants(apps, schema_editor):
+    Destination = apps.get_model('apps', 'Destination')
+    DestinationImage = apps.get_model('apps', 'DestinationImage')
+    first = DestinationImage.objects.filter(
+        destination=OuterRef('pk'), image_processing=False).order_by('order', 'pk')
+    Destination.objects.update(
+        cover_image=Coalesce(Subquery(first.values('image')[:1]), Value('')),
+        cover_variants=Coalesce(Subquery(first.values('image_variants')[:1]), Value(False)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0033_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='cover_variants',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_cover_variants, migrations.RunPython.noop),
+    ]
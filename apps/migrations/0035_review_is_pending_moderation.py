@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:05
+
+from django.db import migrations, models
+from django.db.models import CharField, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+WAITING_MESSAGE = "Review saved to database. Waiting for Celery AI task."
+
+
+def backfill_pending_moderation(apps, schema_editor):
+    # Navbatda faqat AI natijasi hali yozilmaganlar: oxirgi "Pending AI Moderation" logi
+    # kutish xabarida qolgan (batch uni "AI Moderation Result: ..." ga almashtiradi)
+    Review = apps.get_model('apps', 'Review')
+    ActionLog = apps.get_model('apps', 'ActionLog')
+    latest = ActionLog.objects.filter(
+        object_id=Cast(OuterRef('pk'), CharField()), action__endswith='(Pending AI Moderation)',
+    ).order_by('-created_at').values('message')[:1]
+    pending = Review.objects.filter(is_verified=False, is_visible=False, user__isnull=False).annotate(
+        last_message=Subquery(latest)).filter(last_message=WAITING_MESSAGE)
+    Review.objects.filter(pk__in=list(pending.values_list('pk', flat=True))).update(is_pending_moderation=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0034_destination_cover_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='is_pending_moderation',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_pending_moderation, migrations.RunPython.noop),
+    ]
@@ -13,6 +13,7 @@ from apps.models.users import User
 from apps.models.wishlist import Wishlist
 from apps.models.price_alert import PriceAlert
 from apps.models.trip_plan import TripPlan, TripPlanItem
-from apps.models.recommendations import RecommendationFeedback, RecommendationProfile
+from apps.models.recommendations import RecommendationFeedback, RecommendationProfile, TasteProfile
 
 
+from apps.models.search import DestinationSearchIndex
@@ -1,16 +1,10 @@
-from io import BytesIO
-
-from django.core.files.base import ContentFile
-from django.core.files.uploadedfile import (InMemoryUploadedFile,
-                                            TemporaryUploadedFile)
 from django.core.validators import FileExtensionValidator
-from django.db.models import ImageField, Model
+from django.db.models import BooleanField, ImageField, Model
 from django.db.models.fields import DateTimeField, SlugField
 from django.utils.text import slugify
-from PIL import Image
 
 from apps.utils.uplode_image import (upload_image_size_5mb_validator,
-                                     upload_to_image)
+                                     upload_to_image, variant_url)
 
 
 class SlugBaseModel(Model):
@@ -42,22 +36,34 @@ class ImageBaseModel(Model):
                        validators=[FileExtensionValidator(['jpeg', 'jpg', 'png', 'webp']),
                                    upload_image_size_5mb_validator],
                        help_text='jpg, png, webp are allowed')
+    image_processing = BooleanField(default=False, editable=False)     # process_uploaded_image navbatda
+    image_variants = BooleanField(default=False, editable=False)       # card / thumb / hero fayllari tayyor
 
     class Meta:
         abstract = True
 
-    def convert_img_to_webp(self):
-        is_new_upload = isinstance(self.image.file, (InMemoryUploadedFile, TemporaryUploadedFile))
+    @property
+    def image_uploaded(self):
+        """Yangi fayl biriktirilgan (hali storage'ga yozilmagan)."""
+        return bool(self.image) and not self.image._committed
+
+    def _variant_url(self, variant):
+        if not self.image:
+            return ''
+        # Variantlar yo'q (ishlov navbatda, ishlov xato bilan tugagan yoki eski rasm) — asl fayl ko'rsatiladi
+        return variant_url(self.image.name, variant, self.image.storage) if self.image_variants else self.image.url
+
+    @property
+    def thumb_url(self):
+        return self._variant_url('thumb')
 
-        if self._state.adding or is_new_upload:
-            img = Image.open(self.image)
-            img = img.convert("RGB")
-            buffer = BytesIO()
-            img.save(buffer, format="WEBP", quality=85)
-            buffer.seek(0)
+    @property
+    def card_url(self):
+        return self._variant_url('card')
 
-            self.image = ContentFile(buffer.read(), f"{self.image.name.split('.')[0]}.webp")
-            buffer.close()
+    @property
+    def hero_url(self):
+        return self._variant_url('hero')
 
     # def delete_old_img(self):
     #     self.is_new_upload = isinstance(self.image.file, (InMemoryUploadedFile, TemporaryUploadedFile))
@@ -68,6 +74,12 @@ class ImageBaseModel(Model):
 
     def save(self, *, force_insert=False, force_update=False, using=None, update_fields=None):
         # self.delete_old_img()
-        if self.image:
-            self.convert_img_to_webp()
+        # WebP ga o'tkazish va variantlar — so'rovdan tashqarida (apps.tasks.process_uploaded_image,
+        # post_save signal orqali commitdan keyin); shu vaqtgacha rasm "processing" holatida
+        self._image_uploaded = self.image_uploaded
+        if self._image_uploaded:
+            self.image_processing = True
+            self.image_variants = False
+            if update_fields is not None:
+                update_fields = {*update_fields, 'image_processing', 'image_variants'}
         super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
@@ -1,13 +1,53 @@
+from django.core.files.storage import default_storage
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models import (CASCADE, SET_NULL, BooleanField, CharField,
-                              ForeignKey, ManyToManyField,
+from django.db.models import (CASCADE, SET_NULL, BooleanField, CharField, FloatField,
+                              ForeignKey, ManyToManyField, OuterRef, Prefetch, QuerySet, Subquery, Value,
                               PositiveIntegerField, PositiveSmallIntegerField, ImageField, TimeField, Avg)
 from django.db.models.enums import TextChoices
 from django.db.models.fields import DecimalField, DateTimeField, TextField
+from django.db.models.functions import Coalesce
 from django_ckeditor_5.fields import CKEditor5Field
 
 from apps.models.base import SlugBaseModel, CreatedBaseModel, ImageBaseModel
+from apps.models.tags import Tag
+from apps.utils.uplode_image import variant_url
+
+
+class DestinationQuerySet(QuerySet):
+    # Karta shablonlari (templates/apps/partials/_*_card.html) va keyset paginatsiya ishlatadigan ustunlar.
+    # Tarjima qilinadigan maydonlar (name, location, ...) modeltranslation orqali barcha tillari bilan olinadi
+    CARD_FIELDS = (
+        'id', 'slug', 'name', 'short_description', 'location', 'latitude', 'longitude', 'created_at',
+        'price', 'discount_percentage', 'hotels_count', 'has_flights', 'duration', 'package_type',
+        'is_flash_sale', 'flash_sale_end', 'is_featured', 'is_trending',
+        'avg_rating', 'visible_reviews_count', 'cover_image', 'cover_variants',
+        'city__id', 'city__name',
+    )
+
+    def for_cards(self):
+        """
+        Lenta kartalari uchun proyeksiya: faqat karta ustunlari va shahar nomi.
+        Reyting / izohlar soni Destination ustunlarida — reviews jadvali umuman o'qilmaydi;
+        rasm va teglar card_prefetches() bilan (faqat keshda topilmagan kartalar uchun) yuklanadi.
+        """
+        return self.select_related('city').only(*self.CARD_FIELDS)
+
+    def refresh_cover_images(self):
+        """cover_image / cover_variants ni har destinationning birinchi (order, pk) rasmidan yozadi — bitta UPDATE."""
+        # Hali ishlov berilayotgan rasm hisobga olinmaydi — asl fayli WebP ga almashtiriladi
+        first = DestinationImage.objects.filter(
+            destination=OuterRef('pk'), image_processing=False).order_by('order', 'pk')
+        return self.update(cover_image=Coalesce(Subquery(first.values('image')[:1]), Value('')),
+                           cover_variants=Coalesce(Subquery(first.values('image_variants')[:1]), Value(False)))
+
+
+def card_prefetches():
+    """Karta uchun rasm (fayl yo'li, tartib) va teg (nom, ikonka) ustunlarigina."""
+    return (
+        Prefetch('images', queryset=DestinationImage.objects.only('id', 'destination_id', 'image', 'order')),
+        Prefetch('tags', queryset=Tag.objects.only('id', 'name', 'icon')),
+    )
 
 
 class Destination(SlugBaseModel, CreatedBaseModel):
@@ -76,6 +116,15 @@ class Destination(SlugBaseModel, CreatedBaseModel):
     season = CharField(max_length=20, choices=Season.choices, blank=True)
 
     visible_reviews_count = PositiveIntegerField(default=0, verbose_name="Visible Reviews Count")
+    # Ko'rinadigan izohlar reytinglari yig'indisi — signal bilan O(1) yangilanadi (apps.utils.ratings).
+    # Ro'yxatlar reviews jadvalini JOIN qilmaydi, reyting filtri indeksdan foydalanadi.
+    avg_rating = FloatField(default=0, db_index=True, editable=False)
+    rating_sum = PositiveIntegerField(default=0, editable=False)
+    service_sum = PositiveIntegerField(default=0, editable=False)
+    cleanliness_sum = PositiveIntegerField(default=0, editable=False)
+    facilities_sum = PositiveIntegerField(default=0, editable=False)
+    location_sum = PositiveIntegerField(default=0, editable=False)
+    value_sum = PositiveIntegerField(default=0, editable=False)
 
     is_free_cancellation = BooleanField(default=False)
     free_cancellation_hours = PositiveIntegerField(
@@ -95,6 +144,28 @@ class Destination(SlugBaseModel, CreatedBaseModel):
 
     package_type = CharField(max_length=20, choices=PackageType.choices, blank=True, default=PackageType.HONEYMOON)
 
+    # Birinchi rasm fayli (DestinationImage.image nomi) — signal bilan yangilanadi.
+    # Ro'yxatlar images jadvaliga murojaat qilmaydi, tayyor variant URL'ini oladi
+    cover_image = CharField(max_length=255, blank=True, editable=False)
+    cover_variants = BooleanField(default=False, editable=False)    # variantlari yo'q bo'lsa — asl fayl
+
+    objects = DestinationQuerySet.as_manager()
+
+    # Faqat queryset.update() bilan yuritiladigan ustunlar (izohlar signali, muqova rasmi).
+    # Oddiy save() ularni yozmaydi — xotiradagi eski qiymat yangisini bosib ketmasin
+    DERIVED_FIELDS = frozenset({
+        'visible_reviews_count', 'avg_rating', 'rating_sum', 'service_sum', 'cleanliness_sum',
+        'facilities_sum', 'location_sum', 'value_sum', 'cover_image', 'cover_variants',
+    })
+
+    def save(self, *, force_insert=False, force_update=False, using=None, update_fields=None):
+        if update_fields is None and not self._state.adding and not force_insert:
+            deferred = self.get_deferred_fields()
+            update_fields = [f.name for f in self._meta.concrete_fields
+                             if not f.primary_key and f.name not in self.DERIVED_FIELDS
+                             and f.attname not in deferred]
+        super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
+
     @property
     def cancellation_text(self):
         if not self.is_free_cancellation:
@@ -126,53 +197,54 @@ class Destination(SlugBaseModel, CreatedBaseModel):
 
     @property
     def rating(self):
-        if hasattr(self, 'db_avg_rating'):
-            return round(self.db_avg_rating or 0, 1)
+        return round(self.avg_rating or 0, 1)
 
-        # 2-yo'l: Agar oddiy Detail sahifasida chaqirilsa, eski usulda bazadan oladi
-        from django.db.models import Avg
-        result = self.reviews.filter(is_visible=True).aggregate(Avg('rating'))
-        return round(result['rating__avg'] or 0, 1)
+    @property
+    def cover_url(self):
+        return default_storage.url(self.cover_image) if self.cover_image else ''
+
+    def _cover_variant_url(self, variant):
+        # Variantlar hali qurilmagan (eski rasm, build_image_variants ishga tushmagan) — asl fayl
+        return variant_url(self.cover_image, variant) if self.cover_variants else self.cover_url
+
+    @property
+    def cover_thumb_url(self):
+        return self._cover_variant_url('thumb')
+
+    @property
+    def cover_card_url(self):
+        return self._cover_variant_url('card')
+
+    @property
+    def cover_hero_url(self):
+        return self._cover_variant_url('hero')
+
+    @property
+    def reviews_count(self):
+        return self.visible_reviews_count
+
+    def _average(self, total):
+        return round(total / self.visible_reviews_count, 1) if self.visible_reviews_count else 0
 
     @property
     def service_score(self):
-        if hasattr(self, 'db_avg_service'):
-            return round(self.db_avg_service or 0, 1)
-        from django.db.models import Avg
-        result = self.reviews.filter(is_visible=True).aggregate(Avg('service_quality'))
-        return round(result['service_quality__avg'] or 0, 1)
+        return self._average(self.service_sum)
 
     @property
     def cleanliness_score(self):
-        if hasattr(self, 'db_avg_cleanliness'):
-            return round(self.db_avg_cleanliness or 0, 1)
-        from django.db.models import Avg
-        result = self.reviews.filter(is_visible=True).aggregate(Avg('cleanliness'))
-        return round(result['cleanliness__avg'] or 0, 1)
+        return self._average(self.cleanliness_sum)
 
     @property
     def facilities_score(self):
-        if hasattr(self, 'db_avg_facilities'):
-            return round(self.db_avg_facilities or 0, 1)
-        from django.db.models import Avg
-        result = self.reviews.filter(is_visible=True).aggregate(Avg('facilities'))
-        return round(result['facilities__avg'] or 0, 1)
+        return self._average(self.facilities_sum)
 
     @property
     def access_score(self):
-        if hasattr(self, 'db_avg_access'):
-            return round(self.db_avg_access or 0, 1)
-        from django.db.models import Avg
-        result = self.reviews.filter(is_visible=True).aggregate(Avg('location_rating'))
-        return round(result['location_rating__avg'] or 0, 1)
+        return self._average(self.location_sum)
 
     @property
     def value_score(self):
-        if hasattr(self, 'db_avg_value'):
-            return round(self.db_avg_value or 0, 1)
-        from django.db.models import Avg
-        result = self.reviews.filter(is_visible=True).aggregate(Avg('value_for_money'))
-        return round(result['value_for_money__avg'] or 0, 1)
+        return self._average(self.value_sum)
 
     @property
     def visible_reviews(self):
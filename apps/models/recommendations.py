@@ -6,8 +6,11 @@ Tavsiya tizimining o'rganuvchi qatlami — 3-bosqich.
   • RecommendationFeedback — har kartadagi 👍 / 👎 / "Qiziq emas".
     Tizim keyingi yuklashda shu asosda qayta saralaydi.
   • RecommendationProfile  — quiz javoblari (cold-start personalizatsiyasi).
+  • TasteProfile           — tarixdan yig'ilgan ta'm profili; signallar bilan
+    inkremental yangilanadi (apps.recommendations.profile).
 """
-from django.db.models import (CASCADE, CharField, ForeignKey, OneToOneField,
+from django.db.models import (CASCADE, BigIntegerField, CharField, DateTimeField,
+                              FloatField, ForeignKey, JSONField, OneToOneField,
                               UniqueConstraint)
 from django.db.models.enums import TextChoices
 
@@ -56,4 +59,32 @@ class RecommendationProfile(CreatedBaseModel):
         return [s.strip() for s in self.quiz_styles.split(',') if s.strip()]
 
     def __str__(self):
-        return f"Taste quiz: {self.user}"
\ No newline at end of file
+        return f"Taste quiz: {self.user}"
+
+
+class TasteProfile(CreatedBaseModel):
+    """Foydalanuvchi ta'm profili — har so'rovda butun tarixni o'qimaslik uchun.
+
+    Og'irliklar `ref_time` paytidagi qiymatda saqlanadi; recency decay
+    ko'paytma bo'lgani uchun o'qishda bitta koeffitsient bilan qayta hisoblanadi.
+    """
+
+    user = OneToOneField('apps.User', CASCADE, related_name='taste_profile')
+    ref_time = DateTimeField()
+    seeds = JSONField(default=dict, blank=True, help_text="destination_id -> og'irlik")
+    feedback = JSONField(default=dict, blank=True, help_text="destination_id -> down | dismiss")
+    # seedlardan tarqatilgan profil — katalog versiyasi o'zgarsa qayta yig'iladi
+    catalog_version = BigIntegerField(null=True, blank=True)
+    trip_types = JSONField(default=dict, blank=True)
+    tags = JSONField(default=dict, blank=True)
+    activities = JSONField(default=dict, blank=True)
+    countries = JSONField(default=dict, blank=True)
+    price_sum = FloatField(default=0.0)
+    price_w = FloatField(default=0.0)
+
+    class Meta:
+        verbose_name = 'Taste Profile'
+        verbose_name_plural = 'Taste Profiles'
+
+    def __str__(self):
+        return f"Taste profile: {self.user}"
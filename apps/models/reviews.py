@@ -46,6 +46,8 @@ class Review(CreatedBaseModel):
     
     is_visible = BooleanField(default=True)
     is_verified = BooleanField(default=False)
+    # AI moderatsiya navbatida (foydalanuvchi yozdi / tahrirladi). Admin qo'lda yashirgan izoh navbatga tushmaydi
+    is_pending_moderation = BooleanField(default=False, db_index=True, editable=False)
 
     helpful_count = PositiveSmallIntegerField(default=0, db_index=True)
     reported_count = PositiveSmallIntegerField(default=0)
@@ -0,0 +1,36 @@
+"""
+apps/models/search.py
+=====================
+Destination qidiruv indeksi — header qidiruvi va filtrlar shu jadvaldan o'qiydi.
+
+  • names / places / document — barcha tarjimalardan (name_en/uz/ru va h.k.)
+    yig'ilgan, kichik harfga keltirilgan matn (apps.utils.search).
+  • search_vector — PostgreSQL tsvector (GIN), nom > shahar/davlat > qolgani
+    og'irliklari bilan; document ustida pg_trgm GIN — xato yozilgan so'zlar uchun.
+
+Qatorlar signallar orqali yangilanadi; to'liq qayta qurish:
+    python manage.py rebuild_search_index
+"""
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import CASCADE, DateTimeField, Model, OneToOneField, TextField
+
+
+class DestinationSearchIndex(Model):
+    destination = OneToOneField('apps.Destination', CASCADE, primary_key=True, related_name='search_index')
+    names = TextField(blank=True)
+    places = TextField(blank=True)
+    document = TextField(blank=True)
+    search_vector = SearchVectorField(null=True, blank=True)
+    updated_at = DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='dest_search_vector_gin'),
+            GinIndex(fields=['document'], opclasses=['gin_trgm_ops'], name='dest_search_document_trgm'),
+        ]
+        verbose_name = 'Destination Search Index'
+        verbose_name_plural = 'Destination Search Index'
+
+    def __str__(self):
+        return f"Search index: {self.destination_id}"
@@ -11,10 +11,17 @@ Uchta vazifa:
   • parse_search_query()  — tabiiy til so'rovini structured filterga aylantiradi
   • taste_and_pitches()   — Taste portreti + Top Pick pitchlarini 1 chaqiruvda yozadi
 Natijalar keshlanadi (pul va vaqt tejash uchun).
+
+Tavsiya sahifasi Gemini'ni KUTMAYDI: view faqat keshni o'qiydi
+(`enrich(..., cached_only=True)`), kesh bo'sh bo'lsa `schedule_enrichment()`
+Celery'da generatsiya qiladi, front-end esa tayyor matnni
+`recommendation/ai-text/` endpointidan oladi.
 """
 import hashlib
 import json
 import logging
+import math
+from collections import Counter
 
 import google.generativeai as genai
 
@@ -26,6 +33,9 @@ logger = logging.getLogger(__name__)
 _MODEL = 'gemini-flash-latest'
 _TIMEOUT = 12.0
 _CACHE_TTL = 60 * 60 * 24            # 24 soat
+_PITCH_TTL = 60 * 60 * 24 * 3       # 3 kun — tungi job faqat yetishmaganlarini to'ldiradi
+_PITCH_MISS_TTL = 60 * 60            # Gemini bermagan pitch / portret shuncha vaqt qayta so'ralmaydi
+_ENRICH_LOCK_TTL = 60                # bitta foydalanuvchi uchun parallel generatsiya bo'lmasin
 _SAFETY = [
     {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
     {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
@@ -175,25 +185,27 @@ QOIDALAR:
 """
 
 
-def taste_and_pitches(taste, picks):
-    """
-    taste  — engine.taste_dna() dict
-    picks  — [{'id','name','place','trip_type','reasons'}] ro'yxati
-    →  {'portrait': str, 'pitches': {id: str}}  yoki  None (fallback uchun)
-    """
-    if not picks or not ai_enabled():
-        return None
+def taste_bucket(taste):
+    """Pitch keshi uchun qo'pol ta'm guruhi: top-2 uslub + byudjet (foizlar hisobga olinmaydi)."""
+    keys = [s['key'] for s in taste.get('styles', [])[:2]]
+    return f"{'+'.join(keys) or 'none'}|{taste.get('budget') or '-'}"
+
+
+def _pitch_cache_key(bucket, dest_id):
+    return f'recai:pitch:uz2:{hashlib.md5(bucket.encode()).hexdigest()[:12]}:{dest_id}'
+
 
+def _portrait_cache_key(taste):
+    # portret mintaqa va foizlarga sezgir — 10% qadam bilan yaxlitlanadi
     signature = json.dumps({
-        't': [(s['key'], s['pct']) for s in taste.get('styles', [])],
+        't': [(s['key'], round(s['pct'], -1)) for s in taste.get('styles', [])],
         'b': taste.get('budget'), 'r': taste.get('favorite_region'),
-        'p': sorted(p['id'] for p in picks),
     }, sort_keys=True)
-    cache_key = 'recai:tp:uz1:' + hashlib.md5(signature.encode()).hexdigest()
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached or None
+    return 'recai:portrait:uz2:' + hashlib.md5(signature.encode()).hexdigest()
+
 
+def _generate_pitches(taste, picks):
+    """Gemini chaqiruvi: {'portrait': str, 'pitches': {id: str}} yoki None."""
     styles = ', '.join(f"{s['label']} {s['pct']}%" for s in taste.get('styles', [])) or 'no history yet'
     picks_txt = '\n'.join(
         f"- id={p['id']} | {p['name']} ({p['place']}) | type={p['trip_type']} | why: {p['reasons']}"
@@ -219,7 +231,6 @@ def taste_and_pitches(taste, picks):
         result = {'portrait': (data.get('portrait') or '').strip(), 'pitches': pitches}
         if not result['portrait'] and not pitches:
             return None
-        cache.set(cache_key, result, _CACHE_TTL)
         return result
     except json.JSONDecodeError as exc:
         logger.error("AI pitch JSON xatosi: %s", exc)
@@ -228,25 +239,77 @@ def taste_and_pitches(taste, picks):
     return None
 
 
-def enrich(taste, picks):
+def taste_and_pitches(taste, picks, cached_only=False, with_portrait=True):
+    """
+    taste  — engine.taste_dna() dict
+    picks  — [{'id','name','place','trip_type','reasons'}] ro'yxati
+    →  {'portrait': str, 'pitches': {id: str}, 'complete': bool, 'written': int}
+       yoki  None (fallback uchun)
+
+    Pitchlar (destination, ta'm guruhi) bo'yicha ALOHIDA keshlanadi: bitta pick
+    yoki uslub foizi o'zgarsa ham qolgan pitchlar keshdan olinadi, Gemini'dan
+    faqat yetishmaganlari (va portret) so'raladi. Gemini bermagan pitch / portret
+    bo'sh satr sifatida _PITCH_MISS_TTL ga eslab qolinadi — qayta-qayta so'ralmaydi.
+    complete — so'raladigan narsa qolmadi (AI matni yoki eslab qolingan "yo'q");
+    written — shu chaqiruvda Gemini'dan olingan yangi pitchlar soni.
+    cached_only=True — faqat kesh o'qiladi, Gemini chaqirilmaydi (request ichida).
+    with_portrait=False — portret so'ralmaydi va keshlanmaydi (tungi job'ning soxta ta'mlari).
+    """
+    if not picks:
+        return None
+    portrait_key = _portrait_cache_key(taste) if with_portrait else None
+    bucket = taste_bucket(taste)
+    pitch_keys = {p['id']: _pitch_cache_key(bucket, p['id']) for p in picks}
+    cached = cache.get_many([key for key in (portrait_key, *pitch_keys.values()) if key])
+    portrait = cached.get(portrait_key) if with_portrait else ''     # None — hali so'ralmagan
+    pitches = {pid: cached[key] for pid, key in pitch_keys.items() if key in cached}
+    missing = [p for p in picks if p['id'] not in pitches]
+    written = 0
+
+    if (missing or portrait is None) and not cached_only and ai_enabled():
+        data = _generate_pitches(taste, missing or picks[:1]) or {'portrait': '', 'pitches': {}}
+        fresh = {p['id']: data['pitches'].get(p['id'], '') for p in missing}
+        to_cache = {pitch_keys[pid]: txt for pid, txt in fresh.items() if txt}
+        misses = {pitch_keys[pid]: '' for pid, txt in fresh.items() if not txt}
+        if portrait is None:
+            portrait = data['portrait']
+            (to_cache if portrait else misses)[portrait_key] = portrait
+        cache.set_many(to_cache, _PITCH_TTL)
+        cache.set_many(misses, _PITCH_MISS_TTL)
+        pitches = {**fresh, **pitches}
+        written = sum(1 for txt in fresh.values() if txt)
+
+    complete = portrait is not None and len(pitches) == len(pitch_keys)
+    pitches = {pid: txt for pid, txt in pitches.items() if txt}
+    if not portrait and not pitches and not complete:
+        return None
+    return {'portrait': portrait or '', 'pitches': pitches, 'complete': complete, 'written': written}
+
+
+def _pick_payload(dest, reasons):
+    return {
+        'id': dest.id,
+        'name': dest.name,
+        'place': dest.city.name if dest.city_id else (dest.country.name if dest.country_id else ''),
+        'trip_type': dest.trip_type or 'travel',
+        'reasons': reasons,
+    }
+
+
+def enrich(taste, picks, cached_only=False):
     """
     Engine natijasiga Gemini matnini joyida qo'shadi:
       • taste['portrait']      → AI portreti bilan almashtiriladi
       • pick['ai_pitch']       → AI pitchi bilan almashtiriladi
-    Muvaffaqiyat bo'lsa True, aks holda False (shablonli matn qoladi).
+    Portret va barcha pitchlar bo'yicha so'raladigan narsa qolmagan bo'lsa True
+    (Gemini bermaganlarida shablonli matn qoladi), aks holda False.
+    cached_only=True — tarmoqqa chiqmaydi, faqat tayyor (keshdagi) matn qo'yiladi.
     """
     if not picks:
         return False
-    payload = [{
-        'id': p['d'].id,
-        'name': p['d'].name,
-        'place': p['d'].city.name if p['d'].city_id else (
-            p['d'].country.name if p['d'].country_id else ''),
-        'trip_type': p['d'].trip_type or 'travel',
-        'reasons': '; '.join(r['text'] for r in p.get('reasons', [])),
-    } for p in picks]
-
-    data = taste_and_pitches(taste, payload)
+    payload = [_pick_payload(p['d'], '; '.join(r['text'] for r in p.get('reasons', []))) for p in picks]
+
+    data = taste_and_pitches(taste, payload, cached_only=cached_only)
     if not data:
         return False
     if data.get('portrait'):
@@ -255,4 +318,76 @@ def enrich(taste, picks):
     for p in picks:
         if p['d'].id in pitches:
             p['ai_pitch'] = pitches[p['d'].id]
-    return True
\ No newline at end of file
+    return data['complete']
+
+
+def schedule_enrichment(user, picks):
+    """
+    AI matni keshda yo'q — Celery'da generatsiya qilinadi (sahifa kutmaydi).
+    True — matn tayyorlanmoqda (front-end endpointdan so'rab turadi).
+    """
+    if not picks or not getattr(settings, 'GEMINI_API_KEY', None):
+        return False
+    owner = user.pk if (user and user.is_authenticated) else None
+    if cache.add(f'recai:enrich:lock:{owner or "anon"}', 1, _ENRICH_LOCK_TTL):
+        from apps.tasks import enrich_recommendation_page
+        enrich_recommendation_page.delay(owner)
+    return True
+
+
+# ────────────────────────────────────────────────────────────────────────────
+#  3) TUNGI PRE-GENERATSIYA  (eng ko'p uchraydigan ta'm guruhlari × top joylar)
+# ────────────────────────────────────────────────────────────────────────────
+PREGEN_BUCKETS = 10                  # nechta eng ommabop ta'm guruhi
+PREGEN_PER_BUCKET = 12               # har guruh uchun nechta destination
+PREGEN_CHUNK = 6                     # bitta Gemini so'roviga nechta pitch (sahifadagi Top Picks kabi)
+
+
+def common_taste_buckets(limit=PREGEN_BUCKETS):
+    """Saqlangan TasteProfile'lardan eng ko'p uchraydigan ta'm guruhlari → [taste dict]."""
+    from apps.models.recommendations import TasteProfile
+    from apps.recommendations.engine import BUDGET_LABELS, TRIP_TYPE_LABELS, _budget_band
+
+    counts = Counter()
+    rows = TasteProfile.objects.values_list('trip_types', 'price_sum', 'price_w')
+    for trip_types, price_sum, price_w in rows.iterator(chunk_size=2000):
+        if not trip_types or sum(trip_types.values()) <= 0:
+            continue
+        keys = tuple(k for k, _ in sorted(trip_types.items(), key=lambda kv: -kv[1])[:2])
+        budget = BUDGET_LABELS[_budget_band(price_sum / price_w)] if price_w > 0 else 'Mid-range'
+        counts[(keys, budget)] += 1
+
+    tastes = []
+    for (keys, budget), _ in counts.most_common(limit):
+        share = round(100 / len(keys))
+        tastes.append({
+            'styles': [{'key': k, 'label': TRIP_TYPE_LABELS.get(k, k.title()), 'pct': share} for k in keys],
+            'budget': budget,
+            'favorite_region': '—',
+        })
+    return tastes
+
+
+def pregenerate_pitches(buckets=PREGEN_BUCKETS, per_bucket=PREGEN_PER_BUCKET):
+    """
+    Ommabop ta'm guruhlari uchun eng yaxshi baholangan mos joylarning pitchlarini
+    oldindan yozadi. Keshda bor pitchlar qayta so'ralmaydi; soxta ta'mlar uchun portret
+    keshlanmaydi. Qaytadi: Gemini'dan olingan yangi pitchlar soni.
+    """
+    from apps.recommendations.snapshot import get_snapshot
+
+    if not ai_enabled():
+        return 0
+    snap = get_snapshot()
+    ranked = sorted(range(len(snap)), key=lambda i: -snap.avg_rating[i] * math.log1p(snap.rev_count[i]))
+
+    total = 0
+    for taste in common_taste_buckets(buckets):
+        keys = {s['key'] for s in taste['styles']}
+        reasons = f"Matches your {' & '.join(s['label'] for s in taste['styles'])} taste; highly rated"
+        picks = [_pick_payload(snap.destinations[i], reasons)
+                 for i in ranked if snap.trip_type[i] in keys][:per_bucket]
+        for start in range(0, len(picks), PREGEN_CHUNK):
+            data = taste_and_pitches(taste, picks[start:start + PREGEN_CHUNK], with_portrait=False)
+            total += data['written'] if data else 0
+    return total
@@ -0,0 +1,255 @@
+"""
+apps/recommendations/benchmark.py
+=================================
+RecommendationEngine uchun benchmark: sintetik katalog + o'lchov.
+
+Seed buyruqlari bir necha yuz destination yaratadi xolos — katalog 10k/100k
+bo'lganda engine qanday ishlashini ko'rib bo'lmasdi. Bu modul:
+
+  1. `generate_catalogue()` — N ta destination (teg, faoliyat, sharh, flash
+     sale, trending...) va tarixi turlicha bo'lgan foydalanuvchilarni
+     `bulk_create` bilan yaratadi;
+  2. `run_benchmark()` — tavsiya sahifasi tartibida (init → taste_dna →
+     top_picks → karusellar → search) har bosqichning vaqti, SQL so'rovlar
+     soni va eng yuqori xotirasini (tracemalloc) o'lchaydi.
+
+Hammasi bitta tranzaksiyada bajariladi va oxirida ROLLBACK qilinadi, kesh esa
+alohida locmem bilan almashtiriladi — ishchi bazaga ham, Redis'ga ham iz qolmaydi.
+Buyruq: `python manage.py benchmark_recommendations`.
+"""
+import gc
+import random
+import statistics
+import string
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone, translation
+
+from apps.models.activities import Activity
+from apps.models.categories import City
+from apps.models.countries import Country
+from apps.models.destinations import Destination
+from apps.models.orders import Booking
+from apps.models.recommendations import RecommendationFeedback, RecommendationProfile
+from apps.models.reviews import Review
+from apps.models.tags import Tag
+from apps.models.users import User
+from apps.models.wishlist import Wishlist
+from apps.utils.ratings import recompute_rating_aggregates
+
+BENCH_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                            'LOCATION': 'travelhub-benchmark'}}
+BATCH_SIZE = 2000
+SEARCH_TEXT = 'summer beach trip under $120'
+
+# Foydalanuvchi profillari: nom -> (wishlist, sharh, booking, feedback) soni
+PROFILES = {
+    'anon': None,
+    'cold': (0, 0, 0, 0),
+    'light': (6, 2, 1, 1),
+    'heavy': (1500, 300, 120, 60),
+}
+STEPS = ('init', 'taste_dna', 'top_picks', 'because_you_saved', 'travelers_also_loved',
+         'perfect_for_season', 'hidden_gems', 'search')
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# SINTETIK KATALOG
+# ───────────────────────────────────────────────────────────────────────────
+
+def _free_country_codes(count):
+    """Bazadagi mavjud davlatlar bilan to'qnashmaydigan 2 harfli kodlar."""
+    taken = set(Country.objects.values_list('code', flat=True))
+    codes = (a + b for a in string.ascii_uppercase for b in string.ascii_uppercase)
+    return [c for c in codes if c not in taken][:count]
+
+
+def generate_catalogue(size, users=300, seed=1):
+    """`size` ta destination va `users` ta foydalanuvchi (+ PROFILES) yaratadi.
+
+    Qaytadi: {'users': {profil: User | None}, 'destinations': int}
+    """
+    rnd = random.Random(seed)
+    now = timezone.now()
+    token = f'{seed}-{int(time.time())}'
+
+    countries = Country.objects.bulk_create([
+        Country(name=f'Bench Country {code}', code=code, phone_code='+000', slug=f'bench-{token}-{code.lower()}')
+        for code in _free_country_codes(max(4, min(60, size // 2000)))
+    ])
+    cities = City.objects.bulk_create([
+        City(name=f'Bench City {i}', country=rnd.choice(countries), slug=f'bench-{token}-city-{i}')
+        for i in range(max(10, min(2000, size // 50)))
+    ])
+    tags = Tag.objects.bulk_create([Tag(name=f'bench tag {i}', slug=f'bench-{token}-tag-{i}') for i in range(40)])
+    acts = Activity.objects.bulk_create([
+        Activity(name=f'bench activity {i}', slug=f'bench-{token}-act-{i}') for i in range(20)
+    ])
+
+    trip_types = [t for t, _ in Destination.TripType.choices]
+    seasons = [s for s, _ in Destination.Season.choices]
+    dest_ids = []
+    for start in range(0, size, BATCH_SIZE):
+        batch = []
+        for i in range(start, min(size, start + BATCH_SIZE)):
+            city = rnd.choice(cities)
+            flash = rnd.random() < 0.08
+            batch.append(Destination(
+                name=f'Bench {city.name} #{i}', slug=f'bench-{token}-{i}', city=city, country=city.country,
+                location=f'{city.name}, {city.country.name}', price=rnd.choice((0, rnd.randint(5, 400))),
+                trip_type=rnd.choice(trip_types), season=rnd.choice(seasons),
+                is_trending=rnd.random() < 0.1, is_popular=rnd.random() < 0.1,
+                is_flash_sale=flash, flash_sale_end=now + timedelta(days=rnd.randint(1, 10)) if flash else None,
+            ))
+        created = Destination.objects.bulk_create(batch)
+        dest_ids.extend(d.id for d in created)
+
+        tag_rows, act_rows = [], []
+        for dest in created:
+            tag_rows += [Destination.tags.through(destination_id=dest.id, tag_id=t.id)
+                         for t in rnd.sample(tags, rnd.randint(1, 5))]
+            act_rows += [Destination.activities.through(destination_id=dest.id, activity_id=a.id)
+                         for a in rnd.sample(acts, rnd.randint(0, 3))]
+        Destination.tags.through.objects.bulk_create(tag_rows, batch_size=BATCH_SIZE)
+        Destination.activities.through.objects.bulk_create(act_rows, batch_size=BATCH_SIZE)
+
+    # anonim sharhlar — reyting / sharhlar soni taqsimoti (uzun dum)
+    reviews = []
+    for dest_id in dest_ids:
+        for _ in range(min(40, int(rnd.paretovariate(1.4)) - 1)):
+            reviews.append(Review(destination_id=dest_id, author_name='Bench', text='Synthetic review',
+                                  rating=rnd.choice((3, 4, 4, 5, 5))))
+    Review.objects.bulk_create(reviews, batch_size=BATCH_SIZE)
+
+    # oddiy foydalanuvchilar (collab uchun savatlar) + o'lchanadigan profillar
+    people = User.objects.bulk_create([
+        User(username=f'bench-{token}-{i}', email=f'bench-{token}-{i}@bench.travelhub.local')
+        for i in range(users + len(PROFILES))
+    ])
+    sample = dict(zip(PROFILES, people[users:]))
+    histories = [(u, (rnd.randint(1, 25), rnd.randint(0, 5), rnd.randint(0, 2), rnd.randint(0, 3)))
+                 for u in people[:users]]
+    histories += [(sample[name], counts) for name, counts in PROFILES.items() if counts]
+    _create_histories(rnd, histories, dest_ids, now)
+    # bulk_create signal chiqarmaydi — reyting agregatlarini qo'lda hisoblaymiz
+    recompute_rating_aggregates(dest_ids)
+    RecommendationProfile.objects.create(user=sample['light'], quiz_styles='beach,cultural', quiz_budget='mid')
+
+    sample['anon'] = None
+    return {'users': sample, 'destinations': len(dest_ids)}
+
+
+def _create_histories(rnd, histories, dest_ids, now):
+    wishlists, reviews, bookings, feedback = [], [], [], []
+    for user, (n_wish, n_review, n_booking, n_feedback) in histories:
+        picked = rnd.sample(dest_ids, min(len(dest_ids), n_wish + n_review + n_feedback))
+        wish = picked[:n_wish]
+        wishlists += [Wishlist(user=user, destination_id=d) for d in wish]
+        reviews += [Review(user=user, destination_id=d, text='Synthetic review', rating=rnd.randint(1, 5))
+                    for d in picked[n_wish:n_wish + n_review]]
+        bookings += [Booking(user=user, destination_id=rnd.choice(wish or dest_ids),
+                             booking_date=(now - timedelta(days=rnd.randint(0, 400))).date())
+                     for _ in range(n_booking)]
+        feedback += [RecommendationFeedback(user=user, destination_id=d,
+                                            action=rnd.choice(RecommendationFeedback.Action.values))
+                     for d in picked[n_wish + n_review:]]
+    Wishlist.objects.bulk_create(wishlists, batch_size=BATCH_SIZE)
+    Review.objects.bulk_create(reviews, batch_size=BATCH_SIZE)
+    Booking.objects.bulk_create(bookings, batch_size=BATCH_SIZE)
+    RecommendationFeedback.objects.bulk_create(feedback, batch_size=BATCH_SIZE)
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# O'LCHOV
+# ───────────────────────────────────────────────────────────────────────────
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def _page(user, profiled=False):
+    """Tavsiya sahifasi tartibidagi bosqichlar: {bosqich: (ms, so'rovlar, peak_kb)}."""
+    from apps.recommendations.engine import RecommendationEngine
+
+    engine = None
+
+    def step(name):
+        if name == 'init':
+            return lambda: RecommendationEngine(user=user)
+        if name == 'search':
+            return lambda: engine.search(engine.fallback_parse(SEARCH_TEXT))
+        if name in ('travelers_also_loved', 'perfect_for_season', 'hidden_gems'):
+            return lambda: getattr(engine, name)(8)
+        if name == 'top_picks':
+            return lambda: engine.top_picks(6)
+        return getattr(engine, name)
+
+    out = {}
+    for name in STEPS:
+        fn = step(name)
+        if profiled:
+            gc.collect()
+            tracemalloc.start()
+            with CaptureQueriesContext(connection) as ctx:
+                result, ms = _timed(fn)
+            peak = tracemalloc.get_traced_memory()[1] / 1024.0
+            tracemalloc.stop()
+            out[name] = (ms, len(ctx.captured_queries), peak)
+        else:
+            result, ms = _timed(fn)
+            out[name] = (ms, None, None)
+        if name == 'init':
+            engine = result
+    return out
+
+
+def _measure(users, repeat):
+    """{profil: {bosqich: {'ms', 'queries', 'peak_kb'}}} — vaqt `repeat` marta medianasi."""
+    report = {}
+    for name, user in users.items():
+        _page(user)                                              # isitish (taste profile, snapshot)
+        runs = [_page(user) for _ in range(repeat)]
+        profiled = _page(user, profiled=True)                    # tracemalloc sekinlashtiradi — alohida
+        report[name] = {
+            step: {
+                'ms': statistics.median(run[step][0] for run in runs),
+                'queries': profiled[step][1],
+                'peak_kb': profiled[step][2],
+            }
+            for step in STEPS
+        }
+    return report
+
+
+def run_benchmark(size, users=300, repeat=3, seed=1):
+    """Bitta katalog hajmi uchun to'liq benchmark (oxirida rollback)."""
+    from apps.recommendations.collab import build_item_index, publish_item_index
+    from apps.recommendations.similar import build_similar_index, publish_similar_index
+    from apps.recommendations.snapshot import get_snapshot
+    from apps.utils.catalog import bump_catalog_version
+
+    with override_settings(CACHES=BENCH_CACHES), translation.override('en'), transaction.atomic():
+        data, generate_ms = _timed(lambda: generate_catalogue(size, users=users, seed=seed))
+        bump_catalog_version()
+        snap, snapshot_ms = _timed(get_snapshot)
+        index, index_ms = _timed(build_item_index)
+        publish_item_index(index)
+        similar, similar_ms = _timed(build_similar_index)
+        publish_similar_index(similar)
+        result = {
+            'size': size,
+            'candidates': len(snap),
+            'generate_ms': generate_ms,
+            'snapshot_ms': snapshot_ms,
+            'item_index_ms': index_ms,
+            'similar_index_ms': similar_ms,
+            'profiles': _measure(data['users'], repeat),
+        }
+        transaction.set_rollback(True)
+    return result
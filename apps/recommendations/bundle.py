@@ -0,0 +1,165 @@
+"""
+apps/recommendations/bundle.py
+==============================
+Foydalanuvchi tavsiya sahifasining keshlangan natijasi ("bundle").
+
+Sahifa har ochilganda engine, Taste DNA, Top Picks va 4 ta karusel qaytadan
+hisoblanardi — holbuki foydalanuvchi kirishlari (wishlist, sharh, booking,
+feedback, quiz) tashriflar orasida kamdan-kam o'zgaradi. Endi natija
+(HTML emas — destination id'lari + hisoblangan karta maydonlari) keshda
+saqlanadi va versiyalarga bog'lanadi:
+
+  • history version — foydalanuvchi interaksiyalarida signallar oshiradi
+  • catalog version — katalog o'zgarganda (apps.utils.catalog)
+  • rating version — izohlar / moderatsiya reytinglarni o'zgartirganda
+    (mashhurlik va "hidden gems" reytingga tayanadi)
+  • joriy mavsum — "Perfect for season" va ta'm kartasidagi mavsum eskirmasin
+
+Takroriy tashrif = bitta `get_many` (versiyalar + bundle). Versiya eskirgan
+bo'lsa eski bundle darhol qaytariladi, yangisi esa Celery'da quriladi
+(stale-while-revalidate). Bundle umuman bo'lmasa — sinxron quriladi.
+"""
+import time
+
+from django.core.cache import cache
+
+from apps.recommendations.snapshot import get_snapshot
+from apps.utils.catalog import CATALOG_VERSION_KEY, RATING_VERSION_KEY
+
+BUNDLE_TTL = 60 * 60 * 24 * 7        # 7 kun — versiya baribir eskirishni aniqlaydi
+REFRESH_LOCK_TTL = 60                # bitta foydalanuvchi uchun parallel refresh bo'lmasin
+
+
+def _owner(user):
+    return user.pk if (user and user.is_authenticated) else 'anon'
+
+
+def _history_key(owner):
+    return f'recsys:hv:{owner}'
+
+
+def _bundle_key(owner):
+    return f'recsys:bundle:{owner}'
+
+
+def bump_history_version(user_id):
+    """Foydalanuvchi tarixi o'zgardi — keyingi tashrifda bundle yangilanadi."""
+    key = _history_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:                   # kalit yo'q — vaqtdan boshlaymiz (to'qnashuv bo'lmasin)
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        cache.incr(key)
+
+
+def _versions(values, owner):
+    """get_many natijasidan bundle versiyalari: (tarix, katalog, reyting, mavsum)."""
+    from apps.recommendations.engine import current_season
+
+    return (values.get(_history_key(owner)), values.get(CATALOG_VERSION_KEY),
+            values.get(RATING_VERSION_KEY), current_season())
+
+
+def _pack(card):
+    """Karta dict'idan Destination obyektini olib tashlaydi — faqat id qoladi."""
+    packed = {k: v for k, v in card.items() if k != 'd'}
+    packed['id'] = card['d'].id
+    return packed
+
+
+def _unpack(cards, by_id):
+    """Id'larni snapshot'dagi Destination obyektlariga qaytaradi (o'chirilganlar tashlanadi)."""
+    out = []
+    for card in cards:
+        dest = by_id.get(card['id'])
+        if dest is not None:
+            out.append({**card, 'd': dest})
+    return out
+
+
+def build_bundle(user):
+    """Engine'ni ishga tushirib sahifaning barcha bo'limlarini hisoblaydi."""
+    from apps.recommendations.engine import RecommendationEngine
+
+    engine = RecommendationEngine(user=user)
+    taste = engine.taste_dna()
+    top_picks = engine.top_picks(6)
+
+    # Bo'limlar orasida bir joy takrorlanmasin: har bir bo'lim o'zidan
+    # oldingilarda ko'rsatilgan destinationlarni o'tkazib yuboradi.
+    shown = {p['d'].id for p in top_picks}
+
+    because_saved = engine.because_you_saved(exclude_ids=shown)
+    if because_saved:
+        shown |= {c['d'].id for c in because_saved['items']}
+
+    also_loved = engine.travelers_also_loved(8, exclude_ids=shown)
+    shown |= {c['d'].id for c in also_loved}
+
+    season_picks = engine.perfect_for_season(8, exclude_ids=shown)
+    shown |= {c['d'].id for c in season_picks}
+
+    hidden_gems = engine.hidden_gems(8, exclude_ids=shown)
+
+    return {
+        'taste': taste,
+        'top_picks': [_pack(c) for c in top_picks],
+        'because_saved': {
+            'seed': because_saved['seed'].id,
+            'items': [_pack(c) for c in because_saved['items']],
+        } if because_saved else None,
+        'also_loved': [_pack(c) for c in also_loved],
+        'season_picks': [_pack(c) for c in season_picks],
+        'hidden_gems': [_pack(c) for c in hidden_gems],
+    }
+
+
+def refresh_bundle(user):
+    """Bundle'ni qayta quradi va joriy versiyalar bilan keshga yozadi."""
+    owner = _owner(user)
+    values = cache.get_many([_history_key(owner), CATALOG_VERSION_KEY, RATING_VERSION_KEY])
+    versions = _versions(values, owner)
+    data = build_bundle(user)
+    cache.set(_bundle_key(owner), {'versions': versions, 'data': data}, BUNDLE_TTL)
+    return data
+
+
+def _schedule_refresh(owner):
+    if cache.add(f'recsys:bundle:refresh:{owner}', 1, REFRESH_LOCK_TTL):
+        from apps.tasks import refresh_recommendation_bundle
+        refresh_recommendation_bundle.delay(None if owner == 'anon' else owner)
+
+
+def get_bundle(user):
+    """Sahifa uchun tayyor bundle — kartalarda 'd' yana Destination obyekti.
+
+    Qaytadi: {'taste', 'top_picks', 'because_saved', 'also_loved',
+              'season_picks', 'hidden_gems'}
+    """
+    owner = _owner(user)
+    values = cache.get_many([_history_key(owner), CATALOG_VERSION_KEY, RATING_VERSION_KEY, _bundle_key(owner)])
+    versions = _versions(values, owner)
+    entry = values.get(_bundle_key(owner))
+
+    if entry is None:
+        data = refresh_bundle(user)
+    else:
+        data = entry['data']
+        if tuple(entry['versions']) != versions:
+            _schedule_refresh(owner)             # eskisi darhol ko'rsatiladi
+
+    by_id = get_snapshot(versions[1], versions[2]).by_id
+    because_saved = data['because_saved']
+    if because_saved and because_saved['seed'] in by_id:
+        because_saved = {'seed': by_id[because_saved['seed']],
+                         'items': _unpack(because_saved['items'], by_id)}
+    else:
+        because_saved = None
+    return {
+        'taste': dict(data['taste']),
+        'top_picks': _unpack(data['top_picks'], by_id),
+        'because_saved': because_saved,
+        'also_loved': _unpack(data['also_loved'], by_id),
+        'season_picks': _unpack(data['season_picks'], by_id),
+        'hidden_gems': _unpack(data['hidden_gems'], by_id),
+    }
@@ -0,0 +1,146 @@
+"""
+apps/recommendations/collab.py
+==============================
+Oflayn item-item o'xshashlik indeksi ("shu joyni yoqtirganlar yana nimani yoqtirgan").
+
+Avval har bir so'rovda `_build_collab()` 3 ta so'rov bilan peer'larni topib,
+ularning wishlist'ini Counter'ga yig'ardi — mashhur seedlarda peer'lar
+deyarli barcha foydalanuvchilarga aylanardi. Endi:
+
+  1. Celery (`rebuild_item_similarity_index`) davriy ravishda barcha ijobiy
+     interaksiyalardan (Wishlist, Review rating>=4, Booking, 👍 feedback)
+     co-occurrence sanaydi;
+  2. cosine bilan normallaydi:  sim(i, j) = c_ij / sqrt(n_i · n_j);
+  3. har bir destination uchun faqat TOP_K qo'shnini qoldiradi;
+  4. natijani CSR ko'rinishidagi ixcham NumPy massivlari sifatida keshga yozadi.
+
+Engine esa foydalanuvchi seedlarining qo'shni ro'yxatlarini yig'adi xolos.
+"""
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 30                   # har destination uchun saqlanadigan qo'shnilar soni
+MAX_BASKET = 200             # juda faol foydalanuvchi savatidan eng so'nggilari qoladi (juftliklar k² o'sadi)
+INDEX_KEY = 'recsys:item_index'
+INDEX_VERSION_KEY = 'recsys:item_index:version'
+
+_lock = threading.Lock()
+_current = None
+
+
+class ItemIndex:
+    """destination_id -> [(qo'shni_id, o'xshashlik), ...] — CSR massivlarida."""
+
+    def __init__(self, version, item_ids, indptr, neighbors, scores):
+        self.version = version
+        self.item_ids = item_ids
+        self.indptr = indptr
+        self.neighbors = neighbors
+        self.scores = scores
+        self._row = {dest_id: row for row, dest_id in enumerate(item_ids.tolist())}
+
+    def __len__(self):
+        return len(self._row)
+
+    def neighbours(self, dest_id):
+        row = self._row.get(dest_id)
+        if row is None:
+            return []
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return list(zip(self.neighbors[start:end].tolist(), self.scores[start:end].tolist()))
+
+    def payload(self):
+        return {'version': self.version, 'item_ids': self.item_ids, 'indptr': self.indptr,
+                'neighbors': self.neighbors, 'scores': self.scores}
+
+
+def _baskets():
+    """user_id -> {destination_id: oxirgi interaksiya vaqti} — barcha ijobiy interaksiyalar."""
+    from apps.models.orders import Booking
+    from apps.models.recommendations import RecommendationFeedback
+    from apps.models.reviews import Review
+    from apps.models.wishlist import Wishlist
+
+    sources = (
+        Wishlist.objects.values_list('user_id', 'destination_id', 'created_at'),
+        Review.objects.filter(rating__gte=4, user__isnull=False)
+        .values_list('user_id', 'destination_id', 'created_at'),
+        Booking.objects.filter(user__isnull=False).values_list('user_id', 'destination_id', 'created_at'),
+        RecommendationFeedback.objects.filter(action=RecommendationFeedback.Action.UP)
+        .values_list('user_id', 'destination_id', 'created_at'),
+    )
+    baskets = defaultdict(dict)
+    for qs in sources:
+        for user_id, dest_id, at in qs.order_by().iterator(chunk_size=5000):
+            basket = baskets[user_id]
+            if dest_id not in basket or at > basket[dest_id]:
+                basket[dest_id] = at
+    return baskets
+
+
+def build_item_index(top_k=TOP_K):
+    """Interaksiyalardan yangi ItemIndex quradi (DB'ga faqat o'qish)."""
+    item_users = Counter()                     # n_i — nechta savatda uchragan
+    pairs = defaultdict(Counter)               # c_ij
+    for basket in _baskets().values():
+        items = heapq.nlargest(MAX_BASKET, basket, key=lambda dest_id: (basket[dest_id], dest_id))
+        item_users.update(items)
+        for a in items:
+            row = pairs[a]
+            for b in items:
+                if a != b:
+                    row[b] += 1
+
+    item_ids = sorted(pairs)
+    indptr = [0]
+    neighbors, scores = [], []
+    for a in item_ids:
+        sims = [(b, c / math.sqrt(item_users[a] * item_users[b])) for b, c in pairs[a].items()]
+        sims.sort(key=lambda t: (-t[1], t[0]))
+        for b, sim in sims[:top_k]:
+            neighbors.append(b)
+            scores.append(sim)
+        indptr.append(len(neighbors))
+
+    return ItemIndex(
+        version=int(time.time() * 1000),
+        item_ids=np.array(item_ids, dtype=np.int64),
+        indptr=np.array(indptr, dtype=np.int64),
+        neighbors=np.array(neighbors, dtype=np.int64),
+        scores=np.array(scores, dtype=np.float32),
+    )
+
+
+def publish_item_index(index):
+    """Indeksni keshga yozadi; workerlar versiya o'zgarganini ko'rib qayta yuklaydi."""
+    cache.set(INDEX_KEY, index.payload(), timeout=None)
+    cache.set(INDEX_VERSION_KEY, index.version, timeout=None)
+
+
+def get_item_index():
+    """Joriy indeks (process ichida keshlangan) yoki None — hali qurilmagan bo'lsa."""
+    global _current
+    version = cache.get(INDEX_VERSION_KEY)
+    if version is None:
+        return None
+    index = _current
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        index = _current
+        if index is None or index.version != version:
+            payload = cache.get(INDEX_KEY)
+            if payload is None:
+                return None
+            index = ItemIndex(**payload)
+            _current = index
+    return index
@@ -16,76 +16,27 @@ RecommendationEngine foydalanuvchining wishlist / sharh / booking tarixidan
 Tarixi yo'q (yoki anonim) foydalanuvchi → vaznlar popularity tomon suriladi.
 Gemini matnlari (portret, pitch) 2-bosqichda shu yerga ulanadi.
 """
-import math
-import re
+import heapq
+import itertools
 from collections import Counter, defaultdict
 
-from django.db.models import Avg, Count, Q
+import numpy as np
 from django.utils import timezone
 
 from apps.models.destinations import Destination
 from apps.models.orders import Booking
 from apps.models.reviews import Review
 from apps.models.wishlist import Wishlist
+from apps.recommendations.collab import get_item_index
+from apps.recommendations.gazetteer import parse_query
+from apps.recommendations.profile import load_taste_profile
+from apps.recommendations.similar import similar_destinations
+from apps.recommendations.snapshot import get_snapshot
 
-# Interaksiya turi -> seed vazni (booking eng kuchli signal)
-SEED_WEIGHTS = {'booking': 3.0, 'feedback_up': 2.6, 'review_high': 2.2,
-                'wishlist': 1.6, 'review_low': 0.3}
 QUIZ_STYLE_WEIGHT = 1.4          # quiz'da tanlangan har bir uslub vazni
 QUIZ_BUDGET_PRICE = {'budget': 12, 'mid': 45, 'luxury': 110}   # quiz byudjeti -> taxminiy narx
 DOWN_PENALTY = 0.06              # 👎 qilingan trip_type uchun ball jazosi
-RECENCY_TAU = 90.0          # recency decay: exp(-kunlar / 90)
-
-# Gemini ishlamay qolganda (rate-limit/xato) ishlatiladigan mahalliy zaxira parser uchun
-CITY_ALIASES = {
-    'Bukhara': ['buxoro', 'buxara', 'buxaro', 'бухара'],
-    'Samarkand': ['samarqand', 'самарканд'],
-    'Tashkent': ['toshkent', 'ташкент'],
-    'Khiva': ['xiva', 'хива'],
-    'Shahrisabz': ['shahrisabz', 'шахрисабз'],
-    'Nukus': ['nukus', 'нукус'],
-    'Termez': ['termiz', 'термез'],
-    'Kokand': ['qoqon', "qo'qon", 'kokon', 'коканд'],
-    'Nurata': ['nurota', 'нурата'],
-    'Moynaq': ['muynak', 'moynoq', 'мойнак'],
-}
-COUNTRY_ALIASES = {
-    'Uzbekistan': ["o'zbekiston", 'ozbekiston', 'uzbekiston', 'uzbekistan', 'узбекистан'],
-}
-TRIP_TYPE_WORDS = {
-    'beach': ['beach', 'plyaj', 'sohil', 'пляж'],
-    'cultural': ['cultur', 'madaniy', 'tarix', 'культур', 'истори'],
-    'adventure': ['adventur', 'sarguzasht', 'hiking', 'mountain', 'tog', 'приключ'],
-    'romantic': ['romantic', 'romantik', 'романт'],
-    'nature': ['nature', 'tabiat', 'природ'],
-    'family': ['family', 'oila', 'семь'],
-}
-SEASON_WORDS = {
-    'spring': ['spring', 'bahor', 'весн'],
-    'summer': ['summer', 'yoz', 'лет'],
-    'autumn': ['autumn', 'fall', 'kuz', 'осен'],
-    'winter': ['winter', 'qish', 'зим'],
-}
 
-
-def _extract_price(text):
-    """Matndan narx chegarasini ajratadi -> (max_price, min_price).
-
-    Faqat narx belgisiga ($ / dollar / gacha / under / до) yopishgan sonlarni
-    oladi — shu sababli yil ("2026") yoki odam soni ("2 kishi") narx deb
-    qabul qilinmaydi.
-    """
-    adjacent = [int(m.group(1) or m.group(2)) for m in re.finditer(
-        r'\$\s*(\d{2,6})|(\d{2,6})\s*(?:\$|dollar|usd|у\.?е)', text)]
-    bounded = [int(m.group(1) or m.group(2)) for m in re.finditer(
-        r'(\d{2,6})\s*gacha|(?:under|less than|до)\s*\$?\s*(\d{2,6})', text)]
-    nums = adjacent + bounded
-    if not nums:
-        return None, None
-    price = max(nums)
-    if re.search(r'more than|over |dan ortiq|dan yuqori|от |minimum', text):
-        return None, price          # quyi chegara
-    return price, None              # yuqori chegara (byudjet shifti — odatiy)
 BAYES_PRIOR_C = 8           # Bayes o'rtacha uchun "ishonch" og'irligi
 BAYES_PRIOR_M = 3.6         # global o'rtacha reyting taxmini
 
@@ -127,24 +78,29 @@ BUDGET_LABELS = {'free': 'Free spots', 'budget': 'Budget',
 
 
 class RecommendationEngine:
-    """Bitta foydalanuvchi uchun bitta sahifa yuklanishida ishlatiladi."""
+    """Bitta foydalanuvchi uchun bitta sahifa yuklanishida ishlatiladi.
 
-    def __init__(self, user=None, today=None):
+    batch=True — barcha nomzodlar NumPy massivlarida bir martada baholanadi
+    (`_batch_scores`); batch=False — eski skalyar yo'l (har destination alohida).
+    Ikkala yo'l bir xil tartib beradi; ballar esa float aniqligida teng
+    (qo'shish tartibi farqli — ~1e-11 gacha farq bo'lishi mumkin).
+
+    Har ikki rejimda ham ballar engine ichida BIR MARTA hisoblanadi; bo'limlar
+    esa butun ro'yxatni saralamay, faqat kerakli top-K qatorlarni tanlaydi
+    (`_ordered`) va kartani faqat qaytariladigan destinationlar uchun quradi.
+    """
+
+    def __init__(self, user=None, today=None, batch=True):
         self.user = user if (user and user.is_authenticated) else None
         self.today = today or timezone.now()
         self.season = current_season(self.today)
+        self.batch = batch
+        self._batch = None
 
-        # --- nomzodlar: barcha destinationlar, reyting/sharh annotatsiyasi bilan ---
-        self.candidates = list(
-            Destination.objects
-            .select_related('city', 'country')
-            .prefetch_related('tags', 'activities', 'images')
-            .annotate(
-                db_avg_rating=Avg('reviews__rating', filter=Q(reviews__is_visible=True)),
-                rev_count=Count('reviews', filter=Q(reviews__is_visible=True)),
-            )
-        )
-        self._by_id = {d.id: d for d in self.candidates}
+        # --- nomzodlar: worker bo'ylab umumiy snapshot (katalog o'zgarganda qayta quriladi) ---
+        self._snap = get_snapshot()
+        self.candidates = self._snap.destinations
+        self._by_id = self._snap.by_id
 
         # --- foydalanuvchi tarixi va ta'm profili ---
         self.seeds = {}             # destination_id -> og'irlik (recency bilan)
@@ -157,74 +113,32 @@ class RecommendationEngine:
             'price_w': 0.0, 'price_sum': 0.0,
         }
         self._collab = Counter()
-        self._ranked_cache = None
         self.excluded = set()            # 👎/dismiss qilingan — tavsiya etilmaydi
         self._down_types = Counter()     # 👎 qilingan trip_type'lar — jazo uchun
         self.has_quiz = False
         if self.user:
-            self._collect_history()      # wishlist + sharh + booking → seeds
-            self._collect_feedback()     # 👍 → seed, 👎/dismiss → excluded
-            self._build_profile()        # seeds → ta'm profili
+            self._load_taste()           # saqlangan profil: seeds, 👎/dismiss, ta'm vektorlari
             self._build_quiz()           # quiz javoblari → ta'm profiliga qo'shiladi
             self._build_collab()
 
     # ------------------------------------------------------------------ #
     #  TARIX VA PROFIL
     # ------------------------------------------------------------------ #
-    def _decay(self, when):
-        """Recency decay — yaqinda bo'lgan interaksiya muhimroq."""
-        if not when:
-            return 0.5
-        days = max(0.0, (self.today - when).total_seconds() / 86400.0)
-        return math.exp(-days / RECENCY_TAU)
-
-    def _add_seed(self, dest_id, base_weight, when):
-        w = base_weight * self._decay(when)
-        self.seeds[dest_id] = self.seeds.get(dest_id, 0.0) + w
-
-    def _collect_history(self):
-        """Wishlist + sharh + booking'dan seed yig'adi."""
-        for wl in Wishlist.objects.filter(user=self.user).only('destination_id', 'created_at'):
-            self._add_seed(wl.destination_id, SEED_WEIGHTS['wishlist'], wl.created_at)
-
-        for rv in Review.objects.filter(user=self.user).only('destination_id', 'rating', 'created_at'):
-            key = 'review_high' if rv.rating >= 4 else 'review_low'
-            self._add_seed(rv.destination_id, SEED_WEIGHTS[key], rv.created_at)
-
-        for bk in Booking.objects.filter(user=self.user).only('destination_id', 'created_at'):
-            self._add_seed(bk.destination_id, SEED_WEIGHTS['booking'], bk.created_at)
-
-    def _collect_feedback(self):
-        """👍 → kuchli ijobiy seed;  👎/dismiss → tavsiyadan chiqariladi."""
+    def _load_taste(self):
+        """Saqlangan (inkremental) ta'm profilini o'qiydi — tarix hajmidan qat'i nazar bitta so'rov."""
         from apps.models.recommendations import RecommendationFeedback
-        for fb in (RecommendationFeedback.objects
-                   .filter(user=self.user)
-                   .only('destination_id', 'action', 'created_at')):
-            if fb.action == RecommendationFeedback.Action.UP:
-                self._add_seed(fb.destination_id, SEED_WEIGHTS['feedback_up'], fb.created_at)
-            else:                                       # down yoki dismiss
-                self.excluded.add(fb.destination_id)
-                if fb.action == RecommendationFeedback.Action.DOWN:
-                    dest = self._by_id.get(fb.destination_id)
-                    if dest and dest.trip_type:
-                        self._down_types[dest.trip_type] += 1
-
-    def _build_profile(self):
-        """Yig'ilgan seed og'irliklarini ta'm profiliga tarqatadi."""
-        for dest_id, weight in self.seeds.items():
-            dest = self._by_id.get(dest_id)
-            if not dest:
-                continue
-            if dest.trip_type:
-                self.profile['trip_type'][dest.trip_type] += weight
-            for tag in dest.tags.all():
-                self.profile['tags'][tag.id] += weight
-            for act in dest.activities.all():
-                self.profile['activities'][act.id] += weight
-            if dest.country_id:
-                self.profile['country'][dest.country_id] += weight
-            self.profile['price_sum'] += dest.price * weight
-            self.profile['price_w'] += weight
+        taste = load_taste_profile(self.user, self._snap, self.today)
+        self.seeds = taste['seeds']
+        for key in ('trip_type', 'tags', 'activities', 'country', 'price_sum', 'price_w'):
+            self.profile[key] = taste[key]
+
+        # 👍 → seed (yuqorida);  👎/dismiss → tavsiyadan chiqariladi
+        for dest_id, action in taste['feedback'].items():
+            self.excluded.add(dest_id)
+            if action == RecommendationFeedback.Action.DOWN:
+                dest = self._by_id.get(dest_id)
+                if dest and dest.trip_type:
+                    self._down_types[dest.trip_type] += 1
 
         # eng so'nggi (og'irligi katta) seedlar — "Because you saved" uchun
         self.seed_objects = [
@@ -251,9 +165,23 @@ class RecommendationEngine:
             self.profile['price_w'] = 1.0
 
     def _build_collab(self):
-        """Collaborative: shu seedlarni saqlagan boshqa userlar yana nimani saqlagan."""
+        """Collaborative: seedlarning oflayn qo'shni ro'yxatlari yig'indisi (seed vazni bilan)."""
         if not self.seeds:
             return
+        index = get_item_index()
+        if index is None:                        # indeks hali qurilmagan — jonli so'rovlar
+            self._build_collab_live()
+            return
+        collab = Counter()
+        for sid, weight in self.seeds.items():
+            for dest_id, sim in index.neighbours(sid):
+                collab[dest_id] += sim * weight
+        for sid in self.seeds:                   # o'zi saqlagan joylar hisobga olinmaydi
+            collab.pop(sid, None)
+        self._collab = collab
+
+    def _build_collab_live(self):
+        """Zaxira: shu seedlarni saqlagan boshqa userlar yana nimani saqlagan (3 ta so'rov)."""
         seed_ids = list(self.seeds.keys())
         peer_ids = set(
             Wishlist.objects
@@ -301,8 +229,8 @@ class RecommendationEngine:
         hit = 0.0
         if dest.trip_type:
             hit += self.profile['trip_type'].get(dest.trip_type, 0.0)
-        for tag in dest.tags.all():
-            hit += self.profile['tags'].get(tag.id, 0.0)
+        for tag_id in self._snap.tags_of(dest.id):
+            hit += self.profile['tags'].get(tag_id, 0.0)
         if dest.country_id:
             hit += self.profile['country'].get(dest.country_id, 0.0)
         return min(1.0, hit / mass)
@@ -317,8 +245,8 @@ class RecommendationEngine:
     @staticmethod
     def _popularity_score(dest):
         """Bayes o'rtacha reyting + trending/popular — 0..1."""
-        avg = dest.db_avg_rating or 0.0
-        n = dest.rev_count or 0
+        avg = dest.avg_rating or 0.0
+        n = dest.visible_reviews_count
         bayes = (BAYES_PRIOR_C * BAYES_PRIOR_M + n * avg) / (BAYES_PRIOR_C + n)
         score = bayes / 5.0
         if dest.is_trending:
@@ -351,7 +279,10 @@ class RecommendationEngine:
         return dict(content=0.42, collab=0.25, popularity=0.18, context=0.15)
 
     def _score(self, dest):
-        """Bitta destination uchun to'liq ball + tarkibiy qismlar."""
+        """Bitta destination uchun to'liq ball + tarkibiy qismlar (memoizatsiyalangan)."""
+        return self._score_at(self._snap.index[dest.id])
+
+    def _score_scalar(self, dest):
         w = self._weights()
         parts = {
             'content': self._content_score(dest),
@@ -365,6 +296,122 @@ class RecommendationEngine:
             final -= DOWN_PENALTY * self._down_types.get(dest.trip_type, 0)
         return max(0.0, final), parts
 
+    # --- batch (NumPy) yo'li ---------------------------------------------
+    def _batch_scores(self):
+        """Barcha nomzodlar uchun 4 signal + yakuniy ball — engine ichida bir marta.
+
+        batch=True bo'lsa bir necha massiv amalida hisoblanadi; har bir amal
+        skalyar scorerlardagi tartibda bajariladi, shuning uchun float natijalar
+        ham, saralash ham skalyar yo'l bilan bir xil chiqadi. batch=False bo'lsa
+        massivlar `_score_scalar` bilan to'ldiriladi (solishtirish uchun).
+        """
+        if self._batch is not None:
+            return self._batch
+        if not self.batch:
+            return self._scalar_scores()
+        m = self._snap.matrix
+        w = self._weights()
+
+        # content — trip_type + teglar + davlat vaznlari / profil massasi
+        mass = self._profile_mass
+        if mass <= 0:
+            content = np.zeros(m.size)
+        else:
+            hit = m.weights_for(m.trip_type_pos, self.profile['trip_type'])[m.trip_type]
+            hit = m.tag_hits(m.weights_for(m.tag_pos, self.profile['tags']), hit)
+            hit = hit + m.weights_for(m.country_pos, self.profile['country'])[m.country]
+            content = np.minimum(1.0, hit / mass)
+
+        # collab — co-occurrence / eng katta qiymat
+        collab = np.zeros(m.size)
+        if self._collab:
+            top = self._collab.most_common(1)[0][1]
+            if top:
+                index = self._snap.index
+                for dest_id, cnt in self._collab.items():
+                    row = index.get(dest_id)
+                    if row is not None:
+                        collab[row] = cnt
+                collab = np.minimum(1.0, collab / top)
+
+        # popularity — Bayes o'rtacha + trending/popular
+        bayes = (BAYES_PRIOR_C * BAYES_PRIOR_M + m.rev_count * m.avg_rating) / (BAYES_PRIOR_C + m.rev_count)
+        popularity = bayes / 5.0
+        popularity = np.where(m.is_trending, popularity + 0.08, popularity)
+        popularity = np.where(m.is_popular, popularity + 0.05, popularity)
+        popularity = np.minimum(1.0, popularity)
+
+        # context — mavsum + byudjet + flash sale
+        context = np.full(m.size, 0.4)
+        context = np.where(m.season == self.season, context + 0.35, context)
+        avg = self.avg_price
+        if avg is not None:
+            ratio = m.price / max(avg, 1.0)
+            near = (m.price > 0) & (ratio >= 0.6) & (ratio <= 1.4)
+            context = np.where(near, context + 0.2, context)
+        context = np.where(m.flash_active(timezone.now()), context + 0.15, context)
+        context = np.minimum(1.0, context)
+
+        final = w['content'] * content + w['collab'] * collab + w['popularity'] * popularity + w['context'] * context
+        if self._down_types:
+            penalty = m.weights_for(m.trip_type_pos, self._down_types)[m.trip_type]
+            final = np.where(penalty > 0, final - DOWN_PENALTY * penalty, final)
+        final = np.maximum(0.0, final)
+
+        self._batch = {'final': final, 'content': content, 'collab': collab,
+                       'popularity': popularity, 'context': context}
+        return self._batch
+
+    def _scalar_scores(self):
+        rows = [self._score_scalar(dest) for dest in self.candidates]
+        self._batch = {'final': np.array([final for final, _ in rows], dtype=np.float64)}
+        for key in ('content', 'collab', 'popularity', 'context'):
+            self._batch[key] = np.array([parts[key] for _, parts in rows], dtype=np.float64)
+        return self._batch
+
+    def _score_at(self, row):
+        """Hisoblangan massivlardan bitta qator — (final, parts) skalyar yo'l shaklida."""
+        scores = self._batch_scores()
+        return float(scores['final'][row]), {
+            'content': float(scores['content'][row]),
+            'collab': float(scores['collab'][row]),
+            'popularity': float(scores['popularity'][row]),
+            'context': float(scores['context'][row]),
+        }
+
+    # --- top-K tanlash ----------------------------------------------------
+    def _rows_of(self, ids):
+        """Destination id'lari -> snapshot qatorlari uchun bool niqob."""
+        mask = np.zeros(len(self.candidates), dtype=bool)
+        index = self._snap.index
+        rows = [index[i] for i in ids if i in index]
+        if rows:
+            mask[rows] = True
+        return mask
+
+    @staticmethod
+    def _ordered(key, allowed, chunk=16):
+        """`allowed` qatorlarini key bo'yicha kamayish tartibida bo'laklab beradi.
+
+        To'liq saralash o'rniga har safar faqat eng katta `chunk` ta qator
+        argpartition bilan ajratiladi (O(n)), keyingi bo'lak ikki barobar
+        kattaroq — iste'molchi to'xtasa qolganiga ish qilinmaydi. Teng ballarda
+        snapshot tartibi saqlanadi (barqaror saralash bilan bir xil natija).
+        """
+        rows = np.flatnonzero(allowed)
+        while rows.size:
+            vals = key[rows]
+            if rows.size > chunk:
+                kth = rows.size - chunk
+                cut = np.partition(vals, kth)[kth]
+                take = vals >= cut
+            else:
+                take = np.ones(rows.size, dtype=bool)
+            sel, sel_vals = rows[take], vals[take]
+            yield from sel[np.lexsort((sel, -sel_vals))].tolist()
+            rows = rows[~take]
+            chunk *= 2
+
     # ------------------------------------------------------------------ #
     #  TAVSIYA NATIJALARI
     # ------------------------------------------------------------------ #
@@ -455,41 +502,37 @@ class RecommendationEngine:
 
     # --- ommaviy metodlar (view shularni chaqiradi) ----------------------
 
-    def _ranked(self, exclude_ids=None):
-        """Barcha nomzodlarni baholab, (final, parts, dest) ro'yxatini qaytaradi."""
-        if exclude_ids is None and self._ranked_cache is not None:
-            return self._ranked_cache
-        exclude = set(exclude_ids or [])
-        exclude |= set(self.seeds.keys())          # allaqachon aloqada bo'lganlar chiqmaydi
-        exclude |= self.excluded                   # 👎/dismiss qilinganlar chiqmaydi
-        scored = []
-        for dest in self.candidates:
-            if dest.id in exclude:
-                continue
-            final, parts = self._score(dest)
-            scored.append((final, parts, dest))
-        scored.sort(key=lambda t: -t[0])
-        if exclude_ids is None:
-            self._ranked_cache = scored
-        return scored
+    def _allowed(self, exclude_ids=None):
+        """Tavsiya qilinishi mumkin bo'lgan qatorlar niqobi."""
+        block = set(self.seeds.keys())             # allaqachon aloqada bo'lganlar chiqmaydi
+        block |= self.excluded                     # 👎/dismiss qilinganlar chiqmaydi
+        block |= set(exclude_ids or ())
+        return ~self._rows_of(block)
+
+    def _ranked(self, allowed):
+        """(final, parts, dest) — yakuniy ball bo'yicha kamayish tartibida, dangasa."""
+        for row in self._ordered(self._batch_scores()['final'], allowed):
+            final, parts = self._score_at(row)
+            yield final, parts, self.candidates[row]
 
     def top_picks(self, n=6):
         """Asosiy personallashtirilgan grid (MMR diversity bilan)."""
-        ranked = self._ranked()
+        allowed = self._allowed()
+        many = int(allowed.sum()) > n
         picked, used_types = [], Counter()
         # diversity: bitta trip_type 3 martadan oshmasin
-        for final, parts, dest in ranked:
+        for final, parts, dest in self._ranked(allowed):
             if len(picked) >= n:
                 break
             tt = dest.trip_type or 'x'
-            if used_types[tt] >= 3 and len(ranked) > n:
+            if used_types[tt] >= 3 and many:
                 continue
             used_types[tt] += 1
             picked.append(self._card(dest, final, parts))
         # yetmasa — qolganidan to'ldiramiz
         if len(picked) < n:
             seen = {c['d'].id for c in picked}
-            for final, parts, dest in ranked:
+            for final, parts, dest in self._ranked(allowed):
                 if len(picked) >= n:
                     break
                 if dest.id not in seen:
@@ -497,55 +540,11 @@ class RecommendationEngine:
         return picked
 
     def fallback_parse(self, text):
-        """Gemini ishlamaganda — so'rovdan oddiy mahalliy filtr ajratadi.
+        """Gemini ishlamaganda — so'rovdan mahalliy filtr ajratadi (gazetteer avtomati).
 
-        Shahar/davlat nomi va trip_type so'zlarini matndan qidiradi.
+        Shahar/davlat nomlari (barcha tillarda), trip_type, mavsum va narxni topadi.
         """
-        t = (text or '').lower()
-        filters = {}
-
-        # shahar — avval DB nomlari, keyin o'zbek/rus alias'lari
-        for dest in self.candidates:
-            if dest.city_id and dest.city.name.lower() in t:
-                filters['city'] = dest.city.name
-                break
-        if 'city' not in filters:
-            for canon, aliases in CITY_ALIASES.items():
-                if any(a in t for a in aliases):
-                    filters['city'] = canon
-                    break
-
-        # davlat
-        for dest in self.candidates:
-            if dest.country_id and dest.country.name.lower() in t:
-                filters['country'] = dest.country.name
-                break
-        if 'country' not in filters:
-            for canon, aliases in COUNTRY_ALIASES.items():
-                if any(a in t for a in aliases):
-                    filters['country'] = canon
-                    break
-
-        # trip_type
-        for key, words in TRIP_TYPE_WORDS.items():
-            if any(w in t for w in words):
-                filters['trip_type'] = key
-                break
-
-        # mavsum
-        for key, words in SEASON_WORDS.items():
-            if any(w in t for w in words):
-                filters['season'] = key
-                break
-
-        # narx (max / min)
-        max_p, min_p = _extract_price(t)
-        if max_p is not None:
-            filters['max_price'] = max_p
-        if min_p is not None:
-            filters['min_price'] = min_p
-
-        return filters
+        return parse_query(text)[0]
 
     def search(self, filters, n=6):
         """Structured filter bo'yicha qidiruv (AI tabiiy qidiruv uchun).
@@ -595,31 +594,42 @@ class RecommendationEngine:
                        + (dest.city.name if dest.city_id else '')).lower()
                 final += 0.05 * sum(1 for k in keywords if k in hay)
             matched.append((final, parts, dest))
-        matched.sort(key=lambda t: -t[0])
-        cards = [self._card(d, f, p) for f, p, d in matched[:n]]
+        # nlargest — barqaror saralashdagi birinchi n ta bilan bir xil
+        cards = [self._card(d, f, p) for f, p, d in heapq.nlargest(n, matched, key=lambda t: t[0])]
 
         # filtrlarga HECH NARSA mos kelmasagina — umumiy eng yaxshilar bilan to'ldiramiz
         if not matched:
-            for final, parts, dest in self._ranked():
+            for final, parts, dest in self._ranked(self._allowed()):
                 if len(cards) >= n:
                     break
                 cards.append(self._card(dest, final, parts))
         return cards
 
-    def because_you_saved(self, exclude_ids=None):
-        """Eng so'nggi seed bo'yicha content-based karusel."""
+    def because_you_saved(self, exclude_ids=None, n=8):
+        """Eng so'nggi seedga o'xshash joylar karuseli.
+
+        Avval "o'xshash joylar" (embedding) indeksidagi qo'shnilar olinadi;
+        indeks bo'lmasa yoki yetmasa — shu trip_type / content > 0.2 bo'lgan
+        eng yuqori ballilar bilan to'ldiriladi.
+        """
         if not self.seed_objects:
             return None
-        block = self.excluded | set(exclude_ids or ())   # dismiss + boshqa bo'limda ko'rsatilganlar
         seed = self.seed_objects[0]
-        items = []
-        for final, parts, dest in self._ranked():
-            if dest.id in block:
-                continue
-            if dest.trip_type == seed.trip_type or parts['content'] > 0.2:
-                items.append(self._card(dest, final, parts))
-            if len(items) >= 8:
-                break
+        # dismiss + boshqa bo'limda ko'rsatilganlar chiqmaydi
+        allowed = self._allowed(exclude_ids)
+        rows = []
+        for dest_id in similar_destinations([seed.id], k=n * 4) or ():
+            row = self._snap.index.get(dest_id)
+            if row is not None and allowed[row]:
+                rows.append(row)
+                allowed[row] = False
+        rows = rows[:n]
+        if len(rows) < n:
+            m = self._snap.matrix
+            seed_type = m.trip_type_pos.get(seed.trip_type or '', len(m.trip_type_pos))
+            allowed &= (m.trip_type == seed_type) | (self._batch_scores()['content'] > 0.2)
+            rows += itertools.islice(self._ordered(self._batch_scores()['final'], allowed), n - len(rows))
+        items = [self._card(self.candidates[row], *self._score_at(row)) for row in rows]
         return {'seed': seed, 'items': items} if items else None
 
     def travelers_also_loved(self, n=8, exclude_ids=None):
@@ -646,33 +656,27 @@ class RecommendationEngine:
 
     def perfect_for_season(self, n=8, exclude_ids=None):
         """Joriy mavsumga mos joylar."""
-        block = self.excluded | set(exclude_ids or ())
-        seasonal = [d for d in self.candidates
-                    if (d.season or '').lower() == self.season and d.id not in block]
-        seasonal.sort(key=lambda d: -self._score(d)[0])
-        if len(seasonal) < n:                       # mavsum kam bo'lsa — kontekst bali yuqorilar
-            seen = {d.id for d in seasonal} | block
-            extra = sorted((d for d in self.candidates if d.id not in seen),
-                           key=lambda d: -self._context_score(d))
-            seasonal += extra[:n - len(seasonal)]
-        return [self._card(d, *self._score(d)) for d in seasonal[:n]]
+        m = self._snap.matrix
+        scores = self._batch_scores()
+        free = ~self._rows_of(self.excluded | set(exclude_ids or ()))
+        seasonal = free & (m.season == self.season)
+        rows = list(itertools.islice(self._ordered(scores['final'], seasonal), n))
+        if len(rows) < n:                           # mavsum kam bo'lsa — kontekst bali yuqorilar
+            extra = free & ~seasonal
+            rows += itertools.islice(self._ordered(scores['context'], extra), n - len(rows))
+        return [self._card(self.candidates[row], *self._score_at(row)) for row in rows]
 
     def hidden_gems(self, n=8, exclude_ids=None):
         """Yuqori reyting, kam mashhur — diversity uchun."""
-        block = self.excluded | set(exclude_ids or ())
-        rated = [d for d in self.candidates
-                 if (d.db_avg_rating or 0) >= 4.3 and (d.rev_count or 0) <= 12
-                 and d.id not in self.seeds and d.id not in block]
-        rated.sort(key=lambda d: -(d.db_avg_rating or 0))
-        gems = rated[:n]
-        if len(gems) < n:
+        m = self._snap.matrix
+        free = self._allowed(exclude_ids)
+        rated = free & (m.avg_rating >= 4.3) & (m.rev_count <= 12)
+        rows = list(itertools.islice(self._ordered(m.avg_rating, rated), n))
+        if len(rows) < n:
             # zaxira: mashhur bo'lmagan, kam sharhli, lekin yaxshi ballga ega joylar
-            seen = {d.id for d in gems} | set(self.seeds.keys()) | block
-            extra = [d for d in self.candidates
-                     if d.id not in seen and not d.is_popular and (d.rev_count or 0) <= 12]
-            extra.sort(key=lambda d: -self._score(d)[0])
-            gems += extra[:n - len(gems)]
-        return [self._card(d, *self._score(d)) for d in gems[:n]]
+            extra = free & ~rated & ~m.is_popular & (m.rev_count <= 12)
+            rows += itertools.islice(self._ordered(self._batch_scores()['final'], extra), n - len(rows))
+        return [self._card(self.candidates[row], *self._score_at(row)) for row in rows]
 
     # ------------------------------------------------------------------ #
     #  TASTE DNA
@@ -0,0 +1,339 @@
+"""
+apps/recommendations/gazetteer.py
+=================================
+AI qidiruv uchun mahalliy structured parser — Gemini'dan OLDIN ishlaydi.
+
+Avval har bir so'rov Gemini'ga borardi, zaxira `fallback_parse` esa har bir
+nomzod bo'ylab ikki marta `dest.city.name in text` qilardi. Endi:
+
+  • City / Country nomlari barcha tillarda (name_en / name_uz / name_ru) va
+    alias'lar, trip_type va mavsum so'zlari bitta Aho-Corasick avtomatiga
+    yig'iladi — matn bir marta o'qiladi, natija uzunligiga bog'liq emas;
+  • avtomat katalog versiyasiga bog'langan (snapshot kabi process ichida,
+    shahar/davlat o'zgarsa qayta quriladi);
+  • qisqa o'zak (< STEM_MIN_LENGTH) faqat butun so'z yoki ruxsat etilgan
+    qo'shimcha bilan tanladi — "kuzatish" kuz, "лететь" лето, "falls" fall emas;
+  • `parse_query()` filtr bilan birga ishonch (confidence) qaytaradi: so'rov
+    so'zlarining katta qismi tanilgan bo'lsa natija shu yerda qoladi, aks
+    holda view Gemini'ga murojaat qiladi.
+"""
+import re
+import threading
+import unicodedata
+
+from django.utils import translation
+
+from apps.models.categories import City
+from apps.models.countries import Country
+from apps.utils.catalog import catalog_version
+
+_lock = threading.Lock()
+_current = None
+
+CONFIDENT_COVERAGE = 0.6      # so'rov so'zlarining shuncha qismi tanilsa — Gemini kerak emas
+STEM_MIN_LENGTH = 6           # shundan uzun naqshdan keyin har qanday qo'shimcha ruxsat ("samarqanddan")
+
+# Qisqa naqshlardan keyin ruxsat etilgan qo'shimchalar (kelishik / ko'plik / sifat)
+UZ_ENDINGS = ('', 'da', 'ga', 'ka', 'qa', 'dan', 'ni', 'ning', 'dagi', 'gacha', 'gi', 'ki', 'lar', 'larda',
+              'larga', 'lari', 'i', 'si', 'iy', 'li', 'lik', 'viy')
+EN_ENDINGS = ('', 's', 'es', 'e', 'al', 'ic', 'ing', 'ed')
+RU_ADJ = ('ый', 'ий', 'ой', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ого', 'его', 'ому', 'ему', 'ую', 'юю', 'ым', 'им',
+          'ых', 'их')
+RU_ENDINGS = ('', 'а', 'я', 'о', 'е', 'у', 'ю', 'ом', 'ем', 'ой', 'ей', 'ы', 'и', 'ам', 'ям', 'ах', 'ях', 'ами',
+              'ями', 'ь', 'ью', *RU_ADJ, *('н' + ending for ending in RU_ADJ))
+
+# Nomlarning o'zbek/rus yozilish variantlari (DB tarjimalariga qo'shimcha)
+CITY_ALIASES = {
+    'Bukhara': ['buxoro', 'buxara', 'buxaro', 'бухара'],
+    'Samarkand': ['samarqand', 'самарканд'],
+    'Tashkent': ['toshkent', 'ташкент'],
+    'Khiva': ['xiva', 'хива'],
+    'Shahrisabz': ['shahrisabz', 'шахрисабз'],
+    'Nukus': ['nukus', 'нукус'],
+    'Termez': ['termiz', 'термез'],
+    'Kokand': ['qoqon', "qo'qon", 'kokon', 'коканд'],
+    'Nurata': ['nurota', 'нурата'],
+    'Moynaq': ['muynak', 'moynoq', 'мойнак'],
+}
+COUNTRY_ALIASES = {
+    'Uzbekistan': ["o'zbekiston", 'ozbekiston', 'uzbekiston', 'uzbekistan', 'узбекистан'],
+}
+# So'z yoki (o'zak, ruxsat etilgan qo'shimchalar) — qo'shimchalar berilmasa yozuviga qarab UZ/EN yoki RU
+TRIP_TYPE_WORDS = {
+    'beach': ['beach', 'plyaj', 'sohil', 'пляж'],
+    'cultural': ['cultur', 'madaniy', 'tarix', 'культур',
+                 ('истори', ('я', 'и', 'ю', 'ей', 'ческий', 'ческое', 'ческие', 'ческих', 'ческая', 'ческую'))],
+    'adventure': ['adventur', 'sarguzasht', 'hiking', 'mountain', 'tog', 'приключ'],
+    'romantic': ['romantic', 'romantik', 'романт'],
+    'nature': ['nature', 'tabiat', 'природ'],
+    'family': ['family', 'oila', ('семь', ('я', 'и', 'е', 'ю', 'ей', 'ёй', 'ям', 'ями', 'ях'))],   # "семь" — yetti
+}
+SEASON_WORDS = {
+    'spring': ['spring', 'bahor', 'весн'],
+    'summer': ['summer', 'yoz', ('лет', RU_ENDINGS[1:])],        # "лет" (yillar) o'zi — yoz emas
+    'autumn': ['autumn', ('fall', ('',)), 'kuz', 'осен'],          # "falls" (sharshara) — kuz emas
+    'winter': ['winter', 'qish', 'зим'],
+}
+KEYWORD_WORDS = {
+    'quiet': ['quiet', 'calm', 'peaceful', 'tinch', 'тих', 'спокой'],
+    'luxury': ['luxury', 'premium', 'hashamat', 'роскош', 'люкс'],
+    'cheap': ['cheap', 'budget', 'arzon', 'дешев', 'бюджет'],
+    'food': ['food', 'cuisine', 'taom', 'oshxona', 'еда', 'кухн'],
+    'historic': ['historic', 'ancient', 'qadimiy', 'древн'],
+    'hiking': ['hiking', ('trek', ('', 's', 'king')), 'piyoda', 'поход'],
+}
+
+# Ma'no bermaydigan, lekin "tushunilgan" hisoblanadigan so'zlar (ishonch uchun)
+STOPWORDS = {
+    'a', 'an', 'the', 'in', 'to', 'for', 'with', 'and', 'or', 'of', 'on', 'at', 'from', 'near', 'my', 'me',
+    'i', 'we', 'us', 'our', 'want', 'looking', 'find', 'show', 'trip', 'trips', 'travel', 'vacation',
+    'holiday', 'escape', 'getaway', 'break', 'place', 'places', 'destination', 'under', 'below', 'less',
+    'than', 'max', 'up', 'budget', 'people', 'person', 'persons', 'adults', 'kids', 'two', 'couple',
+    'during', 'this', 'next', 'some', 'something', 'best', 'good', 'nice', 'great', 'city',
+    'sayohat', 'sayohati', 'uchun', 'va', 'bilan', 'gacha', 'dan', 'da', 'ga', 'kishi', 'kishilik',
+    'joy', 'joylar', 'menga', 'kerak', 'istayman', 'dollar', 'dollargacha', 'usd', 'mavsum', 'mavsumda',
+    'в', 'на', 'и', 'для', 'до', 'с', 'по', 'хочу', 'поездка', 'поездку', 'отдых', 'человек', 'двоих',
+    'место', 'места', 'долларов',
+}
+PARTY_RE = re.compile(r'(\d{1,2})\s*(?:people|persons?|adults|guests|kishi|kishilik|человек|чел)|for\s+(\d{1,2})\b')
+TOKEN_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+TAIL_RE = re.compile(r"[^\W_]*(?:'[^\W_]+)*")       # naqshdan keyin so'zning qolgan qismi
+CYRILLIC_RE = re.compile(r'[а-яё]')
+APOSTROPHES = str.maketrans({'ʻ': "'", 'ʼ': "'", '’': "'", '‘': "'", '`': "'"})
+
+
+def normalize(text):
+    """Kichik harf, NFKC, o'zbekcha tutuq belgisi variantlari bittaga."""
+    return unicodedata.normalize('NFKC', text or '').casefold().translate(APOSTROPHES)
+
+
+def _endings(text, endings=None):
+    """Naqshdan keyin ruxsat etilgan qo'shimchalar; None — istalgan (uzun naqsh)."""
+    if endings is not None:
+        return frozenset(endings)
+    if len(text) >= STEM_MIN_LENGTH:
+        return None
+    return frozenset(RU_ENDINGS if CYRILLIC_RE.search(text) else UZ_ENDINGS + EN_ENDINGS)
+
+
+def extract_price(text):
+    """Matndan narx chegarasini ajratadi -> (max_price, min_price).
+
+    Faqat narx belgisiga ($ / dollar / gacha / under / до) yopishgan sonlarni
+    oladi — shu sababli yil ("2026") yoki odam soni ("2 kishi") narx deb
+    qabul qilinmaydi.
+    """
+    adjacent = [int(m.group(1) or m.group(2)) for m in re.finditer(
+        r'\$\s*(\d{2,6})|(\d{2,6})\s*(?:\$|dollar|usd|у\.?е)', text)]
+    bounded = [int(m.group(1) or m.group(2)) for m in re.finditer(
+        r'(\d{2,6})\s*gacha|(?:under|less than|до)\s*\$?\s*(\d{2,6})', text)]
+    nums = adjacent + bounded
+    if not nums:
+        return None, None
+    price = max(nums)
+    if re.search(r'more than|over |dan ortiq|dan yuqori|от |minimum', text):
+        return None, price          # quyi chegara
+    return price, None              # yuqori chegara (byudjet shifti — odatiy)
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# AHO-CORASICK AVTOMATI
+# ───────────────────────────────────────────────────────────────────────────
+
+class Gazetteer:
+    """Barcha naqshlar uchun bitta avtomat; natija — (boshi, so'z oxiri, tur, qiymat)."""
+
+    def __init__(self, version, patterns):
+        self.version = version
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for text, kind, value, endings in patterns:
+            self._add(text, (len(text), kind, value, endings))
+        self._link()
+
+    def __len__(self):
+        return len(self._goto)
+
+    def _add(self, text, payload):
+        node = 0
+        for ch in text:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        if payload not in self._out[node]:
+            self._out[node].append(payload)
+
+    def _link(self):
+        queue = list(self._goto[0].values())
+        for node in queue:                              # BFS — fail havolalari
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text):
+        """
+        So'z boshidan boshlangan mosliklar. Uzun naqshdan keyin istalgan qo'shimcha ("buxorodan"),
+        qisqasidan keyin — faqat ruxsat etilgani; moslik so'z oxirigacha qamraladi.
+        """
+        hits = []
+        node = 0
+        for end, ch in enumerate(text, 1):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, kind, value, endings in self._out[node]:
+                start = end - length
+                if start and text[start - 1].isalnum():
+                    continue
+                tail = TAIL_RE.match(text, end).group()
+                if endings is None or tail.replace("'", '') in endings:
+                    hits.append((start, end + len(tail), kind, value))
+        return hits
+
+    @classmethod
+    def build(cls, version):
+        patterns = []
+
+        def add(name, kind, value):
+            name = normalize(name).strip()
+            if len(name) < 3:
+                return
+            patterns.append((name, kind, value, _endings(name)))
+            if "'" in name:                             # "qo'qon" → "qoqon" ham
+                name = name.replace("'", '')
+                patterns.append((name, kind, value, _endings(name)))
+
+        cities = {}
+        for row in City.objects.values('id', 'name', 'name_en', 'name_uz', 'name_ru'):
+            names = {lang: row[f'name_{lang}'] or row['name'] for lang in ('en', 'uz', 'ru')}
+            cities[row['id']] = names
+            for name in {row['name'], *names.values()}:
+                add(name, 'city', names)
+        by_en = {names['en']: names for names in cities.values()}
+        for canon, aliases in CITY_ALIASES.items():
+            for alias in [canon, *aliases]:
+                add(alias, 'city', by_en.get(canon) or {'en': canon})
+
+        countries = {}
+        for row in Country.objects.values('id', 'name', 'name_en', 'name_uz', 'name_ru'):
+            names = {lang: row[f'name_{lang}'] or row['name'] for lang in ('en', 'uz', 'ru')}
+            countries[names['en']] = names
+            for name in {row['name'], *names.values()}:
+                add(name, 'country', names)
+        for canon, aliases in COUNTRY_ALIASES.items():
+            for alias in [canon, *aliases]:
+                add(alias, 'country', countries.get(canon) or {'en': canon})
+
+        for kind, table in (('trip_type', TRIP_TYPE_WORDS), ('season', SEASON_WORDS),
+                            ('keyword', KEYWORD_WORDS)):
+            for key, words in table.items():
+                for word in words:
+                    word, endings = (word, None) if isinstance(word, str) else word
+                    word = normalize(word)
+                    patterns.append((word, kind, key, _endings(word, endings)))
+        return cls(version, _freeze(patterns))
+
+
+def _freeze(patterns):
+    """dict qiymatlarni (nomlar) hashlanadigan ko'rinishga keltiradi."""
+    out = []
+    for text, kind, value, endings in patterns:
+        if isinstance(value, dict):
+            value = tuple(sorted(value.items()))
+        out.append((text, kind, value, endings))
+    return out
+
+
+def get_gazetteer(version=None):
+    """Joriy katalog versiyasi uchun avtomat (kerak bo'lsa qayta quriladi)."""
+    global _current
+    if version is None:
+        version = catalog_version()
+    gaz = _current
+    if gaz is not None and gaz.version == version:
+        return gaz
+    with _lock:
+        gaz = _current
+        if gaz is None or gaz.version != version:
+            gaz = Gazetteer.build(version)
+            _current = gaz
+    return gaz
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# PARSER
+# ───────────────────────────────────────────────────────────────────────────
+
+def _pick(hits):
+    """Bir-birini qoplaydigan mosliklardan eng uzunini qoldiradi (chapdan o'ngga)."""
+    chosen = []
+    taken_until = -1
+    for start, end, kind, value in sorted(hits, key=lambda h: (h[0], h[0] - h[1])):
+        if start >= taken_until or any(c[0] == start and c[1] == end for c in chosen):
+            chosen.append((start, end, kind, value))
+            taken_until = max(taken_until, end)
+    return chosen
+
+
+def _display_name(names):
+    """Shahar/davlat nomi joriy tilda — engine.search() `d.city.name` bilan solishtiradi."""
+    names = dict(names)
+    return names.get(translation.get_language() or 'en') or names.get('en') or next(iter(names.values()))
+
+
+def parse_query(text):
+    """
+    Tabiiy til so'rovi → (filters, confidence).
+
+    filters — ai.parse_search_query() bilan bir xil kalitlar (faqat topilganlari);
+    confidence — 0..1, so'rov so'zlarining qancha qismi tanildi.
+    """
+    t = normalize(text)
+    filters = {}
+    covered = []
+    for start, end, kind, value in _pick(get_gazetteer().find(t)):
+        if kind in ('city', 'country'):
+            filters.setdefault(kind, _display_name(value))
+        elif kind == 'keyword':
+            filters.setdefault('keywords', [])
+            if value not in filters['keywords']:
+                filters['keywords'].append(value)
+        else:
+            filters.setdefault(kind, value)
+        covered.append((start, end))
+
+    max_p, min_p = extract_price(t)
+    if max_p is not None:
+        filters['max_price'] = max_p
+    if min_p is not None:
+        filters['min_price'] = min_p
+    party = PARTY_RE.search(t)
+    if party:
+        filters['party'] = int(party.group(1) or party.group(2))
+
+    tokens = list(TOKEN_RE.finditer(t))
+    if not tokens:
+        return filters, 0.0
+    known = 0
+    for m in tokens:
+        word = m.group()
+        if (word in STOPWORDS or word.isdigit()
+                or any(s <= m.start() < e for s, e in covered)):
+            known += 1
+    confidence = known / len(tokens) if filters else 0.0
+    return filters, confidence
+
+
+def is_confident(confidence):
+    return confidence >= CONFIDENT_COVERAGE
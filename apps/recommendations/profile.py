@@ -0,0 +1,214 @@
+"""
+apps/recommendations/profile.py
+===============================
+Saqlanadigan, inkremental ta'm profili (TasteProfile).
+
+Avval har bir RecommendationEngine foydalanuvchining BUTUN Wishlist, Review,
+Booking va feedback tarixini o'qib, har qatorga recency decay qo'llardi —
+minglab interaksiyali foydalanuvchi har sahifada shuncha qator o'qirdi.
+Endi:
+
+  • seed og'irliklari `ref_time` paytidagi qiymatda saqlanadi:
+        w_ref = base · exp(-(ref_time - when) / TAU)
+    decay ko'paytma bo'lgani uchun o'qishda bitta koeffitsient yetadi:
+        w(today) = w_ref · exp(-(today - ref_time) / TAU)
+  • interaksiya o'zgarganda (signal) faqat shu (user, destination) juftligi
+    qayta hisoblanadi va profil vektorlariga farq (delta) qo'shiladi;
+  • profil vektorlari (trip_type/teg/faoliyat/davlat, narx momentlari)
+    katalog versiyasiga bog'langan — versiya o'zgarsa seedlardan qayta
+    yig'iladi (destination o'chirilsa yoki teglari o'zgarsa ham to'g'ri qoladi).
+
+Birinchi murojaatda (yoki qator yo'q bo'lsa) profil to'liq tarixdan bir marta quriladi.
+"""
+import math
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.models.orders import Booking
+from apps.models.recommendations import RecommendationFeedback, TasteProfile
+from apps.models.reviews import Review
+from apps.models.wishlist import Wishlist
+from apps.recommendations.snapshot import get_snapshot
+from apps.utils.catalog import catalog_version
+
+# Interaksiya turi -> seed vazni (booking eng kuchli signal)
+SEED_WEIGHTS = {'booking': 3.0, 'feedback_up': 2.6, 'review_high': 2.2,
+                'wishlist': 1.6, 'review_low': 0.3}
+RECENCY_TAU = 90.0          # recency decay: exp(-kunlar / 90)
+MIN_SEED_WEIGHT = 1e-9      # bundan kichik seed (barcha qatorlari o'chirilgan) tashlanadi
+
+VECTORS = ('trip_types', 'tags', 'activities', 'countries')
+
+
+def _decay(when, ref):
+    """ref paytiga nisbatan recency koeffitsienti (kelajakdagi sana — 1.0)."""
+    if not when:
+        return 0.5
+    days = max(0.0, (ref - when).total_seconds() / 86400.0)
+    return math.exp(-days / RECENCY_TAU)
+
+
+def _interactions(user_id, dest_id=None):
+    """(destination_id, seed vazni, sana) va (destination_id, feedback action) qatorlari."""
+    scope = {'user_id': user_id}
+    if dest_id is not None:
+        scope['destination_id'] = dest_id
+    seeds, feedback = [], []
+    for wl in Wishlist.objects.filter(**scope).only('destination_id', 'created_at'):
+        seeds.append((wl.destination_id, SEED_WEIGHTS['wishlist'], wl.created_at))
+    for rv in Review.objects.filter(**scope).only('destination_id', 'rating', 'created_at'):
+        key = 'review_high' if rv.rating >= 4 else 'review_low'
+        seeds.append((rv.destination_id, SEED_WEIGHTS[key], rv.created_at))
+    for bk in Booking.objects.filter(**scope).only('destination_id', 'created_at'):
+        seeds.append((bk.destination_id, SEED_WEIGHTS['booking'], bk.created_at))
+    for fb in RecommendationFeedback.objects.filter(**scope).only('destination_id', 'action', 'created_at'):
+        if fb.action == RecommendationFeedback.Action.UP:
+            seeds.append((fb.destination_id, SEED_WEIGHTS['feedback_up'], fb.created_at))
+        else:                                           # down yoki dismiss
+            feedback.append((fb.destination_id, fb.action))
+    return seeds, feedback
+
+
+def _add_vectors(profile, snap, dest_id, weight):
+    """Bitta seed og'irligini profil vektorlariga tarqatadi (weight manfiy bo'lishi mumkin)."""
+    dest = snap.by_id.get(dest_id)
+    if not dest:
+        return
+    if dest.trip_type:
+        _bump(profile.trip_types, dest.trip_type, weight)
+    for tag_id in snap.tags_of(dest_id):
+        _bump(profile.tags, tag_id, weight)
+    for act_id in snap.activities_of(dest_id):
+        _bump(profile.activities, act_id, weight)
+    if dest.country_id:
+        _bump(profile.countries, dest.country_id, weight)
+    profile.price_sum += dest.price * weight
+    profile.price_w += weight
+
+
+def _bump(vector, key, weight):
+    key = str(key)                                      # JSON kalitlari — satr
+    value = vector.get(key, 0.0) + weight
+    if abs(value) < MIN_SEED_WEIGHT:
+        vector.pop(key, None)
+    else:
+        vector[key] = value
+
+
+def _rebuild_vectors(profile, snap):
+    """Profil vektorlarini seedlardan qaytadan yig'adi (katalog versiyasi o'zgarganda)."""
+    for name in VECTORS:
+        setattr(profile, name, {})
+    profile.price_sum = profile.price_w = 0.0
+    for dest_id, weight in profile.seeds.items():
+        _add_vectors(profile, snap, int(dest_id), weight)
+    profile.catalog_version = snap.version
+
+
+def _rebase(profile, now):
+    """Saqlangan og'irliklarni yangi ref_time'ga ko'chiradi (sonlar kichik qolsin)."""
+    if now <= profile.ref_time:
+        return
+    factor = _decay(profile.ref_time, now)
+    profile.seeds = {k: v * factor for k, v in profile.seeds.items()}
+    for name in VECTORS:
+        setattr(profile, name, {k: v * factor for k, v in getattr(profile, name).items()})
+    profile.price_sum *= factor
+    profile.price_w *= factor
+    profile.ref_time = now
+
+
+def build_taste_profile(user_id, snap=None):
+    """To'liq tarixdan profil quradi va saqlaydi (birinchi marta yoki tiklash uchun)."""
+    snap = snap or get_snapshot()
+    now = timezone.now()
+    seeds, feedback = _interactions(user_id)
+    profile = TasteProfile.objects.filter(user_id=user_id).first() or TasteProfile(user_id=user_id)
+    profile.ref_time = now
+    profile.seeds = {}
+    for dest_id, base, when in seeds:
+        key = str(dest_id)
+        profile.seeds[key] = profile.seeds.get(key, 0.0) + base * _decay(when, now)
+    profile.feedback = {str(dest_id): action for dest_id, action in feedback}
+    _rebuild_vectors(profile, snap)
+    profile.save()
+    return profile
+
+
+def record_interaction(user_id, dest_id):
+    """Bitta (user, destination) juftligi o'zgardi — seed va profilga faqat farq qo'shiladi.
+
+    Signallar commitdan keyin chaqiradi. Juftlikning qatorlari (odatda 1-3 ta)
+    qayta o'qiladi, shuning uchun yaratish, tahrirlash va o'chirish bir xil yo'ldan o'tadi.
+    """
+    with transaction.atomic():
+        profile = TasteProfile.objects.select_for_update().filter(user_id=user_id).first()
+        if profile is None:                             # hali qurilmagan — birinchi o'qishda to'liq quriladi
+            return
+        now = timezone.now()
+        _rebase(profile, now)
+
+        seeds, feedback = _interactions(user_id, dest_id)
+        key = str(dest_id)
+        new = sum(base * _decay(when, now) for _, base, when in seeds)
+        old = profile.seeds.pop(key, 0.0)
+        if new > MIN_SEED_WEIGHT:
+            profile.seeds[key] = new
+        profile.feedback.pop(key, None)
+        for _, action in feedback:
+            profile.feedback[key] = action
+
+        snap = get_snapshot(catalog_version())
+        if profile.catalog_version == snap.version:
+            _add_vectors(profile, snap, dest_id, new - old)
+        else:
+            _rebuild_vectors(profile, snap)
+        profile.save()
+
+
+def _persist_vectors(profile_pk, snap):
+    """
+    Eskirgan vektorlarni qulf ostida qayta yig'ib saqlaydi. record_interaction qatorni
+    ushlab turgan bo'lsa kutilmaydi (skip_locked) — u o'zi versiyani ko'rib qayta yig'adi.
+    Qulfsiz save() parallel deltani va ref_time ko'chirishini yo'qotardi.
+    """
+    with transaction.atomic():
+        profile = TasteProfile.objects.select_for_update(skip_locked=True).filter(pk=profile_pk).first()
+        if profile is None or profile.catalog_version == snap.version:
+            return
+        _rebuild_vectors(profile, snap)
+        profile.save(update_fields=['catalog_version', *VECTORS, 'price_sum', 'price_w'])
+
+
+def load_taste_profile(user, snap, today):
+    """Engine uchun profil — og'irliklar `today` paytiga decay qilingan.
+
+    Qaytadi: {'seeds': {dest_id: w}, 'feedback': {dest_id: action},
+              'trip_type', 'tags', 'activities', 'country': {kalit: w},
+              'price_sum', 'price_w'}
+    """
+    profile = TasteProfile.objects.filter(user=user).first()
+    if profile is None:
+        try:
+            with transaction.atomic():
+                profile = build_taste_profile(user.pk, snap)
+        except IntegrityError:                          # parallel so'rov allaqachon qurdi
+            profile = TasteProfile.objects.get(user=user)
+    if profile.catalog_version != snap.version:
+        # Javob uchun xotirada qayta yig'iladi; saqlash — faqat qator qulfi ostida (_persist_vectors)
+        _rebuild_vectors(profile, snap)
+        _persist_vectors(profile.pk, snap)
+
+    factor = _decay(profile.ref_time, today)
+    return {
+        'seeds': {int(k): v * factor for k, v in profile.seeds.items()},
+        'feedback': {int(k): v for k, v in profile.feedback.items()},
+        'trip_type': defaultdict(float, {k: v * factor for k, v in profile.trip_types.items()}),
+        'tags': defaultdict(float, {int(k): v * factor for k, v in profile.tags.items()}),
+        'activities': defaultdict(float, {int(k): v * factor for k, v in profile.activities.items()}),
+        'country': defaultdict(float, {int(k): v * factor for k, v in profile.countries.items()}),
+        'price_sum': profile.price_sum * factor,
+        'price_w': profile.price_w * factor,
+    }
@@ -0,0 +1,385 @@
+"""
+apps/recommendations/similar.py
+===============================
+"O'xshash joylar" — destinationlarning kontent embeddinglari ustida taxminiy
+eng yaqin qo'shnilar (ANN) indeksi.
+
+Avval detail sahifa "o'xshash" deb shu shahardagi istalgan joylarni,
+wishlist sahifa esa shu trip_type'dagi trending joylarni ko'rsatardi. Endi:
+
+  1. har destination uchun ixcham vektor quriladi (feature hashing, DIM o'lcham):
+     trip_type, mavsum, narx oralig'i, davlat, shahar, teglar, faoliyatlar va
+     nom / qisqa tavsifdagi so'zlar — L2 normallangan, ya'ni dot = cosine;
+  2. random-hyperplane LSH: TABLES ta jadval, har birida `bits` bitli kod —
+     o'xshash vektorlar bir xil "chelak"ka tushadi;
+  3. so'rovda faqat o'z chelagi va hyperplane'ga eng yaqin bitlari teskari
+     bo'lgan qo'shni chelaklardagi nomzodlar (multi-probe) aniq cosine bilan
+     solishtiriladi. Kichik katalogda
+     (BRUTE_FORCE_MAX gacha) hamma qator to'g'ridan-to'g'ri solishtiriladi.
+
+Indeks Celery'da quriladi va keshga yoziladi (collab indeksi kabi). Hyperplane'lar
+qat'iy urug'dan olinadi, shuning uchun bitta destination o'zgarganda faqat
+uning qatori qayta hisoblanadi (`update_similar_index`). O'zgargan id'lar
+avval navbatga (`queue_similar_update`) yoziladi — qulfni olgan worker
+navbatdagi hammasini bitta yangilashda qo'llaydi, hech biri yo'qolmaydi.
+
+Keshga butun indeks faqat to'liq qurilganda yoki MAX_DELTAS ta yangilanishdan
+keyin yoziladi; oradagi har yangilanish — faqat o'zgargan qatorlar ("delta").
+Workerlar o'zidagi nusxaga yetishmayotgan deltalarni ketma-ket qo'llaydi.
+"""
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DIM = 64                     # embedding o'lchami
+TABLES = 8                   # LSH jadvallari soni
+MAX_BITS = 16                # kod uzunligi katalog hajmiga qarab 4..16
+BUCKET_TARGET = 16           # chelakdagi o'rtacha qatorlar soni (bits shunga qarab tanlanadi)
+PROBES = 5                   # har jadvalda qo'shimcha tekshiriladigan qo'shni chelaklar
+BRUTE_FORCE_MAX = 2000       # bundan kichik katalogda LSH kerak emas
+PLANES_SEED = 20240601       # o'zgarmas — aks holda inkremental yangilash eski kodlarga mos kelmaydi
+
+INDEX_KEY = 'recsys:similar_index'
+INDEX_VERSION_KEY = 'recsys:similar_index:version'         # (to'liq indeks versiyasi, deltalar soni)
+DELTA_KEY = 'recsys:similar_index:delta:{}:{}'             # versiya, delta raqami
+MAX_DELTAS = 50              # shundan keyin butun indeks qayta yoziladi (deltalar zanjiri uzaymasin)
+LOCK_KEY = 'recsys:similar_index:lock'
+LOCK_TTL = 120
+PENDING_SEQ_KEY = 'recsys:similar_index:pending'           # navbatga oxirgi yozilgan raqam
+PENDING_DONE_KEY = 'recsys:similar_index:pending:done'     # indeksga qo'llangan oxirgi raqam
+PENDING_SLOT_KEY = 'recsys:similar_index:pending:{}'       # raqam -> destination id'lari
+
+FEATURE_WEIGHTS = {'trip': 2.0, 'country': 1.5, 'season': 1.0, 'price': 1.0,
+                   'city': 1.0, 'tag': 1.0, 'act': 0.8, 'word': 0.35}
+MAX_WORDS = 24
+STOPWORDS = {'the', 'and', 'for', 'with', 'you', 'your', 'this', 'that', 'from', 'into', 'will',
+             'are', 'its', 'our', 'all', 'bir', 'va', 'bilan', 'uchun', 'это', 'для'}
+_WORD_RE = re.compile(r'[^\W\d_]{3,}')
+_TAG_RE = re.compile(r'<[^>]+>')
+
+_PLANES = np.random.default_rng(PLANES_SEED).standard_normal((TABLES, MAX_BITS, DIM)).astype(np.float32)
+_lock = threading.Lock()
+_current = None
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# EMBEDDING
+# ───────────────────────────────────────────────────────────────────────────
+
+def _slot(feature):
+    """Barqaror hash (Python hash() process'lar orasida farq qiladi) -> (indeks, ishora)."""
+    h = zlib.crc32(feature.encode('utf-8'))
+    return h % DIM, 1.0 if (h >> 16) & 1 else -1.0
+
+
+def _words(*texts):
+    words = []
+    for text in texts:
+        for word in _WORD_RE.findall(_TAG_RE.sub(' ', text or '').lower()):
+            if word not in STOPWORDS and word not in words:
+                words.append(word)
+    return words[:MAX_WORDS]
+
+
+def _features(row, tag_ids, act_ids):
+    """Bitta destination -> [(feature, vazn), ...]."""
+    feats = []
+    if row['trip_type']:
+        feats.append((f"trip:{row['trip_type']}", FEATURE_WEIGHTS['trip']))
+    if row['season']:
+        feats.append((f"season:{row['season'].lower()}", FEATURE_WEIGHTS['season']))
+    feats.append((f"price:{int(math.log2(row['price'] + 1))}", FEATURE_WEIGHTS['price']))
+    if row['country_id']:
+        feats.append((f"country:{row['country_id']}", FEATURE_WEIGHTS['country']))
+    if row['city_id']:
+        feats.append((f"city:{row['city_id']}", FEATURE_WEIGHTS['city']))
+    if tag_ids:
+        w = FEATURE_WEIGHTS['tag'] / math.sqrt(len(tag_ids))
+        feats += [(f'tag:{t}', w) for t in tag_ids]
+    if act_ids:
+        w = FEATURE_WEIGHTS['act'] / math.sqrt(len(act_ids))
+        feats += [(f'act:{a}', w) for a in act_ids]
+    words = _words(row['name_en'], row['name_uz'], row['name_ru'], row['short_description_en'])
+    feats += [(f'word:{word}', FEATURE_WEIGHTS['word']) for word in words]
+    return feats
+
+
+def _embed(rows, tags, acts):
+    """values() qatorlari -> (ids, L2 normallangan vektorlar)."""
+    ids = np.array([row['id'] for row in rows], dtype=np.int64)
+    vectors = np.zeros((len(rows), DIM), dtype=np.float32)
+    for i, row in enumerate(rows):
+        for feature, weight in _features(row, tags.get(row['id'], ()), acts.get(row['id'], ())):
+            slot, sign = _slot(feature)
+            vectors[i, slot] += sign * weight
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return ids, vectors
+
+
+def _load_rows(dest_ids=None):
+    """Embedding uchun destination maydonlari + teg/faoliyat id'lari (3 ta so'rov)."""
+    from apps.models.destinations import Destination
+
+    qs = Destination.objects.all()
+    tag_qs = Destination.tags.through.objects.all()
+    act_qs = Destination.activities.through.objects.all()
+    if dest_ids is not None:
+        qs = qs.filter(id__in=dest_ids)
+        tag_qs = tag_qs.filter(destination_id__in=dest_ids)
+        act_qs = act_qs.filter(destination_id__in=dest_ids)
+    rows = list(qs.order_by('id').values(
+        'id', 'trip_type', 'season', 'price', 'country_id', 'city_id',
+        'name_en', 'name_uz', 'name_ru', 'short_description_en',
+    ))
+    tags, acts = {}, {}
+    for dest_id, tag_id in tag_qs.values_list('destination_id', 'tag_id').iterator(chunk_size=5000):
+        tags.setdefault(dest_id, []).append(tag_id)
+    for dest_id, act_id in act_qs.values_list('destination_id', 'activity_id').iterator(chunk_size=5000):
+        acts.setdefault(dest_id, []).append(act_id)
+    return rows, tags, acts
+
+
+def _bits_for(size):
+    return max(4, min(MAX_BITS, round(math.log2(max(size, 1) / BUCKET_TARGET))))
+
+
+def _codes(vectors, bits):
+    """Har jadval uchun LSH kodi: hyperplane'ning qaysi tomonida -> bit."""
+    weights = (1 << np.arange(bits, dtype=np.uint32))
+    codes = np.empty((len(vectors), TABLES), dtype=np.uint32)
+    for t in range(TABLES):
+        side = (vectors @ _PLANES[t, :bits].T) > 0
+        codes[:, t] = side.astype(np.uint32) @ weights
+    return codes
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# INDEKS
+# ───────────────────────────────────────────────────────────────────────────
+
+class SimilarIndex:
+    """Destination vektorlari + LSH jadvallari (faqat o'qish uchun)."""
+
+    def __init__(self, version, bits, ids, vectors, codes, deltas=0):
+        self.version = version
+        self.deltas = deltas                        # to'liq indeksdan keyin qo'llangan deltalar
+        self.bits = bits
+        self.ids = ids
+        self.vectors = vectors.astype(np.float32, copy=False)
+        self.codes = codes
+        self._row = {dest_id: row for row, dest_id in enumerate(ids.tolist())}
+        # barcha jadvallar bitta saralangan massivda: kalit = (jadval << bits) | kod,
+        # chelak = searchsorted oralig'i — so'rovda Python sikli yo'q
+        keys = (np.arange(TABLES, dtype=np.uint64) << np.uint64(bits)) + codes.astype(np.uint64)
+        order = np.argsort(keys, axis=None, kind='stable')
+        self._keys = keys.ravel()[order]
+        self._rows = (order // TABLES).astype(np.intp)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def payload(self):
+        # float16 — keshdagi hajm ikki barobar kichik, cosine uchun aniqlik yetarli
+        return {'version': self.version, 'bits': self.bits, 'ids': self.ids,
+                'vectors': self.vectors.astype(np.float16), 'codes': self.codes}
+
+    def apply_delta(self, delta):
+        """delta'dagi id'lar qatorlari almashtirilgan (o'chirilganlari olib tashlangan) yangi indeks."""
+        keep = ~np.isin(self.ids, delta['removed'])
+        return SimilarIndex(self.version, self.bits,
+                            np.concatenate([self.ids[keep], delta['ids']]),
+                            np.concatenate([self.vectors[keep], delta['vectors'].astype(np.float32)]),
+                            np.concatenate([self.codes[keep], delta['codes']]),
+                            deltas=self.deltas + 1)
+
+    def vector_of(self, dest_ids):
+        """Berilgan destinationlar vektorlarining o'rtachasi (normallangan) yoki None."""
+        rows = [self._row[i] for i in dest_ids if i in self._row]
+        if not rows:
+            return None
+        vec = self.vectors[rows].mean(axis=0)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else None
+
+    def _candidates(self, vec):
+        """Solishtiriladigan qatorlar niqobi (kichik katalogda — hammasi)."""
+        if len(self.ids) <= BRUTE_FORCE_MAX:
+            return np.ones(len(self.ids), dtype=bool)
+        # multi-probe: har jadvalda o'z chelagi + hyperplane'ga eng yaqin (ishonchsiz)
+        # PROBES ta bitdan bittasi teskari bo'lgan qo'shni chelaklar
+        proj = np.einsum('tbd,d->tb', _PLANES[:, :self.bits], vec)
+        codes = ((proj > 0).astype(np.uint64) << np.arange(self.bits, dtype=np.uint64)).sum(axis=1)
+        weak = np.argsort(np.abs(proj), axis=1)[:, :PROBES].astype(np.uint64)
+        flips = np.concatenate([np.zeros((TABLES, 1), dtype=np.uint64), np.uint64(1) << weak], axis=1)
+        tables = np.arange(TABLES, dtype=np.uint64) << np.uint64(self.bits)
+        probes = (tables[:, None] + (codes[:, None] ^ flips)).ravel()
+        lo = np.searchsorted(self._keys, probes, 'left')
+        lens = np.searchsorted(self._keys, probes, 'right') - lo
+        mask = np.zeros(len(self.ids), dtype=bool)
+        total = int(lens.sum())
+        if total:
+            # [lo_i, lo_i + len_i) oraliqlarini bitta massivga yoyish
+            starts = np.repeat(lo - np.cumsum(lens) + lens, lens)
+            mask[self._rows[starts + np.arange(total)]] = True
+        return mask
+
+    def nearest(self, vec, k, exclude_ids=()):
+        """vec'ga eng yaqin k ta destination -> [(id, cosine), ...] (kamayish tartibida)."""
+        mask = self._candidates(vec)
+        skip = [self._row[i] for i in exclude_ids if i in self._row]
+        if skip:
+            mask[skip] = False
+        rows = np.flatnonzero(mask)
+        if not rows.size:
+            return []
+        sims = self.vectors[rows] @ vec
+        if rows.size > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            rows, sims = rows[top], sims[top]
+        order = np.lexsort((self.ids[rows], -sims))
+        return list(zip(self.ids[rows[order]].tolist(), sims[order].tolist()))
+
+
+def build_similar_index():
+    """Barcha destinationlardan yangi SimilarIndex quradi (DB'ga faqat o'qish)."""
+    ids, vectors = _embed(*_load_rows())
+    bits = _bits_for(len(ids))
+    return SimilarIndex(int(time.time() * 1000), bits, ids, vectors, _codes(vectors, bits))
+
+
+def update_similar_index(index, dest_ids):
+    """Faqat o'zgargan destinationlar qatorlarini yangilaydi (o'chirilganlari olib tashlanadi).
+
+    Qaytadi: (yangi indeks, delta) — delta publish_similar_index'ga beriladi.
+    """
+    dest_ids = sorted(set(dest_ids))
+    new_ids, new_vectors = _embed(*_load_rows(set(dest_ids)))
+    delta = {'removed': np.array(dest_ids, dtype=index.ids.dtype), 'ids': new_ids,
+             'vectors': new_vectors.astype(np.float16), 'codes': _codes(new_vectors, index.bits)}
+    return index.apply_delta(delta), delta
+
+
+def publish_similar_index(index, delta=None):
+    """Indeksni keshga yozadi; workerlar versiya o'zgarganini ko'rib yangilanadi.
+
+    delta berilsa (inkremental yangilash) faqat u yoziladi. To'liq qurilgan yoki
+    MAX_DELTAS dan ko'p delta yig'ilgan indeks yangi versiya bilan butunlay yoziladi.
+    Qaytadi: keshdagi bilan bir xil indeks.
+    """
+    global _current
+    if delta is None or index.deltas > MAX_DELTAS:
+        old_version, old_deltas = cache.get(INDEX_VERSION_KEY) or (None, 0)
+        index = SimilarIndex(int(time.time() * 1000), index.bits, index.ids, index.vectors, index.codes)
+        cache.set(INDEX_KEY, index.payload(), timeout=None)
+        cache.set(INDEX_VERSION_KEY, (index.version, 0), timeout=None)
+        if old_version is not None:
+            cache.delete_many([DELTA_KEY.format(old_version, n) for n in range(1, old_deltas + 1)])
+    else:
+        cache.set(DELTA_KEY.format(index.version, index.deltas), delta, timeout=None)
+        cache.set(INDEX_VERSION_KEY, (index.version, index.deltas), timeout=None)
+    _current = index
+    return index
+
+
+def _load_index():
+    payload = cache.get(INDEX_KEY)
+    return SimilarIndex(**payload) if payload is not None else None
+
+
+def get_similar_index():
+    """Joriy indeks (process ichida keshlangan) yoki None — hali qurilmagan bo'lsa."""
+    global _current
+    meta = cache.get(INDEX_VERSION_KEY)
+    if meta is None:
+        return None
+    version, deltas = meta
+    index = _current
+    if index is not None and (index.version, index.deltas) == (version, deltas):
+        return index
+    with _lock:
+        index = _current
+        if index is None or index.version != version or index.deltas > deltas:
+            index = _load_index()
+            if index is None:
+                return None
+        if index.version == version and index.deltas < deltas:
+            # Yetishmayotgan deltalar; biri yo'q bo'lsa (indeks endigina to'liq
+            # qayta yozilgan) — butun indeks yuklanadi
+            keys = [DELTA_KEY.format(version, n) for n in range(index.deltas + 1, deltas + 1)]
+            found = cache.get_many(keys)
+            if len(found) == len(keys):
+                for key in keys:
+                    index = index.apply_delta(found[key])
+            else:
+                index = _load_index() or index
+        _current = index
+    return index
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# YANGILANISHLAR NAVBATI (bir vaqtda bitta yozuvchi, yangilanish yo'qolmaydi)
+# ───────────────────────────────────────────────────────────────────────────
+
+def queue_similar_update(dest_ids):
+    """O'zgargan id'larni navbatga qo'yadi — qaytadi: navbat raqami."""
+    cache.add(PENDING_SEQ_KEY, 0, timeout=None)
+    seq = cache.incr(PENDING_SEQ_KEY)
+    cache.set(PENDING_SLOT_KEY.format(seq), list(dest_ids), timeout=None)
+    return seq
+
+
+def applied_similar_seq():
+    """Indeksga qo'llangan oxirgi navbat raqami."""
+    return cache.get(PENDING_DONE_KEY, 0)
+
+
+def pending_similar_updates():
+    """(navbatdagi id'lar to'plami, oxirgi olingan raqam) — faqat ketma-ket yozib bo'lingan raqamlar."""
+    done = applied_similar_seq()
+    seq = cache.get(PENDING_SEQ_KEY, 0)
+    keys = [PENDING_SLOT_KEY.format(n) for n in range(done + 1, seq + 1)]
+    slots = cache.get_many(keys)
+    dest_ids, last = set(), done
+    for key in keys:
+        if key not in slots:                # raqam olingan, lekin id'lar hali yozilmagan
+            break
+        dest_ids.update(slots[key])
+        last += 1
+    return dest_ids, last
+
+
+def mark_similar_updates_applied(last):
+    """last gacha bo'lgan navbat indeksga qo'llandi — yozuvlari o'chiriladi."""
+    done = applied_similar_seq()
+    if last <= done:
+        return
+    cache.set(PENDING_DONE_KEY, last, timeout=None)
+    cache.delete_many([PENDING_SLOT_KEY.format(n) for n in range(done + 1, last + 1)])
+
+
+def similar_destinations(dest_ids, k=5, exclude_ids=()):
+    """Bitta yoki bir nechta destinationga eng o'xshash k ta joy id'lari.
+
+    Bir nechta id berilsa (masalan, butun wishlist) ularning o'rtacha vektori
+    bo'yicha qidiriladi. Berilgan id'larning o'zi natijaga kirmaydi.
+    Indeks hali qurilmagan yoki berilgan id'lar unda hali yo'q bo'lsa None
+    qaytadi — chaqiruvchi zaxira yo'lni tanlaydi.
+    """
+    index = get_similar_index()
+    if index is None:
+        return None
+    dest_ids = list(dest_ids)
+    vec = index.vector_of(dest_ids)
+    if vec is None:
+        return None
+    exclude = set(exclude_ids) | set(dest_ids)
+    return [dest_id for dest_id, _ in index.nearest(vec, k, exclude_ids=exclude)]
@@ -0,0 +1,124 @@
+"""
+apps/recommendations/snapshot.py
+================================
+Tavsiya nomzodlarining process bo'ylab umumiy, o'zgarmas nusxasi.
+
+Avval har bir RecommendationEngine butun katalogni (tags/activities/images
+prefetch + Avg/Count annotatsiyasi) qaytadan o'qirdi. Endi katalog bitta
+versiya uchun BIR MARTA yuklanadi va shu workerdagi barcha so'rovlar uni
+bo'lishib ishlatadi. Versiya `apps.utils.catalog` orqali signallar bilan
+oshiriladi — keyingi so'rov yangi snapshot quradi. Izohlar faqat reyting
+versiyasini oshiradi: unda snapshot qayta qurilmaydi, faqat reyting
+ustunlari bitta yengil so'rov bilan yangilanadi.
+
+Snapshot faqat o'qish uchun: ustunlar tuple, ichidagi Destination
+obyektlari shablonlarda (kartalar) to'g'ridan-to'g'ri ishlatiladi.
+"""
+import copy
+import threading
+
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from apps.models.destinations import Destination
+from apps.recommendations.vectorized import CandidateMatrix
+from apps.utils.catalog import catalog_versions, rating_version
+
+_lock = threading.Lock()
+_current = None
+
+
+class CandidateSnapshot:
+    """Katalogning bitta versiyasi — ustunli (columnar) ko'rinishda."""
+
+    def __init__(self, version, destinations, ratings=None):
+        self.version = version
+        self.ratings = ratings
+        self.built_at = timezone.now()
+        self.destinations = tuple(destinations)
+        self.by_id = {d.id: d for d in self.destinations}
+        self.index = {d.id: i for i, d in enumerate(self.destinations)}
+
+        rows = self.destinations
+        self.ids = tuple(d.id for d in rows)
+        self.trip_type = tuple(d.trip_type or '' for d in rows)
+        self.season = tuple((d.season or '').lower() for d in rows)
+        self.price = tuple(d.price for d in rows)
+        self.country_id = tuple(d.country_id for d in rows)
+        self.is_trending = tuple(d.is_trending for d in rows)
+        self.is_popular = tuple(d.is_popular for d in rows)
+        # flash sale faolligi vaqtga bog'liq — tugash vaqtini saqlab, so'rovda tekshiramiz
+        self.flash_sale_end = tuple(d.flash_sale_end if d.is_flash_sale else None for d in rows)
+        # Bayes reyting kirishlari
+        self.avg_rating = tuple(float(d.avg_rating or 0.0) for d in rows)
+        self.rev_count = tuple(d.visible_reviews_count for d in rows)
+        self.tag_ids = tuple(tuple(t.id for t in d.tags.all()) for d in rows)
+        self.activity_ids = tuple(tuple(a.id for a in d.activities.all()) for d in rows)
+
+    def __len__(self):
+        return len(self.destinations)
+
+    @cached_property
+    def matrix(self):
+        """NumPy ko'rinishi — batch baholash birinchi marta so'ralganda quriladi."""
+        return CandidateMatrix(self)
+
+    def tags_of(self, dest_id):
+        return self.tag_ids[self.index[dest_id]]
+
+    def activities_of(self, dest_id):
+        return self.activity_ids[self.index[dest_id]]
+
+    def with_ratings(self, ratings):
+        """Shu snapshot, lekin reyting ustunlari bazadan yangilangan (eski nusxa o'zgarmaydi)."""
+        snap = copy.copy(self)
+        snap.__dict__.pop('matrix', None)
+        snap.ratings = ratings
+        fresh = {pk: (avg, count) for pk, avg, count in Destination.objects.values_list(
+            'pk', 'avg_rating', 'visible_reviews_count')}
+
+        destinations = []
+        for d in self.destinations:
+            avg, count = fresh.get(d.id, (d.avg_rating, d.visible_reviews_count))
+            if (avg, count) != (d.avg_rating, d.visible_reviews_count):
+                d = copy.copy(d)             # kartalar ham yangi reytingni ko'rsatadi
+                d.avg_rating, d.visible_reviews_count = avg, count
+            destinations.append(d)
+        snap.destinations = tuple(destinations)
+        snap.by_id = {d.id: d for d in snap.destinations}
+        snap.avg_rating = tuple(float(d.avg_rating or 0.0) for d in snap.destinations)
+        snap.rev_count = tuple(d.visible_reviews_count for d in snap.destinations)
+        return snap
+
+    @classmethod
+    def build(cls, version, ratings=None):
+        destinations = (
+            Destination.objects
+            .select_related('city', 'country')
+            .prefetch_related('tags', 'activities', 'images')
+        )
+        return cls(version, destinations, ratings)
+
+
+def get_snapshot(version=None, ratings=None):
+    """Joriy katalog versiyasi uchun snapshot (kerak bo'lsa qayta quriladi).
+
+    version / ratings — chaqiruvchi versiyalarni allaqachon o'qigan bo'lsa
+    (get_many bilan), keshga qayta murojaat qilmaslik uchun uzatiladi.
+    """
+    global _current
+    if version is None:
+        version, ratings = catalog_versions()
+    elif ratings is None:
+        ratings = rating_version()
+    snap = _current
+    if snap is not None and snap.version == version and snap.ratings == ratings:
+        return snap
+    with _lock:                                   # bir vaqtda faqat bitta thread quradi
+        snap = _current
+        if snap is None or snap.version != version:
+            snap = CandidateSnapshot.build(version, ratings)
+        elif snap.ratings != ratings:
+            snap = snap.with_ratings(ratings)     # faqat izohlar o'zgargan
+        _current = snap
+    return snap
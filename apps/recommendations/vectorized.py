@@ -0,0 +1,74 @@
+"""
+apps/recommendations/vectorized.py
+==================================
+Snapshot'ning NumPy ko'rinishi — barcha nomzodlarni bir necha massiv
+amalida baholash uchun (RecommendationEngine batch rejimi).
+
+  • trip_type, davlat  — indeks massivi (one-hot × vazn o'rniga gather)
+  • teglar             — ELL ko'rinishidagi siyrak matritsa: har qatorda
+                         teg indekslari, bo'sh joylar nol vaznli "pad" slotga
+                         ishora qiladi
+  • narx, reyting, mavsum, flash sale, trending/popular — oddiy massivlar
+
+Matritsa foydalanuvchiga bog'liq emas: snapshot bilan birga bir marta
+quriladi. Foydalanuvchi profili esa har so'rovda vazn vektoriga aylanadi
+(`weights_for`) — oxirgi slot doim 0.0 (pad).
+"""
+import numpy as np
+
+
+def _vocab(values):
+    """Takrorlanmas qiymatlar -> {qiymat: indeks}; pad indeksi = len(vocab)."""
+    return {v: i for i, v in enumerate(sorted(set(values)))}
+
+
+class CandidateMatrix:
+    """CandidateSnapshot ustunlarining massiv ko'rinishi (faqat o'qish uchun)."""
+
+    def __init__(self, snap):
+        self.size = len(snap)
+
+        self.trip_type_pos = _vocab(t for t in snap.trip_type if t)
+        pad = len(self.trip_type_pos)
+        self.trip_type = np.array([self.trip_type_pos.get(t, pad) for t in snap.trip_type], dtype=np.intp)
+
+        self.country_pos = _vocab(c for c in snap.country_id if c)
+        pad = len(self.country_pos)
+        self.country = np.array([self.country_pos.get(c, pad) for c in snap.country_id], dtype=np.intp)
+
+        self.tag_pos = _vocab(t for ids in snap.tag_ids for t in ids)
+        pad = len(self.tag_pos)
+        width = max((len(ids) for ids in snap.tag_ids), default=0)
+        self.tags = np.full((self.size, width), pad, dtype=np.intp)
+        for row, ids in enumerate(snap.tag_ids):
+            self.tags[row, :len(ids)] = [self.tag_pos[t] for t in ids]
+
+        self.price = np.array(snap.price, dtype=np.float64)
+        self.season = np.array(snap.season, dtype=object)
+        self.flash_end = np.array([end.timestamp() if end else np.nan for end in snap.flash_sale_end],
+                                  dtype=np.float64)
+        self.avg_rating = np.array(snap.avg_rating, dtype=np.float64)
+        self.rev_count = np.array(snap.rev_count, dtype=np.float64)
+        self.is_trending = np.array(snap.is_trending, dtype=bool)
+        self.is_popular = np.array(snap.is_popular, dtype=bool)
+
+    @staticmethod
+    def weights_for(positions, weights):
+        """{kalit: vazn} profilini indeks tartibidagi vektorga aylantiradi (+ pad slot)."""
+        vec = np.zeros(len(positions) + 1, dtype=np.float64)
+        for key, value in weights.items():
+            pos = positions.get(key)
+            if pos is not None:
+                vec[pos] = value
+        return vec
+
+    def tag_hits(self, tag_vec, start):
+        """start + har qatordagi teg vaznlari — skalyar yo'l bilan AYNAN bir xil tartibda qo'shiladi."""
+        hit = start
+        for col in range(self.tags.shape[1]):
+            hit = hit + tag_vec[self.tags[:, col]]
+        return hit
+
+    def flash_active(self, now):
+        with np.errstate(invalid='ignore'):
+            return self.flash_end > now.timestamp()
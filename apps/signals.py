@@ -1,7 +1,19 @@
-from django.db.models.signals import pre_save, post_save, post_delete
-from django.dispatch import receiver
-from apps.models import Review, Destination, PromoCode, Notification
-from apps.tasks import flash_sale_notify_task, price_drop_notify_task
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from apps.models import Review, Destination, Notification, Tag, Activity, City, Country, Region
+from apps.models.destinations import DestinationImage, HotelImage
+from apps.models.orders import Booking
+from apps.models.recommendations import RecommendationFeedback, RecommendationProfile
+from apps.models.wishlist import Wishlist
+from apps.tasks import (flash_sale_notify_task, price_drop_notify_task, process_uploaded_image,
+                        refresh_destination_search_index, schedule_home_sections,
+                        update_similar_destinations_index)
+from apps.recommendations.bundle import bump_history_version
+from apps.recommendations.profile import record_interaction
+from apps.utils.cards import invalidate_cards
+from apps.utils.catalog import bump_catalog_version, bump_rating_version
+from apps.utils.ratings import REVIEW_FIELDS, apply_review_change, review_contribution
 
 
 class ReviewSignalHandler:
@@ -11,23 +23,46 @@ class ReviewSignalHandler:
     """
 
     @classmethod
-    def update_destination_count(cls, sender, instance, **kwargs):
+    def capture_old_rating(cls, sender, instance, **kwargs):
         """
-        Izoh saqlanganda yoki o'chirilganda Destination'dagi hisoblagichni yangilaydi.
+        Saqlashdan oldin izohning bazadagi holati — post_save'da farqni hisoblash uchun.
         """
-        if not instance.destination_id:
-            return
+        instance._rating_before = None
+        if instance.pk:
+            instance._rating_before = sender.objects.filter(pk=instance.pk).values(
+                'destination_id', 'is_visible', *REVIEW_FIELDS).first()
+
+    @classmethod
+    def update_destination_ratings(cls, sender, instance, **kwargs):
+        """
+        Izoh saqlanganda Destination'dagi hisoblagich va reyting yig'indilarini
+        faqat farq bilan (O(1)) yangilaydi — qayta COUNT/AVG qilinmaydi.
+        """
+        before = getattr(instance, '_rating_before', None)
+        old = review_contribution(before)
+        new = review_contribution({'is_visible': instance.is_visible,
+                                   **{f: getattr(instance, f) for f in REVIEW_FIELDS}})
+        old_dest_id = before['destination_id'] if before else instance.destination_id
 
-        # sender bu yerda avtomatik Review modelini bildiradi
-        actual_count = sender.objects.filter(
-            destination_id=instance.destination_id,
-            is_visible=True
-        ).count()
+        if old_dest_id == instance.destination_id:
+            apply_review_change(instance.destination_id, old, new)
+        else:                                           # izoh boshqa destinationga ko'chirildi
+            apply_review_change(old_dest_id, old, None)
+            apply_review_change(instance.destination_id, None, new)
+        if old != new:
+            invalidate_cards({old_dest_id, instance.destination_id})   # kartadagi reyting / izohlar soni
+        instance._rating_before = None
 
-        from apps.models import Destination  # Circular import bo'lmasligi uchun ichkarida
-        Destination.objects.filter(id=instance.destination_id).update(
-            visible_reviews_count=actual_count
-        )
+    @classmethod
+    def remove_destination_rating(cls, sender, instance, **kwargs):
+        """
+        Izoh o'chirilganda uning hissasini ayiradi.
+        """
+        old = review_contribution({'is_visible': instance.is_visible,
+                                   **{f: getattr(instance, f) for f in REVIEW_FIELDS}})
+        apply_review_change(instance.destination_id, old, None)
+        if old:
+            invalidate_cards([instance.destination_id])
 
     # Ertaga Review ga oid boshqa ishlar chiqsa, shu yerga qo'shaverasiz
     # @classmethod
@@ -35,15 +70,19 @@ class ReviewSignalHandler:
     #     pass
 
 
-post_save.connect(ReviewSignalHandler.update_destination_count, sender=Review)
-post_delete.connect(ReviewSignalHandler.update_destination_count, sender=Review)
+pre_save.connect(ReviewSignalHandler.capture_old_rating, sender=Review)
+post_save.connect(ReviewSignalHandler.update_destination_ratings, sender=Review)
+post_delete.connect(ReviewSignalHandler.remove_destination_rating, sender=Review)
 
 
 # ═════════════════════════════════════════════════════════════════════════════
 # 5-GURUH: PROMOTIONS SIGNALS
 # ═════════════════════════════════════════════════════════════════════════════
+# Hozircha ULANMAGAN: apps.signals avval umuman import qilinmasdi, shuning uchun
+# bu receiverlar hech qachon ishlamagan. AppsConfig.ready() endi modulni
+# import qiladi — flash sale / narx / promo-kod bildirishnomalarini (va har
+# Destination.save() dagi qo'shimcha SELECT ni) yoqish alohida o'zgarish bo'ladi.
 
-@receiver(pre_save, sender=Destination)
 def capture_destination_old_values(sender, instance, **kwargs):
     """
     Destination saqlanishidan oldin eski narx va flash sale holatini ushlab qolamiz.
@@ -61,7 +100,6 @@ def capture_destination_old_values(sender, instance, **kwargs):
         instance._old_price = None
         instance._old_is_flash_sale = None
 
-@receiver(post_save, sender=Destination)
 def trigger_destination_promotions(sender, instance, created, **kwargs):
     """
     5.1 Flash Sale boshlanganda va 5.3 Narx tushganda Celery tasklarni ishga tushiradi.
@@ -84,7 +122,6 @@ def trigger_destination_promotions(sender, instance, created, **kwargs):
         # Taskni asinxron ishga tushiramiz
         price_drop_notify_task.delay(instance.id, old_price, instance.price)
 
-@receiver(post_save, sender=PromoCode)
 def trigger_personal_promo_notification(sender, instance, created, **kwargs):
     """
     5.4 SHAXSIY PROMO KOD BERINGANIDA
@@ -129,4 +166,250 @@ def trigger_personal_promo_notification(sender, instance, created, **kwargs):
             except Exception as e:
                 import logging
                 logger = logging.getLogger(__name__)
-                logger.error(f"Personal promo notification failed: {e}")
\ No newline at end of file
+                logger.error(f"Personal promo notification failed: {e}")
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# KATALOG VERSIYASI (tavsiya snapshot'i va boshqa process-ichidagi keshlar)
+# ═════════════════════════════════════════════════════════════════════════════
+
+class CatalogSignalHandler:
+    """
+    Katalogga ta'sir qiladigan har qanday yozuvda versiyani oshiradi.
+    Versiya commitdan KEYIN oshiriladi — aks holda boshqa worker eski
+    (hali commit qilinmagan) ma'lumotdan yangi snapshot qurib qo'yishi mumkin.
+    Izohlar faqat reyting versiyasini oshiradi — ular faqat reyting ustunlarini
+    o'zgartiradi, gazetteer / autocomplete / indekslarni qayta qurish shart emas.
+    """
+
+    MODELS = (Destination, DestinationImage, Tag, Activity, City, Country, Region)
+
+    @classmethod
+    def invalidate(cls, sender, **kwargs):
+        transaction.on_commit(bump_catalog_version)
+
+    @classmethod
+    def invalidate_m2m(cls, sender, action, **kwargs):
+        if action.startswith('post_'):
+            transaction.on_commit(bump_catalog_version)
+
+    @classmethod
+    def invalidate_ratings(cls, sender, **kwargs):
+        transaction.on_commit(bump_rating_version)
+
+
+for _model in CatalogSignalHandler.MODELS:
+    post_save.connect(CatalogSignalHandler.invalidate, sender=_model,
+                      dispatch_uid=f'catalog_version_save_{_model.__name__}')
+    post_delete.connect(CatalogSignalHandler.invalidate, sender=_model,
+                        dispatch_uid=f'catalog_version_delete_{_model.__name__}')
+m2m_changed.connect(CatalogSignalHandler.invalidate_m2m, sender=Destination.tags.through)
+m2m_changed.connect(CatalogSignalHandler.invalidate_m2m, sender=Destination.activities.through)
+post_save.connect(CatalogSignalHandler.invalidate_ratings, sender=Review, dispatch_uid='rating_version_save')
+post_delete.connect(CatalogSignalHandler.invalidate_ratings, sender=Review, dispatch_uid='rating_version_delete')
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# KARTALAR KESHI (destination versiyasi — apps/utils/cards.py)
+# ═════════════════════════════════════════════════════════════════════════════
+
+class CardCacheSignalHandler:
+    """
+    Kartada ko'rinadigan narsa o'zgarganda shu destination(lar) kartasi
+    versiyasini oshiradi. Izohlar (reyting) ReviewSignalHandler'da.
+    """
+
+    @classmethod
+    def destination_changed(cls, sender, instance, **kwargs):
+        invalidate_cards([instance.pk])
+
+    @classmethod
+    def image_changed(cls, sender, instance, **kwargs):
+        invalidate_cards([instance.destination_id])
+
+    @classmethod
+    def related_changed(cls, sender, instance, created=False, **kwargs):
+        # teg yoki shahar nomi — unga bog'langan barcha kartalar
+        if not created:
+            invalidate_cards(instance.destinations.values_list('pk', flat=True))
+
+    @classmethod
+    def tags_changed(cls, sender, instance, action, reverse, pk_set, **kwargs):
+        if action.startswith('post_'):
+            invalidate_cards((pk_set or ()) if reverse else [instance.pk])
+
+
+post_save.connect(CardCacheSignalHandler.destination_changed, sender=Destination, dispatch_uid='card_cache_dest')
+post_save.connect(CardCacheSignalHandler.image_changed, sender=DestinationImage, dispatch_uid='card_cache_img_save')
+post_delete.connect(CardCacheSignalHandler.image_changed, sender=DestinationImage, dispatch_uid='card_cache_img_delete')
+for _model in (Tag, City):
+    post_save.connect(CardCacheSignalHandler.related_changed, sender=_model,
+                      dispatch_uid=f'card_cache_related_{_model.__name__}')
+m2m_changed.connect(CardCacheSignalHandler.tags_changed, sender=Destination.tags.through,
+                    dispatch_uid='card_cache_tags')
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# MUQOVA RASMI (Destination.cover_image — ro'yxatlar images jadvalini o'qimaydi)
+# ═════════════════════════════════════════════════════════════════════════════
+
+class CoverImageSignalHandler:
+    """Rasm qo'shilsa / o'zgarsa / o'chirilsa — destinationning birinchi rasmi qayta yoziladi."""
+
+    @classmethod
+    def image_changed(cls, sender, instance, **kwargs):
+        Destination.objects.filter(pk=instance.destination_id).refresh_cover_images()
+
+
+post_save.connect(CoverImageSignalHandler.image_changed, sender=DestinationImage, dispatch_uid='cover_img_save')
+post_delete.connect(CoverImageSignalHandler.image_changed, sender=DestinationImage, dispatch_uid='cover_img_delete')
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# YUKLANGAN RASMLAR (WebP + variantlar fonda — apps.tasks.process_uploaded_image)
+# ═════════════════════════════════════════════════════════════════════════════
+
+class ImageProcessingSignalHandler:
+    """Yangi fayl saqlangach (commitdan keyin) uni qayta ishlash task'i navbatga qo'yiladi."""
+
+    @classmethod
+    def schedule(cls, sender, instance, **kwargs):
+        if instance.__dict__.pop('_image_uploaded', False):
+            label, pk = instance._meta.label, instance.pk
+            transaction.on_commit(lambda: process_uploaded_image.delay(label, pk))
+
+
+for _model in (DestinationImage, HotelImage, City):
+    post_save.connect(ImageProcessingSignalHandler.schedule, sender=_model,
+                      dispatch_uid=f'image_processing_{_model.__name__}')
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# BOSH SAHIFA BO'LIMLARI (flash sale / trending / featured / izohlar)
+# ═════════════════════════════════════════════════════════════════════════════
+
+class HomeSectionsSignalHandler:
+    """
+    Bo'limlar tarkibiga ta'sir qiladigan yozuvda (Destination bayroqlari,
+    flash sale, izohlar) tarkibni fonda qayta hisoblatadi. Commitdan keyin —
+    katalog versiyasi oshgandan so'ng.
+    """
+
+    MODELS = (Destination, Review)
+
+    @classmethod
+    def schedule(cls, sender, instance, **kwargs):
+        transaction.on_commit(schedule_home_sections)
+
+
+for _model in HomeSectionsSignalHandler.MODELS:
+    post_save.connect(HomeSectionsSignalHandler.schedule, sender=_model,
+                      dispatch_uid=f'home_sections_save_{_model.__name__}')
+    post_delete.connect(HomeSectionsSignalHandler.schedule, sender=_model,
+                        dispatch_uid=f'home_sections_delete_{_model.__name__}')
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# TAVSIYA: FOYDALANUVCHI TARIXI VERSIYASI (keshlangan bundle uchun)
+# ═════════════════════════════════════════════════════════════════════════════
+
+class RecommendationSignalHandler:
+    """
+    Foydalanuvchining tavsiyaga ta'sir qiluvchi har qanday yozuvida saqlangan
+    ta'm profilini (faqat shu destination bo'yicha) yangilaydi va "history
+    version"ini oshiradi — keyingi tashrifda bundle qayta quriladi.
+    """
+
+    MODELS = (Wishlist, Review, Booking, RecommendationFeedback, RecommendationProfile)
+
+    @classmethod
+    def bump_history(cls, sender, instance, **kwargs):
+        user_id = instance.user_id
+        if not user_id:
+            return
+        dest_id = getattr(instance, 'destination_id', None)   # quiz profilida destination yo'q
+
+        def apply():
+            if dest_id is not None:
+                record_interaction(user_id, dest_id)
+            bump_history_version(user_id)
+
+        transaction.on_commit(apply)
+
+
+for _model in RecommendationSignalHandler.MODELS:
+    post_save.connect(RecommendationSignalHandler.bump_history, sender=_model,
+                      dispatch_uid=f'rec_history_save_{_model.__name__}')
+    post_delete.connect(RecommendationSignalHandler.bump_history, sender=_model,
+                        dispatch_uid=f'rec_history_delete_{_model.__name__}')
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# TAVSIYA: "O'XSHASH JOYLAR" INDEKSI (faqat o'zgargan destination yangilanadi)
+# ═════════════════════════════════════════════════════════════════════════════
+
+class SimilarIndexSignalHandler:
+    """
+    Destination (yoki uning teg/faoliyatlari) o'zgarganda shu destination
+    embeddingini fonda qayta hisoblatadi.
+    """
+
+    @classmethod
+    def schedule(cls, sender, instance, **kwargs):
+        dest_id = instance.pk
+        transaction.on_commit(lambda: update_similar_destinations_index.delay([dest_id]))
+
+    @classmethod
+    def schedule_m2m(cls, sender, instance, action, reverse, pk_set, **kwargs):
+        if not action.startswith('post_'):
+            return
+        # teg tomonidan o'zgartirilsa (tag.destinations.add) — pk_set destination id'lari
+        dest_ids = list(pk_set or ()) if reverse else [instance.pk]
+        if dest_ids:
+            transaction.on_commit(lambda: update_similar_destinations_index.delay(dest_ids))
+
+
+post_save.connect(SimilarIndexSignalHandler.schedule, sender=Destination, dispatch_uid='similar_index_save')
+post_delete.connect(SimilarIndexSignalHandler.schedule, sender=Destination, dispatch_uid='similar_index_delete')
+m2m_changed.connect(SimilarIndexSignalHandler.schedule_m2m, sender=Destination.tags.through)
+m2m_changed.connect(SimilarIndexSignalHandler.schedule_m2m, sender=Destination.activities.through)
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# QIDIRUV INDEKSI (DestinationSearchIndex)
+# ═════════════════════════════════════════════════════════════════════════════
+
+class SearchIndexSignalHandler:
+    """
+    Destination saqlanganda uning qatori, shahar/davlat nomi o'zgarganda esa
+    unga tegishli barcha destinationlar qatorlari fonda qayta yoziladi.
+    O'chirilgan destination qatori CASCADE bilan o'zi o'chadi.
+    """
+
+    @classmethod
+    def destination_saved(cls, sender, instance, **kwargs):
+        dest_id = instance.pk
+        transaction.on_commit(lambda: refresh_destination_search_index.delay([dest_id]))
+
+    @classmethod
+    def city_saved(cls, sender, instance, created, **kwargs):
+        if created:
+            return
+        dest_ids = list(instance.destinations.values_list('pk', flat=True))
+        if dest_ids:
+            transaction.on_commit(lambda: refresh_destination_search_index.delay(dest_ids))
+
+    @classmethod
+    def country_saved(cls, sender, instance, created, **kwargs):
+        if created:
+            return
+        dest_ids = list(Destination.objects.filter(
+            Q(country=instance) | Q(city__country=instance)).values_list('pk', flat=True))
+        if dest_ids:
+            transaction.on_commit(lambda: refresh_destination_search_index.delay(dest_ids))
+
+
+post_save.connect(SearchIndexSignalHandler.destination_saved, sender=Destination,
+                  dispatch_uid='search_index_destination')
+post_save.connect(SearchIndexSignalHandler.city_saved, sender=City, dispatch_uid='search_index_city')
+post_save.connect(SearchIndexSignalHandler.country_saved, sender=Country, dispatch_uid='search_index_country')
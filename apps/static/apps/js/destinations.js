@@ -313,7 +313,8 @@ function loadMoreDestinations() {
     btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> ' + gettext('Loading...');
     btn.disabled = true;
 
-    fetch(`/${lang}/destinations/load-more/?offset=${offset}&city=${citySlug}`, {
+    const cursor = encodeURIComponent(btn.dataset.cursor || '');
+    fetch(`/${lang}/destinations/load-more/?offset=${offset}&cursor=${cursor}&city=${citySlug}`, {
         headers: {
             'Accept': 'application/json'
         }
@@ -322,6 +323,7 @@ function loadMoreDestinations() {
         .then(data => {
             if (grid) grid.insertAdjacentHTML('beforeend', data.html);
             btn.dataset.offset = offset + data.count;
+            btn.dataset.cursor = data.next_cursor || '';
 
             const showingText = document.getElementById('showing-text');
             if (showingText) {
@@ -387,6 +389,7 @@ function filterByCity(citySlug, cityName) {
 
             if (loadMoreBtn) {
                 loadMoreBtn.dataset.offset = shown;
+                loadMoreBtn.dataset.cursor = meta?.dataset.nextCursor || '';
                 loadMoreBtn.dataset.total = total;
                 loadMoreBtn.dataset.citySlug = citySlug;
                 loadMoreBtn.style.display = hasMore ? 'inline-block' : 'none';
@@ -437,6 +440,7 @@ function filterByCountry(countrySlug, countryName) {
         .then(res => { if (!res.ok) throw new Error(); return res.text(); })
         .then(html => {
             const doc     = new DOMParser().parseFromString(html, 'text/html');
+            renderFacets(readFacets(doc, 'cards-facets'));
             const meta    = doc.getElementById('cards-meta');
             const total   = parseInt(meta?.dataset.total   || 0);
             const shown   = parseInt(meta?.dataset.shown   || 0);
@@ -456,6 +460,7 @@ function filterByCountry(countrySlug, countryName) {
 
             if (loadMoreBtn) {
                 loadMoreBtn.dataset.offset    = shown;
+                loadMoreBtn.dataset.cursor    = meta?.dataset.nextCursor || '';
                 loadMoreBtn.dataset.total     = total;
                 loadMoreBtn.dataset.citySlug  = '';
                 loadMoreBtn.style.display     = hasMore ? 'inline-block' : 'none';
@@ -485,7 +490,8 @@ function loadMoreByCountry(countrySlug) {
     btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> ' + gettext('Loading...');
     btn.disabled  = true;
 
-    fetch(`/${lang}/filter-destinations/?country=${countrySlug}&offset=${offset}`)
+    const cursor = encodeURIComponent(btn.dataset.cursor || '');
+    fetch(`/${lang}/filter-destinations/?country=${countrySlug}&offset=${offset}&cursor=${cursor}`)
         .then(res => res.text())
         .then(html => {
             const doc     = new DOMParser().parseFromString(html, 'text/html');
@@ -498,6 +504,7 @@ function loadMoreByCountry(countrySlug) {
             });
 
             btn.dataset.offset = shown;
+            btn.dataset.cursor = meta?.dataset.nextCursor || '';
             if (showingText) showingText.textContent = interpolate(gettext('Showing %(shown)s of %(total)s destinations'), {shown: shown, total: total}, true);
             btn.disabled  = false;
             btn.innerHTML = '<i class="fas fa-plus-circle"></i> ' + gettext('Load More Destinations');
@@ -542,7 +549,8 @@ function loadMoreByCity(citySlug) {
     btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> ' + gettext('Loading...');
     btn.disabled = true;
 
-    fetch(`/${lang}/destinations/by-city/?city=${citySlug}&offset=${offset}`)
+    const cursor = encodeURIComponent(btn.dataset.cursor || '');
+    fetch(`/${lang}/destinations/by-city/?city=${citySlug}&offset=${offset}&cursor=${cursor}`)
         .then(res => res.text())
         .then(html => {
             const parser = new DOMParser();
@@ -556,6 +564,7 @@ function loadMoreByCity(citySlug) {
             });
 
             btn.dataset.offset = shown;
+            btn.dataset.cursor = meta?.dataset.nextCursor || '';
             if (showingText) showingText.textContent = interpolate(gettext('Showing %(shown)s of %(total)s destinations'), {shown: shown, total: total}, true);
             btn.disabled = false;
             btn.innerHTML = '<i class="fas fa-plus-circle"></i> ' + gettext('Load More Destinations');
@@ -640,6 +649,7 @@ function filterByQuery(q) {
 
         if (loadMoreBtn) {
             loadMoreBtn.dataset.offset   = shown;
+            loadMoreBtn.dataset.cursor   = data.next_cursor || '';
             loadMoreBtn.dataset.total    = total;
             loadMoreBtn.dataset.citySlug = '';
             loadMoreBtn.dataset.query    = q;
@@ -678,7 +688,8 @@ function loadMoreByQuery(q) {
     btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> ' + gettext('Loading...');
     btn.disabled  = true;
 
-    fetch('/' + lang + '/destinations/load-more/?q=' + encodeURIComponent(q) + '&offset=' + offset, {
+    fetch('/' + lang + '/destinations/load-more/?q=' + encodeURIComponent(q) + '&offset=' + offset +
+          '&cursor=' + encodeURIComponent(btn.dataset.cursor || ''), {
         headers: { 'Accept': 'application/json' }
     })
     .then(res => {
@@ -691,6 +702,7 @@ function loadMoreByQuery(q) {
         }
         const newShown = offset + (data.count || 0);
         btn.dataset.offset = newShown;
+        btn.dataset.cursor = data.next_cursor || '';
 
         if (showingText) showingText.textContent = interpolate(gettext('Showing %(shown)s of %(total)s destinations'), {shown: newShown, total: total}, true);
 
@@ -874,6 +886,33 @@ function equalizeAndInit() {
 function initDestinationsPage() {
     equalizeAndInit();
     restoreViewMode();
+    renderFacets(readFacets(document, 'facet-counts'));
+}
+
+// ============================================================
+// FASET SONLARI (har filtr qiymati yonida — server bitta so'rovda hisoblaydi)
+// ============================================================
+function readFacets(doc, id) {
+    const el = doc.getElementById(id);
+    if (!el) return null;
+    try { return JSON.parse(el.textContent); } catch (e) { return null; }
+}
+
+function renderFacets(facets) {
+    if (!facets) return;
+    document.querySelectorAll('.facet-count').forEach(el => {
+        const count = (facets[el.dataset.facet] || {})[el.dataset.value] || 0;
+        el.textContent = count;
+        el.closest('label')?.classList.toggle('facet-empty', count === 0);
+    });
+
+    const histogram = document.getElementById('price-histogram');
+    if (histogram && Array.isArray(facets.price)) {
+        const peak = Math.max(1, ...facets.price.map(bin => bin.count));
+        histogram.innerHTML = facets.price.map(bin =>
+            `<span style="height:${Math.round(bin.count / peak * 100)}%" title="$${bin.min}–$${bin.max}: ${bin.count}"></span>`
+        ).join('');
+    }
 }
 
 document.addEventListener('DOMContentLoaded', initDestinationsPage);
@@ -908,8 +947,9 @@ function applyFilters() {
     if (_activeQuickFilter === 'popular') params.set('popular', '1');
     else params.delete('popular');
 
-    // Filtrlash boshlanganda offset doim 0 bo'ladi
+    // Filtrlash boshlanganda offset doim 0 bo'ladi (kursor ham yo'q)
     params.set('offset', 0);
+    params.delete('cursor');
 
     if (grid) {
         grid.innerHTML = '<div style="grid-column: 1/-1; text-align: center; padding: 60px;"><i class="fas fa-spinner fa-spin fa-2x" style="color:var(--primary);"></i><p>' + gettext('Searching...') + '</p></div>';
@@ -931,6 +971,7 @@ function applyFilters() {
             const hasMore = meta?.dataset.hasMore === 'true';
 
             if (grid) grid.innerHTML = html;
+            renderFacets(readFacets(doc, 'cards-facets'));
 
             // Natijalar sonini yangilash
             if (countDisplay) countDisplay.textContent = total;
@@ -943,6 +984,7 @@ function applyFilters() {
             // "Load More" tugmasini holati
             if (loadMoreBtn) {
                 loadMoreBtn.dataset.offset = shown;
+                loadMoreBtn.dataset.cursor = meta?.dataset.nextCursor || '';
                 loadMoreBtn.dataset.total = total;
                 loadMoreBtn.style.display = hasMore ? 'inline-block' : 'none';
 
@@ -966,6 +1008,7 @@ function loadMoreWithFilters(currentParams) {
 
     const offset = parseInt(btn.dataset.offset);
     currentParams.set('offset', offset);
+    currentParams.set('cursor', btn.dataset.cursor || '');
 
     btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> ' + gettext('Loading...');
     btn.disabled = true;
@@ -990,6 +1033,7 @@ function loadMoreWithFilters(currentParams) {
             });
 
             btn.dataset.offset = shown;
+            btn.dataset.cursor = meta?.dataset.nextCursor || '';
             if (showingText) showingText.textContent = interpolate(gettext('Showing %(shown)s of %(total)s destinations'), {shown: shown, total: total}, true);
 
             btn.disabled = false;
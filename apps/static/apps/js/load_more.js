@@ -1,7 +1,7 @@
 const loadMoreState = {
-    flash:    { offset: 3, loading: false },
-    featured: { offset: 3, loading: false },
-    trending: { offset: 3, loading: false },
+    flash:    { offset: 3, cursor: '', loading: false },
+    featured: { offset: 3, cursor: '', loading: false },
+    trending: { offset: 3, cursor: '', loading: false },
 };
 
 function loadMore(section) {
@@ -19,16 +19,18 @@ function loadMore(section) {
     btn.disabled  = true;
     btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> ' + gettext('Loading...');
 
-    fetch(`/destinations/load-more/?section=${section}&offset=${state.offset}`, {
+    const cursor = encodeURIComponent(state.cursor);
+    fetch(`/destinations/load-more/?section=${section}&offset=${state.offset}&cursor=${cursor}`, {
         headers: { 'X-Requested-With': 'XMLHttpRequest' }
     })
     .then(res => {
         const hasMore    = res.headers.get('X-Has-More') === 'true';
         const total      = parseInt(res.headers.get('X-Total') || '0');
         const nextOffset = parseInt(res.headers.get('X-Next-Offset') || state.offset);
-        return res.text().then(html => ({ html, hasMore, total, nextOffset }));
+        const nextCursor = res.headers.get('X-Next-Cursor') || '';
+        return res.text().then(html => ({ html, hasMore, total, nextOffset, nextCursor }));
     })
-    .then(({ html, hasMore, total, nextOffset }) => {
+    .then(({ html, hasMore, total, nextOffset, nextCursor }) => {
         const tmp = document.createElement('div');
         tmp.innerHTML = html;
 
@@ -46,6 +48,7 @@ function loadMore(section) {
         if (typeof initFlashTimers === 'function') initFlashTimers();
 
         state.offset  = nextOffset;
+        state.cursor  = nextCursor;
         state.loading = false;
 
         if (showingTxt) {
@@ -531,11 +531,54 @@
         }
     });
 
+    /* ========================================================
+       8. AI MATNI (portret + pitchlar)  —  sahifa shablonli matn bilan
+       darhol ochiladi; Gemini matni Celery'da tayyorlanadi va shu yerdan
+       olinib almashtiriladi. Tayyor bo'lmasa bir necha marta qayta so'raladi.
+    ======================================================== */
+    var AI_TEXT_DELAYS = [1500, 2500, 4000, 6000, 9000];
+
+    function applyAiText(data) {
+        var bubble = document.querySelector(".ai-portrait__bubble[data-ai-pending]");
+        if (data.portrait) {
+            var p = document.getElementById("aiPortraitText");
+            if (p) p.textContent = "\u201C" + data.portrait + "\u201D";
+            var by = document.getElementById("aiPortraitBy");
+            if (by && bubble && bubble.dataset.aiLabel) {
+                by.innerHTML = '<i class="fas fa-wand-magic-sparkles"></i> ';
+                by.appendChild(document.createTextNode(bubble.dataset.aiLabel));
+            }
+        }
+        Object.keys(data.pitches || {}).forEach(function (id) {
+            var el = document.querySelector('.rec-card[data-id="' + id + '"] .rec-card__ai');
+            if (!el) return;
+            el.innerHTML = '<i class="fas fa-wand-magic-sparkles"></i> ';
+            el.appendChild(document.createTextNode("\u201C" + data.pitches[id] + "\u201D"));
+        });
+        if (bubble && data.ready) bubble.removeAttribute("data-ai-pending");
+    }
+
+    function loadAiText(attempt) {
+        if (!document.querySelector("[data-ai-pending]")) return;
+        attempt = attempt || 0;
+        if (attempt >= AI_TEXT_DELAYS.length) return;      // shablonli matn qoladi
+        setTimeout(function () {
+            fetch(recLang() + "recommendation/ai-text/", { credentials: "same-origin" })
+                .then(function (r) { return r.ok ? r.json() : null; })
+                .then(function (data) {
+                    if (data) applyAiText(data);
+                    if (!data || !data.ready) loadAiText(attempt + 1);
+                })
+                .catch(function () { loadAiText(attempt + 1); });
+        }, AI_TEXT_DELAYS[attempt]);
+    }
+
     /* ========================================================
        INIT
     ======================================================== */
     document.addEventListener("DOMContentLoaded", function () {
         initReveal();
         refreshCount();
+        loadAiText();
     });
 })();
\ No newline at end of file
@@ -23,55 +23,122 @@ def expire_flash_sales():
         is_flash_sale=True,
         flash_sale_end__lt=timezone.now()
     )
-    count = expired.count()
+    expired_ids = list(expired.values_list('id', flat=True))
+    count = len(expired_ids)
     if count:
-        expired.update(is_flash_sale=False, discount_percentage=0)
+        Destination.objects.filter(id__in=expired_ids).update(is_flash_sale=False, discount_percentage=0)
+        # .update() signal chiqarmaydi — katalog versiyasi, kartalar va bosh sahifani qo'lda yangilaymiz
+        from apps.utils.cards import bump_card_versions
+        from apps.utils.catalog import bump_catalog_version
+        bump_catalog_version()
+        bump_card_versions(expired_ids)
+        schedule_home_sections()
         logger.info(f"Expired {count} flash sales automatically.")
     return f"Expired {count} flash sales"
 
 
-@shared_task(name="moderate_review_task", bind=True, max_retries=3)
-def moderate_review_task(self, review_id, destination_name):
-    # Circular importlarni oldini olish uchun importlar task ichida
-    from .models import Review, ActionLog, Notification
+# ─────────────────────────────────────────────────────────────────────────────
+# AI MODERATSIYA (MICRO-BATCH)
+# Izoh saqlanganda darhol Gemini'ga bormaymiz: MODERATION_WINDOW soniya ichida
+# kelgan barcha izohlar bitta JSON so'rov bilan tekshiriladi. Navbat — bazaning
+# o'zi (Review.is_pending_moderation — foydalanuvchi yozgan / tahrirlagan izoh),
+# shuning uchun worker qulasa ham izoh yo'qolmaydi. Admin qo'lda yashirgan
+# izoh navbatga tushmaydi.
+# ─────────────────────────────────────────────────────────────────────────────
+MODERATION_WINDOW = 10          # soniya — batch yig'ish oynasi
+MODERATION_BATCH_SIZE = 25      # bitta Gemini so'roviga nechta izoh
+MODERATION_SCHEDULED_KEY = 'moderation:batch:scheduled'
+MODERATION_LOCK_KEY = 'moderation:batch:lock'
+MODERATION_LOCK_TTL = 600       # soniya — har batchdan oldin yangilanadi
+MODERATION_MAX_BATCHES = 20     # bitta task ishga tushishida nechta batch (qolgani keyingi oynaga)
 
-    try:
-        # select_related ishlatish DB so'rovlarini kamaytiradi
-        review = Review.objects.select_related('user', 'destination').get(id=review_id)
 
-        # AI Moderatsiya jarayoni
-        start_time = time.time()
-        is_safe, reason = check_review_with_ai(review.text, destination_name)
-        exec_seconds = time.time() - start_time
+def schedule_review_moderation():
+    """
+    Yangi izoh moderatsiya kutmoqda — oyna uchun BITTA batch task rejalashtiriladi.
+    Oyna ichidagi keyingi izohlar shu taskka "yopishadi" (kesh kaliti band).
+    """
+    from django.core.cache import cache
+
+    if cache.add(MODERATION_SCHEDULED_KEY, 1, MODERATION_WINDOW * 6):
+        moderate_reviews_batch_task.apply_async(countdown=MODERATION_WINDOW)
+
+
+def _pending_reviews():
+    from .models import Review
+
+    return Review.objects.filter(
+        is_pending_moderation=True, user__isnull=False
+    ).select_related('user', 'destination').order_by('id')
+
+
+def _apply_moderation(reviews, verdicts, timings, moderation_type):
+    """
+    AI natijalarini bir nechta bulk so'rov bilan yozadi:
+    Review (bulk_update) → oxirgi ActionLog'lar (bulk_update) → Notification (bulk_create).
 
-        with transaction.atomic():
-            # 1. Review holatini yangilash
-            review.is_visible = is_safe
+    verdicts: {review_id: (is_safe, reason)}, timings: {review_id: soniya}
+    AI javobini kutayotganda tahrirlangan izohlar (matni yuborilganidan farq qiladi)
+    o'tkazib yuboriladi va navbatda qoladi. Qaytaradi: haqiqatan yangilangan izohlar.
+    """
+    from django.db.models import OuterRef, Subquery
+    from .models import Review, ActionLog, Notification
+    from apps.utils.cards import invalidate_cards
+    from apps.utils.catalog import bump_rating_version
+    from apps.utils.ratings import recompute_rating_aggregates
+
+    content_type = ContentType.objects.get_for_model(Review)
+    sent_texts = {r.id: r.text for r in reviews}
+    with transaction.atomic():
+        # 0. Qatorlarni qulflab, yuborilgan matn bilan solishtiramiz — eski matn
+        # hukmi yangi (hali tekshirilmagan) matnni ochib yubormasligi kerak
+        current_texts = dict(
+            Review.objects.select_for_update().filter(id__in=sent_texts).values_list('id', 'text')
+        )
+        reviews = [r for r in reviews if current_texts.get(r.id) == sent_texts[r.id]]
+        if not reviews:
+            return []
+
+        # 1. Review holatlari — bitta UPDATE
+        for review in reviews:
+            review.is_visible = verdicts[review.id][0]
             review.is_verified = True
-            review.save(update_fields=['is_visible', 'is_verified'])
-
-            # 2. Mavjud ActionLog-ni topish va boyitish
-            content_type = ContentType.objects.get_for_model(Review)
-            last_log = ActionLog.objects.filter(
-                content_type=content_type,
-                object_id=str(review.id)
-            ).order_by('-created_at').first()
-
-            if last_log:
-                last_log.extra_info.update({
-                    "is_safe": is_safe,
-                    "ai_reason": reason,
-                    "moderation_type": "AI_CELERY"
-                })
-                last_log.message = f"AI Moderation Result: {reason}"
-                last_log.execution_time = exec_seconds
-                last_log.save(update_fields=['extra_info', 'message', 'execution_time'])
-
-            # 3. Bildirishnoma (Notification) yaratish - MODELINGIZGA MOSLANGAN
-            # Notification maydonlari: recipient, verb, description, level, target
+            review.is_pending_moderation = False
+        Review.objects.bulk_update(reviews, ['is_visible', 'is_verified', 'is_pending_moderation'])
+
+        # bulk_update signal chiqarmaydi — hisoblagich/reyting va reyting versiyasini qo'lda yangilaymiz
+        recompute_rating_aggregates({r.destination_id for r in reviews})
+        invalidate_cards({r.destination_id for r in reviews})
+        transaction.on_commit(bump_rating_version)
+
+        # 2. Har izohning oxirgi ActionLog'ini boyitish
+        latest = ActionLog.objects.filter(
+            content_type=content_type, object_id=OuterRef('object_id')
+        ).order_by('-created_at').values('pk')[:1]
+        logs = list(ActionLog.objects.filter(
+            content_type=content_type,
+            object_id__in=[str(r.id) for r in reviews],
+            pk=Subquery(latest),
+        ))
+        for log in logs:
+            review_id = int(log.object_id)
+            is_safe, reason = verdicts[review_id]
+            log.extra_info.update({
+                "is_safe": is_safe,
+                "ai_reason": reason,
+                "moderation_type": moderation_type,
+            })
+            log.message = f"AI Moderation Result: {reason}"
+            log.execution_time = timings.get(review_id)
+        ActionLog.objects.bulk_update(logs, ['extra_info', 'message', 'execution_time'])
+
+        # 3. Bildirishnomalar — bitta INSERT
+        notifications = []
+        for review in reviews:
+            is_safe, reason = verdicts[review.id]
+            destination_name = review.destination.name
             if is_safe:
-                # ✅ 3.1 Review qabul qilindi
-                Notification.objects.create(
+                notifications.append(Notification(
                     recipient=review.user,
                     verb='review_approved',
                     description=f"'{destination_name}' manziliga yozgan izohingiz muvaffaqiyatli tasdiqlandi. Fikringiz uchun rahmat!",
@@ -88,11 +155,10 @@ def moderate_review_task(self, review_id, destination_name):
                         'action_url': f'/destination-detail/{review.destination.slug}/',
                         'action_label': 'Izohni Ko\'rish',
                     }
-                )
-                logger.info(f"Review {review_id} approved by AI. (Took: {exec_seconds:.2f}s)")
+                ))
+                logger.info(f"Review {review.id} approved by AI. (Took: {timings.get(review.id, 0):.2f}s)")
             else:
-                # ✅ 3.2 Review rad etildi
-                Notification.objects.create(
+                notifications.append(Notification(
                     recipient=review.user,
                     verb='review_rejected',
                     description=f"'{destination_name}' uchun yozgan izohingiz qoidalarga zid deb topildi. Sabab: {reason}",
@@ -110,9 +176,95 @@ def moderate_review_task(self, review_id, destination_name):
                         'action_url': f'/destination-detail/{review.destination.slug}/',
                         'action_label': 'Yangi Izoh Yozish',
                     }
-                )
-                logger.warning(f"Review {review_id} rejected by AI. Reason: {reason}")
+                ))
+                logger.warning(f"Review {review.id} rejected by AI. Reason: {reason}")
+        Notification.objects.bulk_create(notifications)
+    return reviews
+
+
+@shared_task(name="moderate_reviews_batch_task", bind=True, max_retries=3)
+def moderate_reviews_batch_task(self):
+    """
+    Moderatsiya kutayotgan barcha izohlarni MODERATION_BATCH_SIZE'lik bo'laklarda
+    bitta Gemini so'rovi bilan tekshiradi. Faqat AI javobida natijasi chiqmagan
+    izohlar alohida (check_review_with_ai) tekshiriladi.
+    """
+    from django.core.cache import cache
+    from .ai_moderator import check_reviews_batch_with_ai
+
+    # Shu paytdan keyin kelgan izohlar keyingi oynaga tushadi
+    cache.delete(MODERATION_SCHEDULED_KEY)
+    if not cache.add(MODERATION_LOCK_KEY, 1, MODERATION_LOCK_TTL):
+        # Boshqa worker hozir batch ishlayapti — keyingi oynada olinadi
+        schedule_review_moderation()
+        return "Moderation batch already running"
+
+    done = 0
+    has_more = False
+    try:
+        for _batch in range(MODERATION_MAX_BATCHES):
+            # Qulf muddati uzun navbatda tugab qolmasin — aks holda boshqa worker
+            # o'sha izohlarni ikkinchi marta tekshirib, ikki marta xabar yuboradi
+            cache.touch(MODERATION_LOCK_KEY, MODERATION_LOCK_TTL)
+            reviews = list(_pending_reviews()[:MODERATION_BATCH_SIZE])
+            if not reviews:
+                break
+            items = [{'id': r.id, 'text': r.text, 'destination': r.destination.name} for r in reviews]
+
+            start_time = time.time()
+            try:
+                verdicts = check_reviews_batch_with_ai(items)
+            except Exception as exc:
+                logger.error(f"AI batch moderation failed ({len(reviews)} reviews): {exc}")
+                if self.request.retries < self.max_retries:
+                    # Izohlar bazada kutishda qoladi — butun batch keyinroq qayta yuboriladi
+                    raise self.retry(exc=exc, countdown=60)
+                verdicts = {}
+            batch_seconds = (time.time() - start_time) / len(reviews)
+            timings = {review_id: batch_seconds for review_id in verdicts}
+
+            # Fallback: faqat natijasi kelmagan izohlar bittadan
+            failed = [r for r in reviews if r.id not in verdicts]
+            for review in failed:
+                start_time = time.time()
+                verdicts[review.id] = check_review_with_ai(review.text, review.destination.name)
+                timings[review.id] = time.time() - start_time
+
+            applied = _apply_moderation(reviews, verdicts, timings, "AI_BATCH")
+            done += len(applied)
+            logger.info(f"AI batch moderation: {len(applied)}/{len(reviews)} reviews applied, "
+                        f"{len(failed)} per-item fallbacks")
+        else:
+            has_more = True
+    finally:
+        cache.delete(MODERATION_LOCK_KEY)
+
+    if has_more:
+        # Batch chegarasi tugadi — qolgan izohlar keyingi oynada (qulf bo'shagach) olinadi
+        schedule_review_moderation()
+
+    return f"Moderated {done} reviews"
+
 
+@shared_task(name="moderate_review_task", bind=True, max_retries=3)
+def moderate_review_task(self, review_id, destination_name):
+    """
+    Bitta izohni alohida tekshirish (eski navbatdagi xabarlar va qo'lda qayta
+    tekshirish uchun). Yangi izohlar schedule_review_moderation() orqali batchga tushadi.
+    """
+    # Circular importlarni oldini olish uchun importlar task ichida
+    from .models import Review
+
+    try:
+        # select_related ishlatish DB so'rovlarini kamaytiradi
+        review = Review.objects.select_related('user', 'destination').get(id=review_id)
+
+        # AI Moderatsiya jarayoni
+        start_time = time.time()
+        is_safe, reason = check_review_with_ai(review.text, destination_name)
+        exec_seconds = time.time() - start_time
+
+        _apply_moderation([review], {review.id: (is_safe, reason)}, {review.id: exec_seconds}, "AI_CELERY")
         return f"Task completed: Review {review_id} is_safe={is_safe}"
 
     except Review.DoesNotExist:
@@ -708,7 +860,6 @@ def check_price_drop_alerts():
         PriceAlert.objects
         .filter(is_active=True)
         .select_related('user', 'destination', 'destination__city', 'destination__country')
-        .prefetch_related('destination__images')
     )
 
     sent = 0
@@ -730,10 +881,7 @@ def check_price_drop_alerts():
         saved_amount = reference_price - current_price
 
         # Email context
-        image_url = ''
-        first_image = dest.images.first()
-        if first_image and hasattr(first_image, 'image') and first_image.image:
-            image_url = first_image.image.url
+        image_url = dest.cover_card_url
 
         location = dest.location or (dest.city.name if dest.city else '') or ''
 
@@ -770,4 +918,238 @@ def check_price_drop_alerts():
         except Exception as exc:
             logger.error(f"Failed to send price alert to {alert.user.email}: {exc}")
 
-    return f"Price drop alerts: {sent} emails sent"
\ No newline at end of file
+    return f"Price drop alerts: {sent} emails sent"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# TAVSIYA: ITEM-ITEM O'XSHASHLIK INDEKSI
+# Celery beat: har 6 soatda — engine collaborative signalini shu indeksdan oladi
+# ─────────────────────────────────────────────────────────────────────────────
+@shared_task(name="rebuild_item_similarity_index")
+def rebuild_item_similarity_index():
+    """
+    Wishlist / Review(>=4) / Booking / 👍 feedback'dan co-occurrence indeksini
+    qayta quradi va keshga yozadi.
+    """
+    from apps.recommendations.collab import build_item_index, publish_item_index
+
+    start_time = time.time()
+    index = build_item_index()
+    publish_item_index(index)
+    logger.info(f"Item similarity index rebuilt: {len(index)} items ({time.time() - start_time:.2f}s)")
+    return f"Item index: {len(index)} items"
+
+
+@shared_task(name="refresh_recommendation_bundle")
+def refresh_recommendation_bundle(user_id):
+    """
+    Eskirgan tavsiya bundle'ini fonda qayta quradi (stale-while-revalidate).
+    user_id=None — anonim foydalanuvchilar uchun umumiy bundle.
+    """
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache
+    from apps.models import User
+    from apps.recommendations.bundle import refresh_bundle
+
+    owner = user_id if user_id is not None else 'anon'
+    try:
+        user = User.objects.get(pk=user_id) if user_id is not None else AnonymousUser()
+        refresh_bundle(user)
+    except User.DoesNotExist:
+        logger.warning(f"Recommendation bundle: user {user_id} not found")
+    finally:
+        cache.delete(f'recsys:bundle:refresh:{owner}')
+
+
+@shared_task(name="enrich_recommendation_page")
+def enrich_recommendation_page(user_id):
+    """
+    Tavsiya sahifasi uchun Gemini portreti + Top Pick pitchlarini oldindan
+    yozib keshni isitadi. Sahifa shablonli matn bilan darhol ochiladi,
+    front-end tayyor matnni `recommendation/ai-text/` dan oladi.
+    """
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache
+    from apps.models import User
+    from apps.recommendations import ai
+    from apps.recommendations.bundle import get_bundle
+
+    owner = user_id if user_id is not None else 'anon'
+    start_time = time.time()
+    try:
+        user = User.objects.get(pk=user_id) if user_id is not None else AnonymousUser()
+        bundle = get_bundle(user)
+        done = ai.enrich(bundle['taste'], bundle['top_picks'])
+        logger.info(f"Recommendation AI text for {owner}: ok={done} ({time.time() - start_time:.2f}s)")
+    except User.DoesNotExist:
+        logger.warning(f"Recommendation AI text: user {user_id} not found")
+    finally:
+        cache.delete(f'recai:enrich:lock:{owner}')
+
+
+@shared_task(name="pregenerate_recommendation_pitches")
+def pregenerate_recommendation_pitches():
+    """
+    Tungi job: eng ko'p uchraydigan ta'm guruhlari × top destinationlar uchun
+    Gemini pitchlarini oldindan yozadi (keshda borlari qayta so'ralmaydi).
+    """
+    from apps.recommendations.ai import pregenerate_pitches
+
+    start_time = time.time()
+    count = pregenerate_pitches()
+    logger.info(f"Recommendation pitches pre-generated: {count} ({time.time() - start_time:.2f}s)")
+    return f"Pitches: {count}"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# TAVSIYA: "O'XSHASH JOYLAR" (ANN) INDEKSI
+# Celery beat: har kuni to'liq qayta quriladi; destination o'zgarsa — faqat
+# o'sha qatorlar yangilanadi (signals.py orqali)
+# ─────────────────────────────────────────────────────────────────────────────
+@shared_task(name="rebuild_similar_destinations_index", bind=True, max_retries=None)
+def rebuild_similar_destinations_index(self):
+    """
+    Barcha destinationlar uchun embedding + LSH indeksini qayta quradi.
+    Inkremental yangilash bilan bir xil qulf ostida — bir-birining natijasini ezmaydi.
+    """
+    from django.core.cache import cache
+    from apps.recommendations.similar import (LOCK_KEY, LOCK_TTL, build_similar_index,
+                                              mark_similar_updates_applied, pending_similar_updates,
+                                              publish_similar_index)
+
+    if not cache.add(LOCK_KEY, 1, LOCK_TTL):
+        raise self.retry(countdown=10)
+    start_time = time.time()
+    try:
+        last = pending_similar_updates()[1]         # qurilishdan oldingi navbat — to'liq indeksga kiradi
+        index = build_similar_index()
+        publish_similar_index(index)
+        mark_similar_updates_applied(last)
+    finally:
+        cache.delete(LOCK_KEY)
+    logger.info(f"Similar destinations index rebuilt: {len(index)} items ({time.time() - start_time:.2f}s)")
+    return f"Similar index: {len(index)} items"
+
+
+@shared_task(name="update_similar_destinations_index", bind=True, max_retries=None)
+def update_similar_destinations_index(self, destination_ids, seq=None):
+    """
+    O'zgargan / o'chirilgan destinationlar qatorlarini indeksda yangilaydi.
+    Id'lar avval navbatga yoziladi; qulfni olgan worker navbatdagi HAMMASINI
+    bitta yangilashda qo'llaydi. Qulf band bo'lsa task qayta uriniladi va
+    uning navbati allaqachon qo'llangan bo'lsa darhol tugaydi — yangilanish yo'qolmaydi.
+    """
+    from django.core.cache import cache
+    from apps.recommendations.similar import (LOCK_KEY, LOCK_TTL, applied_similar_seq, build_similar_index,
+                                              get_similar_index, mark_similar_updates_applied,
+                                              pending_similar_updates, publish_similar_index,
+                                              queue_similar_update, update_similar_index)
+
+    if seq is None:
+        seq = queue_similar_update(destination_ids)
+    if applied_similar_seq() >= seq:
+        return f"Similar index: #{seq} already applied"
+    if not cache.add(LOCK_KEY, 1, LOCK_TTL):
+        raise self.retry(kwargs={'destination_ids': destination_ids, 'seq': seq}, countdown=5)
+    try:
+        dest_ids, last = pending_similar_updates()
+        index = get_similar_index()
+        if index is None:
+            publish_similar_index(build_similar_index())
+        elif dest_ids:
+            publish_similar_index(*update_similar_index(index, dest_ids))   # faqat delta yoziladi
+        mark_similar_updates_applied(last)
+    finally:
+        cache.delete(LOCK_KEY)
+    if last < seq:                                  # oldingi raqam hali yozilmagan — keyinroq yana
+        raise self.retry(kwargs={'destination_ids': destination_ids, 'seq': seq}, countdown=5)
+    return f"Similar index: {len(dest_ids)} updated"
+
+
+@shared_task(name="refresh_destination_search_index")
+def refresh_destination_search_index(destination_ids=None):
+    """Qidiruv indeksida berilgan destinationlar qatorlarini qayta yozadi (None — barchasi)."""
+    from apps.utils.search import refresh_search_index
+
+    count = refresh_search_index(destination_ids)
+    return f"Search index: {count} refreshed"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BOSH SAHIFA BO'LIMLARI (apps/utils/homepage.py)
+# ─────────────────────────────────────────────────────────────────────────────
+HOME_SECTIONS_DELAY = 5     # soniya — ketma-ket o'zgarishlar bitta qayta hisoblashga yig'iladi
+
+
+@shared_task(name="precompute_home_sections")
+def precompute_home_sections():
+    """Bosh sahifa bo'limlari tarkibini joriy katalog versiyasi uchun Redis'ga yozadi."""
+    from django.core.cache import cache
+    from apps.utils.homepage import SCHEDULED_KEY, refresh_home_sections
+
+    cache.delete(SCHEDULED_KEY)
+    sections = refresh_home_sections()
+    totals = ', '.join(f"{name}={sections[name]['total']}" for name in ('flash', 'trending', 'featured'))
+    return f"Home sections: {totals}"
+
+
+def schedule_home_sections():
+    """Katalog o'zgardi — bo'limlarni qayta hisoblash uchun BITTA task rejalashtiriladi."""
+    from django.core.cache import cache
+    from apps.utils.homepage import SCHEDULED_KEY
+
+    if cache.add(SCHEDULED_KEY, 1, HOME_SECTIONS_DELAY * 12):
+        precompute_home_sections.apply_async(countdown=HOME_SECTIONS_DELAY)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# YUKLANGAN RASMLAR (ImageBaseModel — apps/utils/uplode_image.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+@shared_task(name="process_uploaded_image")
+def process_uploaded_image(model_label, pk):
+    """
+    Yuklangan rasmni WebP ga o'tkazadi va card / thumb / hero variantlarini yozadi.
+    Tugagach image_variants=True bilan save() — signallar (muqova rasmi, kartalar keshi) ishlaydi.
+    Asl fayl faqat yangi nom commit bo'lgandan keyin o'chiriladi.
+    """
+    from django.apps import apps as django_apps
+    from apps.utils.uplode_image import IMAGE_VARIANTS, process_stored_image, variant_name
+
+    model = django_apps.get_model(model_label)
+    obj = model.objects.filter(pk=pk).only('pk', 'image', 'image_processing').first()
+    if obj is None or not obj.image_processing or not obj.image:
+        return f"{model_label} #{pk}: skip"
+
+    start_time = time.time()
+    storage, source = obj.image.storage, obj.image.name
+    try:
+        new_name = process_stored_image(storage, source)
+    except Exception as exc:
+        # Buzilgan fayl — asl holicha qoladi; image_variants=False, ya'ni *_url asl faylni beradi
+        logger.error(f"Image processing failed for {model_label} #{pk} ({source}): {exc}")
+        model.objects.filter(pk=pk, image=source).update(image_processing=False, image_variants=False)
+        if model_label == 'apps.DestinationImage':
+            # update() signal bermaydi — muqova endi shu (asl) rasmni ham hisobga olishi kerak
+            from apps.models import Destination
+            Destination.objects.filter(images__pk=pk).refresh_cover_images()
+        return f"{model_label} #{pk}: failed"
+
+    outputs = (new_name, *(variant_name(new_name, v) for v in IMAGE_VARIANTS))
+
+    with transaction.atomic():
+        obj = model.objects.select_for_update().filter(pk=pk).first()
+        if obj is None or obj.image.name != source:
+            # Ishlov paytida o'chirildi yoki yangi rasm yuklandi — natija ham, eski asl fayl ham kerak emas
+            for name in {*outputs, source}:
+                storage.delete(name)
+            return f"{model_label} #{pk}: stale"
+        obj.image.name = new_name
+        obj.image_processing = False
+        obj.image_variants = True
+        obj.save(update_fields=['image', 'image_processing', 'image_variants'])
+        if new_name != source:
+            # Rollback bo'lsa qator hali asl faylga ishora qiladi — o'chirish commitdan keyin
+            transaction.on_commit(lambda: storage.delete(source))
+    logger.info(f"Image processed: {model_label} #{pk} → {new_name} ({time.time() - start_time:.2f}s)")
+    return f"{model_label} #{pk}: {new_name}"
@@ -0,0 +1,123 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.models import City, Country, Destination, Review, Tag, User
+from apps.models.destinations import DestinationImage
+from apps.utils.moderation import prefilter_review
+from apps.utils.ratings import recompute_rating_aggregates
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DestinationCardProjectionTests(TestCase):
+    """
+    Lenta kartalari (load more, shahar bo'yicha, filtrlar) Destination.objects.for_cards()
+    proyeksiyasidan yuklanadi: so'rovlar soni va o'qiladigan ustunlar izohlar soniga bog'liq emas.
+    """
+    CARDS = 6
+    # Kartada ko'rsatilmaydigan og'ir ustunlar — proyeksiyada bo'lmasligi kerak
+    HEAVY_COLUMNS = ('"description', '"why_visit', '"whats_included', '"restrictions', '"additional_info')
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name='Uzbekistan', code='UZ', phone_code='+998')
+        cls.city = City.objects.create(name='Samarkand', country=country)
+        tags = [Tag.objects.create(name=f'tag{i}') for i in range(3)]
+        cls.destinations = []
+        for i in range(cls.CARDS + 2):
+            destination = Destination.objects.create(
+                name=f'Destination {i}', city=cls.city, country=country, price=100 + i,
+                description='x' * 5000, why_visit='x' * 5000,
+            )
+            destination.tags.set(tags)
+            DestinationImage.objects.bulk_create(
+                DestinationImage(destination=destination, image=f'destinations/{i}-{n}.webp', order=n)
+                for n in range(3)
+            )
+            cls.destinations.append(destination)
+        cls.users = User.objects.bulk_create(User(username=f'reviewer{i}', email=f'r{i}@x.com') for i in range(40))
+
+    def setUp(self):
+        cache.clear()
+
+    def add_reviews(self, per_destination):
+        # Izohlar bulk yoziladi (signalsiz, importer kabi) — agregatlar keyin bitta UPDATE bilan
+        Review.objects.all().delete()
+        Review.objects.bulk_create(
+            Review(destination=destination, user=user, rating=4, text='Juda uzun izoh matni. ' * 500)
+            for destination in self.destinations for user in self.users[:per_destination]
+        )
+        recompute_rating_aggregates([d.pk for d in self.destinations])
+
+    def fetch(self, url, params):
+        # Har safar kartalar va jami son keshi bo'sh — eng og'ir holat o'lchanadi
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries.captured_queries]
+
+    def assert_projection(self, url, params, expected_queries):
+        self.add_reviews(1)
+        small, small_queries = self.fetch(url, params)
+        self.add_reviews(40)
+        large, large_queries = self.fetch(url, params)
+
+        self.assertEqual(len(small_queries), expected_queries)
+        self.assertEqual(len(large_queries), expected_queries)
+        for sql in large_queries:
+            self.assertNotIn('"apps_review"', sql)
+            for column in self.HEAVY_COLUMNS:
+                self.assertNotIn(f'"apps_destination".{column}', sql)
+        # Javob hajmi faqat reyting / izohlar soni raqamlariga qarab farq qiladi
+        self.assertLess(abs(len(large.content) - len(small.content)), 20 * self.CARDS)
+        self.assertContains(large, '(40 reviews)')
+
+    def test_load_more_cards(self):
+        # jami son, sahifa, rasmlar, teglar
+        self.assert_projection(reverse('load_more_destinations'), {'section': 'all'}, 4)
+
+    def test_destinations_by_city_cards(self):
+        self.assert_projection(reverse('destinations_by_city'), {'city': self.city.slug}, 4)
+
+    def test_cached_cards_skip_relations(self):
+        self.add_reviews(40)
+        url = reverse('load_more_destinations')
+        self.client.get(url, {'section': 'all'})
+        with self.assertNumQueries(1):
+            # jami son va kartalar keshda — faqat sahifa so'rovi
+            self.client.get(url, {'section': 'all'})
+
+
+class PrefilterReviewTests(SimpleTestCase):
+    """
+    Lokal pre-filter faqat aniq holatlarni hal qiladi: noaniq so'z yoki g'alati
+    ko'ringan matn None qaytaradi (AI'ga boradi).
+    """
+
+    def test_rejects_unambiguous_profanity(self):
+        for text in ['fuck this place', 'sh1t service', 'f.u.c.k', 'пиздец полный', "qo'taq joy ekan"]:
+            with self.subTest(text=text):
+                self.assertEqual(prefilter_review(text)[0], False)
+
+    def test_rejects_link_spam(self):
+        self.assertEqual(prefilter_review('buy now www.x.com www.y.ru')[0], False)
+
+    def test_leaves_ambiguous_text_to_ai(self):
+        for text in [
+            'Dick and I loved it',
+            'idiot-proof booking, great views',
+            'sikayat qildim, lekin javob berishmadi',
+            'Strč prst skrz krk',
+            'qweqweqweqwe',
+            '2015-yilda 5-star mehmonxona',
+        ]:
+            with self.subTest(text=text):
+                self.assertIsNone(prefilter_review(text))
+
+    def test_approves_short_positive_text(self):
+        self.assertEqual(prefilter_review("Zo'r joy"), (True, 'Auto Approved'))
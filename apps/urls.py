@@ -16,7 +16,7 @@ from apps.views import (AboutTemplateView, ActivateAccountView,
                         CancelBookingView,
                         PasswordResetConfirmView, PrivacyPolicyTemplateView,
                         ProfileSettingsTemplateView,
-                        RecommendationTemplateView, RecommendationAiSearchView,
+                        RecommendationTemplateView, RecommendationAiSearchView, RecommendationAiTextView,
                         RecommendationFeedbackView, RecommendationQuizView,
                         RegisterCreateView,
                         TelegramChannelTemplateView,
@@ -38,6 +38,7 @@ urlpatterns = [
 
     path('recommendation/', RecommendationTemplateView.as_view(), name='recommendation_page'),
     path('recommendation/ai-search/', RecommendationAiSearchView.as_view(), name='recommendation_ai_search'),
+    path('recommendation/ai-text/', RecommendationAiTextView.as_view(), name='recommendation_ai_text'),
     path('recommendation/feedback/', RecommendationFeedbackView.as_view(), name='recommendation_feedback'),
     path('recommendation/quiz/', RecommendationQuizView.as_view(), name='recommendation_quiz'),
     path('about/', AboutTemplateView.as_view(), name='about_page'),
@@ -0,0 +1,287 @@
+"""
+Header qidiruvi uchun process-ichidagi autocomplete indeksi.
+
+Avval har tugma bosilishida GlobalSearchView to'rtta so'rov yuborardi
+(region, davlat + annotate, shahar + annotate, destination + prefetch). Endi:
+
+  • region / davlat / shahar / destination nomlari (barcha tillarda) so'zlarga
+    bo'linib, har tur uchun saralangan massivda saqlanadi — prefiks bisect bilan
+    topiladi, katalog o'sishi bilan qidiruv vaqti deyarli o'zgarmaydi;
+  • sonlar (davlatlar / shaharlar / destinationlar), slug, narx, reyting va
+    rasm yo'llari indeks qurilayotganda bir marta hisoblanadi — javob uchun
+    bazaga murojaat yo'q;
+  • indeks katalog versiyasiga bog'langan (gazetteer kabi) — katalog o'zgarsa
+    keyingi so'rovda qayta quriladi; faqat izohlar o'zgarganda (reyting
+    versiyasi) destinationlarning reyting va ommabopligi yangilanadi; worker
+    ishga tushganda `warm_up()` bilan oldindan yuklanadi (root/wsgi.py);
+  • tayyor javob (lang, prefiks) bo'yicha qisqa muddat keshlanadi.
+"""
+import bisect
+import copy
+import hashlib
+import logging
+import threading
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models import Count, Q
+
+from apps.models import Country, Destination
+from apps.models.categories import City, Region
+from apps.recommendations.gazetteer import TOKEN_RE
+from apps.utils.catalog import catalog_versions, rating_version
+from apps.utils.search import LANGUAGES, fold, search_terms
+from apps.utils.uplode_image import variant_url
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_KEY = 'autocomplete:{}.{}:{}:{}'   # katalog, reyting versiyasi, til, normal prefiks hashi
+RESPONSE_TTL = 60
+LIMITS = {'region': 3, 'country': 3, 'city': 4, 'destination': 6}
+
+# moslik darajasi: nomning o'zi > nom prefiks bilan boshlanadi > nomdagi so'z > joy/shahar/davlat so'zi
+NAME_EXACT, NAME_START, NAME_WORD, PLACE_WORD = 0, 1, 2, 3
+
+_lock = threading.Lock()
+_current = None
+
+
+def _localized(row, field):
+    """{til: qiymat} — tarjima bo'sh bo'lsa inglizcha / asosiy maydon olinadi."""
+    fallback = row.get(f'{field}_en') or row.get(field) or ''
+    return {lang: row.get(f'{field}_{lang}') or fallback for lang in LANGUAGES}
+
+
+def _fields(*names):
+    return [f'{name}_{lang}' for name in names for lang in LANGUAGES]
+
+
+def _words(text):
+    return TOKEN_RE.findall(fold(text))
+
+
+def _image_url(path):
+    return default_storage.url(path) if path else ''
+
+
+class Entry:
+    """Indeksdagi bitta yozuv: javob uchun kerakli hamma narsa oldindan tayyor."""
+
+    __slots__ = ('kind', 'names', 'starts', 'words', 'popularity', 'data')
+
+    def __init__(self, kind, names, data, places=(), popularity=0):
+        self.kind = kind
+        self.names = names
+        self.data = data
+        self.popularity = popularity
+        self.starts = frozenset(' '.join(_words(name)) for name in names.values() if name)
+        name_words = {w for name in self.starts for w in name.split()}
+        place_words = {w for text in places if text for w in _words(text)} - name_words
+        self.words = {**{w: PLACE_WORD for w in place_words}, **{w: NAME_WORD for w in name_words}}
+
+    def level(self, text, terms):
+        """Moslik darajasi yoki None (har bir so'z biror so'zning prefiksi bo'lishi shart)."""
+        best = PLACE_WORD
+        for term in terms:
+            hits = [lvl for word, lvl in self.words.items() if word.startswith(term)]
+            if not hits:
+                return None
+            best = min(best, min(hits))
+        if text in self.starts:
+            return NAME_EXACT
+        if any(name.startswith(text) for name in self.starts):
+            return NAME_START
+        return best
+
+
+class AutocompleteIndex:
+    def __init__(self, version, entries, ratings=None):
+        self.version = version
+        self.ratings = ratings
+        self.entries = entries
+        self.keys = {}                              # tur -> saralangan [(so'z, yozuv raqami)]
+        for kind in LIMITS:
+            self.keys[kind] = sorted(
+                (word, idx) for idx, entry in enumerate(entries) if entry.kind == kind for word in entry.words)
+        self.words = {kind: [word for word, _ in keys] for kind, keys in self.keys.items()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _candidates(self, kind, term):
+        words, keys = self.words[kind], self.keys[kind]
+        found = set()
+        for i in range(bisect.bisect_left(words, term), len(words)):
+            if not words[i].startswith(term):
+                break
+            found.add(keys[i][1])
+        return found
+
+    def search(self, q, lang):
+        """{tur: [yozuv, ...]} — har tur uchun LIMITS tadan, moslik va ommaboplik tartibida."""
+        terms = search_terms(q)
+        if not terms:
+            return {kind: [] for kind in LIMITS}
+        text = ' '.join(terms)
+        pivot = max(terms, key=len)                 # eng uzun so'z — eng kam nomzod
+        out = {}
+        for kind, limit in LIMITS.items():
+            scored = []
+            for idx in self._candidates(kind, pivot):
+                entry = self.entries[idx]
+                level = entry.level(text, terms)
+                if level is not None:
+                    scored.append((level, -entry.popularity, entry.names[lang].casefold(), idx))
+            scored.sort()
+            out[kind] = [self.entries[idx] for *_, idx in scored[:limit]]
+        return out
+
+    def with_ratings(self, ratings):
+        """Shu indeks, lekin destinationlar reytingi va ommabopligi bazadan yangilangan."""
+        index = copy.copy(self)
+        index.ratings = ratings
+        fresh = {slug: (avg, count) for slug, avg, count in Destination.objects.values_list(
+            'slug', 'avg_rating', 'visible_reviews_count')}
+        entries = []
+        for entry in self.entries:
+            if entry.kind == 'destination' and entry.data['slug'] in fresh:
+                avg, count = fresh[entry.data['slug']]
+                rating = round(avg, 1)
+                if (rating, count) != (entry.data['rating'], entry.popularity):
+                    entry = copy.copy(entry)    # so'zlar o'zgarmaydi — kalitlar umumiy qoladi
+                    entry.data = {**entry.data, 'rating': rating}
+                    entry.popularity = count
+            entries.append(entry)
+        index.entries = entries
+        return index
+
+    @classmethod
+    def build(cls, version, ratings=None):
+        entries = []
+
+        regions = Region.objects.annotate(
+            country_count=Count('countries', filter=Q(countries__is_active=True))
+        ).values('slug', 'name', 'country_count', *_fields('name'))
+        for row in regions:
+            entries.append(Entry('region', _localized(row, 'name'),
+                                 {'slug': row['slug'], 'count': row['country_count']},
+                                 popularity=row['country_count']))
+
+        countries = Country.objects.filter(is_active=True).annotate(city_count=Count('cities')).values(
+            'slug', 'code', 'flag', 'name', 'region__slug', 'region__name', 'city_count',
+            *_fields('name', 'region__name'))
+        for row in countries:
+            entries.append(Entry('country', _localized(row, 'name'), {
+                'slug': row['slug'], 'code': row['code'], 'flag': row['flag'] or '',
+                'region_slug': row['region__slug'] or '',
+                'region': _localized(row, 'region__name') if row['region__slug'] else None,
+                'count': row['city_count'],
+            }, popularity=row['city_count']))
+
+        cities = City.objects.annotate(dest_count=Count('destinations')).values(
+            'slug', 'image', 'name', 'country__code', 'country__name', 'country__region__slug', 'dest_count',
+            *_fields('name', 'country__name'))
+        for row in cities:
+            entries.append(Entry('city', _localized(row, 'name'), {
+                'slug': row['slug'], 'image': _image_url(row['image']),
+                'country_code': row['country__code'] or '',
+                'region_slug': row['country__region__slug'] or '',
+                'country': _localized(row, 'country__name') if row['country__code'] else None,
+                'count': row['dest_count'],
+            }, popularity=row['dest_count']))
+
+        destinations = Destination.objects.order_by().values(
+            'slug', 'name', 'location', 'price', 'discount_percentage', 'visible_reviews_count',
+            'avg_rating', 'cover_image', 'cover_variants', 'city__name',
+            *_fields('name', 'location', 'city__name', 'country__name'))
+        for row in destinations:
+            locations = _localized(row, 'location')
+            cities_ = _localized(row, 'city__name')
+            pct = min(100, max(0, row['discount_percentage']))
+            entries.append(Entry('destination', _localized(row, 'name'), {
+                'slug': row['slug'],
+                'subtitle': {lang: locations[lang] or cities_[lang] for lang in LANGUAGES},
+                'image': (variant_url(row['cover_image'], 'thumb') if row['cover_variants']
+                          else _image_url(row['cover_image'])),
+                'price': int(row['price'] - row['price'] * pct / 100),
+                'rating': round(row['avg_rating'], 1),
+            }, places=[*locations.values(), *cities_.values(), *_localized(row, 'country__name').values()],
+                popularity=row['visible_reviews_count']))
+
+        return cls(version, entries, ratings)
+
+
+def get_autocomplete_index(version=None, ratings=None):
+    """Joriy katalog versiyasi uchun indeks (kerak bo'lsa qayta quriladi)."""
+    global _current
+    if version is None:
+        version, ratings = catalog_versions()
+    elif ratings is None:
+        ratings = rating_version()
+    index = _current
+    if index is not None and index.version == version and index.ratings == ratings:
+        return index
+    with _lock:
+        index = _current
+        if index is None or index.version != version:
+            index = AutocompleteIndex.build(version, ratings)
+        elif index.ratings != ratings:
+            index = index.with_ratings(ratings)   # faqat izohlar o'zgargan
+        _current = index
+    return index
+
+
+def warm_up():
+    """Worker ishga tushganda indeksni fonda quradi — birinchi foydalanuvchi kutmasin."""
+    def run():
+        try:
+            get_autocomplete_index()
+        except Exception as e:
+            logger.warning(f"Autocomplete indeksini oldindan qurib bo'lmadi: {e}")
+
+    threading.Thread(target=run, name='autocomplete-warmup', daemon=True).start()
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# JAVOB
+# ───────────────────────────────────────────────────────────────────────────
+
+def _result(entry, lang):
+    data = entry.data
+    title = entry.names[lang]
+    if entry.kind == 'region':
+        return {'type': 'region', 'slug': data['slug'], 'title': title, 'subtitle': '', 'image': '',
+                'count': data['count'], 'count_label': 'countries', 'url': f'/{lang}/destinations/'}
+    if entry.kind == 'country':
+        region = data['region'][lang] if data['region'] else ''
+        return {'type': 'country', 'slug': data['slug'], 'code': data['code'],
+                'region_slug': data['region_slug'], 'title': title,
+                'subtitle': data['flag'] + (' ' + region if region else ''), 'image': '',
+                'count': data['count'], 'count_label': 'cities',
+                'url': f"/{lang}/destinations/?country={data['slug']}&country_name={title}"}
+    if entry.kind == 'city':
+        return {'type': 'city', 'slug': data['slug'], 'country_code': data['country_code'],
+                'region_slug': data['region_slug'], 'title': title,
+                'subtitle': data['country'][lang] if data['country'] else '', 'image': data['image'],
+                'count': data['count'], 'count_label': 'destinations',
+                'url': f"/{lang}/destinations/?city={data['slug']}&city_name={title}"}
+    return {'type': 'destination', 'slug': data['slug'], 'title': title, 'subtitle': data['subtitle'][lang],
+            'image': data['image'], 'price': data['price'], 'rating': data['rating'], 'count': None,
+            'url': f"/{lang}/destination-detail/{data['slug']}/"}
+
+
+def autocomplete(q, lang):
+    """
+    Header qidiruvi natijalari (rasm yo'llari nisbiy — view absolyut qiladi).
+    Javob (katalog va reyting versiyasi, til, prefiks) bo'yicha keshlanadi.
+    """
+    lang = lang if lang in LANGUAGES else LANGUAGES[0]
+    version, ratings = catalog_versions()
+    prefix = ' '.join(search_terms(q)) or fold(q)
+    key = RESPONSE_KEY.format(version, ratings, lang, hashlib.md5(prefix.encode('utf-8')).hexdigest())
+    results = cache.get(key)
+    if results is None:
+        found = get_autocomplete_index(version, ratings).search(q, lang)
+        results = [_result(entry, lang) for kind in LIMITS for entry in found[kind]]
+        cache.set(key, results, RESPONSE_TTL)
+    return results
@@ -0,0 +1,130 @@
+"""
+Destination kartalari (HTML bo'laklari) keshi.
+
+Bitta karta lentalarning hammasida (filtrlar, "load more", shahar bo'yicha,
+bosh sahifa bo'limlari) bir xil ko'rinadi, lekin har so'rovda qayta render
+qilinardi. Endi:
+
+  • karta (variant, til, compare, destination, destination versiyasi) bo'yicha
+    bir marta render qilinib keshlanadi; sahifadagi barcha kartalar bitta
+    get_many bilan olinadi, faqat topilmaganlari render qilinadi (teg va
+    rasmlar ham faqat shular uchun prefetch qilinadi);
+  • destination versiyasi — Destination / rasm / izoh / teg / shahar
+    o'zgarganda signallar orqali (commitdan keyin) oshiriladi, eski bo'laklar
+    o'z-o'zidan ishlatilmay qoladi;
+  • foydalanuvchiga xos qism — wishlist yuragi — keshlangan HTML'ga
+    keyin qo'yiladi (`_mark_wishlisted`), shuning uchun bo'lak hammaga umumiy.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+from apps.context_processors import wishlist_slugs
+from apps.models.destinations import card_prefetches
+
+CARD_KEY = 'card:{}:{}:{}:{}:{}'        # variant, til, compare, pk, destination versiyasi
+VERSION_KEY = 'card:version:{}'         # pk
+CARD_TTL = 60 * 60 * 24
+
+TEMPLATES = {
+    'flash': 'apps/partials/_flash_card.html',
+    'featured': 'apps/partials/_featured_card.html',
+    'trending': 'apps/partials/_trending_card.html',
+    'default': 'apps/partials/_destination_card.html',
+}
+
+
+def card_variant(destination, now):
+    """Umumiy lentada qaysi karta ko'rinishi ishlatiladi."""
+    if destination.is_flash_sale and destination.flash_sale_end and destination.flash_sale_end > now:
+        return 'flash'
+    if destination.is_featured:
+        return 'featured'
+    if destination.is_trending:
+        return 'trending'
+    return 'default'
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# VERSIYALAR
+# ───────────────────────────────────────────────────────────────────────────
+
+def _versions(ids):
+    keys = {pk: VERSION_KEY.format(pk) for pk in ids}
+    found = cache.get_many(keys.values())
+    missing = [key for key in keys.values() if key not in found]
+    if missing:
+        # Versiya keshdan tushib qolgan bo'lsa 0 dan boshlanmaydi — aks holda eski
+        # bo'lak bilan to'qnashishi mumkin (catalog_version'dagi kabi)
+        seed = time.time_ns()
+        for key in missing:
+            cache.add(key, seed, timeout=None)
+        found.update(cache.get_many(missing))
+    return {pk: found.get(key, 0) for pk, key in keys.items()}
+
+
+def bump_card_versions(ids):
+    """Berilgan destinationlar kartalari eskirgan deb belgilanadi."""
+    version = time.time_ns()
+    cache.set_many({VERSION_KEY.format(pk): version for pk in ids}, timeout=None)
+
+
+def invalidate_cards(ids):
+    """Signallar va bulk yozuvlar uchun: versiya commitdan KEYIN oshiriladi."""
+    ids = {pk for pk in ids if pk}
+    if ids:
+        transaction.on_commit(lambda: bump_card_versions(ids))
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# RENDER
+# ───────────────────────────────────────────────────────────────────────────
+
+def _mark_wishlisted(html, slug):
+    # Bo'lak foydalanuvchisiz render qilingan — yurak bo'sh; shu kartada to'ldiramiz
+    html = html.replace(f'class="wishlist-btn" data-slug="{slug}"',
+                        f'class="wishlist-btn wishlisted" data-slug="{slug}"', 1)
+    return html.replace('<i class="far fa-heart">', '<i class="fas fa-heart">', 1)
+
+
+def render_cards(destinations, request, variant=None, show_compare=False):
+    """
+    Kartalar HTML ro'yxati (destinations tartibida).
+    variant=None — har destination o'z ko'rinishida (card_variant), aks holda
+    hammasi shu ko'rinishda (bo'limlar: flash / featured / trending).
+    """
+    destinations = list(destinations)
+    if not destinations:
+        return []
+    now = timezone.now()
+    lang = get_language()
+    versions = _versions(d.pk for d in destinations)
+
+    keys = []
+    for d in destinations:
+        name = variant or card_variant(d, now)
+        keys.append((name, CARD_KEY.format(name, lang, int(show_compare), d.pk, versions[d.pk])))
+    cached = cache.get_many([key for _, key in keys])
+
+    missing = [(d, name, key) for d, (name, key) in zip(destinations, keys) if key not in cached]
+    if missing:
+        prefetch_related_objects([d for d, _, _ in missing], *card_prefetches())
+        fresh = {key: render_to_string(TEMPLATES[name], {'destination': d, 'show_compare': show_compare})
+                 for d, name, key in missing}
+        cache.set_many(fresh, CARD_TTL)
+        cached.update(fresh)
+
+    wishlist = wishlist_slugs(request)['user_wishlist_slugs']
+    cards = []
+    for d, (_, key) in zip(destinations, keys):
+        html = cached[key]
+        if d.slug in wishlist:
+            html = _mark_wishlisted(html, d.slug)
+        cards.append(mark_safe(html))
+    return cards
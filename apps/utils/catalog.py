@@ -0,0 +1,74 @@
+"""
+Katalog versiyasi — Destination / Tag / City ... o'zgarganda oshadigan hisoblagich.
+
+Versiya Redis keshida turadi, shuning uchun barcha gunicorn va celery
+workerlari bitta qiymatni ko'radi. Katalogdan qurilgan process-ichidagi
+nusxalar (masalan, tavsiya snapshot'i) shu raqam o'zgarganda qayta quriladi.
+
+Izohlar faqat reyting ustunlarini (avg_rating, visible_reviews_count ...)
+o'zgartiradi — ular uchun alohida "reyting versiyasi" oshadi. Reytingga
+bog'liq nusxalar faqat shu ustunlarni yangilaydi; gazetteer, autocomplete
+va boshqa indekslar har izohda qayta qurilmaydi.
+"""
+import time
+
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = 'catalog:version'
+RATING_VERSION_KEY = 'catalog:ratings'
+
+
+def _seed_version(key):
+    # Kesh tozalanganda versiya 1 dan boshlansa, eski snapshot'dagi raqam bilan
+    # to'qnashishi mumkin — shuning uchun millisekundlik vaqtdan boshlaymiz.
+    cache.add(key, int(time.time() * 1000), timeout=None)
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        _seed_version(key)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    try:
+        return cache.incr(key)
+    except ValueError:                      # kalit yo'q (kesh tozalangan)
+        _seed_version(key)
+        return cache.incr(key)
+
+
+def catalog_version():
+    """Joriy katalog versiyasi (butun son)."""
+    return _version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Katalog o'zgardi — barcha workerlardagi nusxalar eskirgan deb belgilanadi."""
+    return _bump(CATALOG_VERSION_KEY)
+
+
+def rating_version():
+    """Joriy reyting versiyasi (butun son)."""
+    return _version(RATING_VERSION_KEY)
+
+
+def bump_rating_version():
+    """Izohlar o'zgardi — reyting ustunlari eskirgan deb belgilanadi."""
+    return _bump(RATING_VERSION_KEY)
+
+
+def catalog_versions():
+    """(katalog, reyting) versiyalari — bitta get_many bilan."""
+    values = cache.get_many([CATALOG_VERSION_KEY, RATING_VERSION_KEY])
+    catalog = values.get(CATALOG_VERSION_KEY)
+    ratings = values.get(RATING_VERSION_KEY)
+    return (catalog if catalog is not None else catalog_version(),
+            ratings if ratings is not None else rating_version())
+
+
+def listing_version():
+    """Reyting filtri / izohlar ko'rinadigan keshlar kaliti uchun: '<katalog>.<reyting>'."""
+    return '{}.{}'.format(*catalog_versions())
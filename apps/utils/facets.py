@@ -0,0 +1,200 @@
+"""
+Destinations sahifasi sidebar'i uchun faset sonlari.
+
+Har bir filtr qiymati yonida "shu belgilansa nechta natija chiqadi" soni
+ko'rsatiladi. Har qiymatga alohida COUNT yuborilsa — ~40 ta so'rov bo'lardi.
+Endi:
+
+  • parse_filters — GET parametrlari bir marta filtr holatiga o'giriladi;
+    ro'yxat view'i (FilterDestinationsTemplateView) ham shu holatdan va shu
+    shartlardan foydalanadi — sonlar va kartalar hech qachon farq qilmaydi;
+  • facet_counts — barcha qiymatlar (trip_type, duration, season, activity,
+    reyting pog'onalari, narx gistogrammasi) bitmap indeksdan (bazaga
+    murojaatsiz, apps/utils/filter_index.py), qidiruv so'zi bo'lsa — bitta
+    SELECT'da shartli COUNT(...) FILTER (WHERE ...) bilan hisoblanadi. Har
+    faset uchun qolgan fasetlarning filtrlari qo'llanadi, o'zinikisi emas
+    (bir faset ichida qiymatlar OR, fasetlar orasida AND);
+  • natija filtrlar imzosi bo'yicha katalog versiyasi o'zgarguncha keshlanadi.
+"""
+import hashlib
+import json
+import math
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Q
+
+from apps.models import Activity, Destination
+from apps.utils.catalog import catalog_version, listing_version
+from apps.utils.filter_index import get_filter_index
+from apps.utils.search import search_destinations
+
+FACETS_KEY = 'facets:{}:{}'             # katalog.reyting versiyasi, filtrlar imzosi hashi
+BOUNDS_KEY = 'facets:bounds:{}'         # katalog versiyasi
+FACETS_TTL = 60 * 10
+PRICE_BINS = 8
+RATING_BUCKETS = (5, 4, 3, 2, 1)        # "N va undan yuqori"
+DEFAULT_MAX_PRICE = 5000
+
+
+def _split(value):
+    return [v for v in (value or '').split(',') if v]
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_filters(params):
+    """GET parametrlaridan filtr holati (JSON'ga o'giriladigan dict)."""
+    ratings = [int(r) for r in _split(params.get('rating')) if r.isdigit()]
+    min_price, max_price = _int(params.get('min_price')), _int(params.get('max_price'))
+    return {
+        'city': params.get('city') or '',
+        'country': params.get('country') or '',
+        'q': (params.get('q') or '').strip(),
+        'popular': params.get('popular') == '1',
+        'price': [min_price, max_price] if min_price is not None and max_price is not None else None,
+        'type': _split(params.get('type')),
+        'duration': params.get('duration') or '',
+        'season': _split(params.get('season')),
+        'activity': _split(params.get('activity')),
+        'rating': min(ratings) if ratings else None,
+    }
+
+
+def _activity_q(icons):
+    # M2M JOIN o'rniga subquery — qatorlar ko'paymaydi, DISTINCT kerak emas
+    through = Destination.activities.through
+    return Q(pk__in=through.objects.filter(activity__icon__in=icons).values('destination_id'))
+
+
+# faset -> tanlangan qiymat(lar)dan shart
+CONDITIONS = {
+    'type': lambda values: Q(trip_type__in=values),
+    'duration': lambda value: Q(duration=value),
+    'season': lambda values: Q(season__in=values),
+    'activity': _activity_q,
+    'rating': lambda value: Q(avg_rating__gte=value),
+    'price': lambda bounds: Q(price__gte=bounds[0], price__lte=bounds[1]),
+}
+
+
+def facet_q(filters, exclude=None):
+    """Tanlangan fasetlar sharti (AND); `exclude` — shu faset hisobga olinmaydi."""
+    condition = Q()
+    for name, build in CONDITIONS.items():
+        value = filters.get(name)
+        if name != exclude and value:
+            condition &= build(value)
+    return condition
+
+
+def base_queryset(queryset, filters, ranked=False):
+    """Sidebar'da faset bo'lmagan filtrlar: shahar, davlat, mashhur, qidiruv so'zi."""
+    if filters['city']:
+        queryset = queryset.filter(city__slug=filters['city'])
+    if filters['country']:
+        queryset = queryset.filter(country__slug=filters['country'])
+    if filters['popular']:
+        queryset = queryset.filter(is_popular=True)
+    if filters['q']:
+        queryset = search_destinations(queryset, filters['q'], ranked=ranked)
+    return queryset
+
+
+def filter_destinations(queryset, filters, ranked=False):
+    """Ro'yxat uchun: barcha filtrlar qo'llangan queryset."""
+    return base_queryset(queryset, filters, ranked=ranked).filter(facet_q(filters))
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# SONLAR
+# ───────────────────────────────────────────────────────────────────────────
+
+def catalogue_bounds():
+    """Narx chegaralari va mavjud activity ikonkalari — katalog versiyasi bo'yicha keshlanadi."""
+    key = BOUNDS_KEY.format(catalog_version())
+    bounds = cache.get(key)
+    if bounds is None:
+        prices = Destination.objects.aggregate(min_p=Min('price'), max_p=Max('price'))
+        bounds = {
+            'min_price': math.floor(prices['min_p'] or 0),
+            'max_price': math.ceil(prices['max_p'] or DEFAULT_MAX_PRICE),
+            'activities': sorted(set(Activity.objects.values_list('icon', flat=True))),
+        }
+        cache.set(key, bounds, FACETS_TTL)
+    return bounds
+
+
+def _price_bins(bounds):
+    low, high = bounds['min_price'], bounds['max_price']
+    width = max(1, math.ceil((high - low + 1) / PRICE_BINS))
+    return [(low + i * width, low + (i + 1) * width) for i in range(PRICE_BINS) if low + i * width <= high]
+
+
+def _options(bounds):
+    """Faset -> [(javobdagi kalit, CONDITIONS uchun qiymat), ...]."""
+    return {
+        'type': [(v, [v]) for v in Destination.TripType.values],
+        'duration': [(v, v) for v in Destination.Duration.values],
+        'season': [(v, [v]) for v in Destination.Season.values],
+        'activity': [(icon, [icon]) for icon in bounds['activities']],
+        'rating': [(str(n), n) for n in RATING_BUCKETS],
+        'price': [(i, (lo, hi - 1)) for i, (lo, hi) in enumerate(_price_bins(bounds))],
+    }
+
+
+def _sql_counts(filters, options):
+    # Har qiymat uchun bitta shartli COUNT — hammasi bitta SELECT'da
+    aliases, aggregates = {}, {'total': Count('pk', filter=facet_q(filters) or None)}
+    for name, values in options.items():
+        others = facet_q(filters, exclude=name)
+        for key, value in values:
+            alias = f'f{len(aliases)}'
+            aliases[alias] = (name, key)
+            aggregates[alias] = Count('pk', filter=CONDITIONS[name](value) & others)
+    row = base_queryset(Destination.objects.order_by(), filters).aggregate(**aggregates)
+
+    result = {name: {} for name in options}
+    for alias, (name, key) in aliases.items():
+        result[name][key] = row[alias]
+    return result, row['total']
+
+
+def _bitmap_counts(filters, options):
+    # Bazaga murojaat yo'q: har qiymat — bitmaplar kesishmasining bit_count()'i
+    index = get_filter_index()
+    base = index.base_bits(filters)
+    result = {}
+    for name, values in options.items():
+        others = base & index.facet_bits(filters, exclude=name)
+        result[name] = {key: (others & index.condition(name, value)).bit_count() for key, value in values}
+    return result, (base & index.facet_bits(filters)).bit_count()
+
+
+def _compute(filters):
+    bounds = catalogue_bounds()
+    options = _options(bounds)
+    # qidiruv so'zi bitmap indeksda yo'q — u holda bitta SQL so'rov
+    result, total = (_sql_counts if filters['q'] else _bitmap_counts)(filters, options)
+    bins = _price_bins(bounds)
+    result['price'] = [{'min': lo, 'max': hi - 1, 'count': result['price'][i]} for i, (lo, hi) in enumerate(bins)]
+    result['total'] = total
+    return result
+
+
+def facet_counts(filters):
+    """
+    {'total': n, 'type': {qiymat: son}, ..., 'rating': {'4': son},
+     'price': [{'min', 'max', 'count'}, ...]} — joriy filtr holati uchun.
+    """
+    signature = json.dumps(filters, sort_keys=True)
+    key = FACETS_KEY.format(listing_version(), hashlib.md5(signature.encode('utf-8')).hexdigest())
+    result = cache.get(key)
+    if result is None:
+        result = _compute(filters)
+        cache.set(key, result, FACETS_TTL)
+    return result
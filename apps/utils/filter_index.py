@@ -0,0 +1,247 @@
+"""
+Destination filtrlari uchun process-ichidagi bitmap indeks.
+
+Har filtr kombinatsiyasi (shahar, davlat, narx oralig'i, trip_type, duration,
+season, activity, mashhur, minimal reyting) alohida SQL so'rov edi. Endi:
+
+  • har bir destination indeksda bitta bitga ega — bit raqami lentadagi o'rni
+    (DEFAULT_ORDERING: yangilari oldin). Har atribut qiymati uchun bitmap
+    (Python int) saqlanadi, filtrlar AND / OR bilan mikrosekundlarda kesishadi;
+  • narx va reyting — qiymat bo'yicha saralangan bo'laklar (chunk) bitmaplari:
+    to'liq oraliq ichidagi bo'laklar butunicha olinadi, faqat chetdagi ikki
+    bo'lak qatorma-qator tekshiriladi;
+  • sahifa — kursordan keyingi birinchi `limit` ta bit; jami son — bit_count().
+    Baza faqat ko'rsatiladigan 6 ta kartani yuklash uchun ishlatiladi;
+  • indeks katalog versiyasiga bog'langan (autocomplete kabi) — katalog
+    o'zgarsa keyingi so'rovda qayta quriladi; worker ishga tushganda
+    `warm_up()` bilan oldindan yuklanadi (root/wsgi.py). Izohlardan keyin
+    (reyting versiyasi) faqat reyting bitmapi qayta hisoblanadi.
+
+Qidiruv so'zi (q) bo'lsa indeks ishlatilmaydi — moslik bo'yicha saralash
+kerak, u PostgreSQL qidiruv indeksida (apps/utils/search.py).
+"""
+import bisect
+import copy
+import logging
+import math
+import threading
+from datetime import datetime, timedelta
+
+from apps.models import Destination
+from apps.utils.catalog import catalog_versions, rating_version
+from apps.utils.pagination import DEFAULT_ORDERING, PAGE_SIZE, decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+RANGE_CHUNKS = 64           # narx / reyting bo'laklari soni
+SKIP_BITS = 4096            # offset bo'yicha o'tkazib yuborishda bir qadamda tekshiriladigan bitlar
+FIELDS = ('city', 'country', 'type', 'duration', 'season', 'activity')
+
+_lock = threading.Lock()
+_current = None
+
+
+def _micros(value):
+    """Sana-vaqt -> butun mikrosekund (float aniqligi yo'qolmasin)."""
+    return (value - datetime(1970, 1, 1, tzinfo=value.tzinfo)) // timedelta(microseconds=1)
+
+
+def _bits(positions):
+    bits = 0
+    for position in positions:
+        bits |= 1 << position
+    return bits
+
+
+class RangeBitmap:
+    """Sonli atribut: qiymat bo'yicha saralangan bo'laklar, har biri o'z bitmapi bilan."""
+
+    def __init__(self, values):
+        self.values = values
+        order = sorted(range(len(values)), key=values.__getitem__)
+        size = max(1, math.ceil(len(order) / RANGE_CHUNKS))
+        self.chunks = []
+        for i in range(0, len(order), size):
+            positions = order[i:i + size]
+            self.chunks.append((values[positions[0]], values[positions[-1]], _bits(positions), positions))
+
+    def between(self, low=None, high=None):
+        """low <= qiymat <= high bo'lgan o'rinlar bitmapi (None — chegara yo'q)."""
+        low = -math.inf if low is None else low
+        high = math.inf if high is None else high
+        bits = 0
+        for first, last, chunk_bits, positions in self.chunks:
+            if last < low or first > high:
+                continue
+            if low <= first and last <= high:
+                bits |= chunk_bits
+            else:
+                bits |= _bits(p for p in positions if low <= self.values[p] <= high)
+        return bits
+
+
+class FilterIndex:
+    def __init__(self, version, rows, activities, ratings=None):
+        self.version = version
+        self.ratings = ratings
+        self.ids = [row['pk'] for row in rows]                  # o'rin -> pk
+        self.created = [row['created_at'] for row in rows]
+        self.keys = [(-_micros(row['created_at']), -row['pk']) for row in rows]    # o'sish tartibida
+        self.all = (1 << len(rows)) - 1
+        position = {pk: i for i, pk in enumerate(self.ids)}
+
+        self.values = {name: {} for name in FIELDS}
+        for i, row in enumerate(rows):
+            for name, column in (('city', 'city__slug'), ('country', 'country__slug'),
+                                 ('type', 'trip_type'), ('duration', 'duration'), ('season', 'season')):
+                if row[column]:
+                    self.values[name][row[column]] = self.values[name].get(row[column], 0) | 1 << i
+        for destination_id, icon in activities:
+            if destination_id in position:
+                self.values['activity'][icon] = self.values['activity'].get(icon, 0) | 1 << position[destination_id]
+
+        self.popular = _bits(i for i, row in enumerate(rows) if row['is_popular'])
+        self.price = RangeBitmap([row['price'] for row in rows])
+        self.rating = RangeBitmap([row['avg_rating'] for row in rows])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _any(self, name, values):
+        bits = 0
+        for value in values:
+            bits |= self.values[name].get(value, 0)
+        return bits
+
+    def condition(self, name, value):
+        """apps.utils.facets.CONDITIONS ning bitmap ko'rinishi."""
+        if name in ('type', 'season', 'activity'):
+            return self._any(name, value)
+        if name == 'duration':
+            return self.values['duration'].get(value, 0)
+        if name == 'rating':
+            return self.rating.between(value)
+        if name == 'price':
+            return self.price.between(*value)
+        raise KeyError(name)
+
+    def facet_bits(self, filters, exclude=None):
+        """Tanlangan fasetlar (AND); `exclude` — shu faset hisobga olinmaydi."""
+        bits = self.all
+        for name in ('type', 'duration', 'season', 'activity', 'rating', 'price'):
+            value = filters.get(name)
+            if name != exclude and value:
+                bits &= self.condition(name, value)
+        return bits
+
+    def base_bits(self, filters):
+        """Shahar, davlat, mashhur (qidiruv so'zi indeksda yo'q)."""
+        bits = self.all
+        if filters['city']:
+            bits &= self.values['city'].get(filters['city'], 0)
+        if filters['country']:
+            bits &= self.values['country'].get(filters['country'], 0)
+        if filters['popular']:
+            bits &= self.popular
+        return bits
+
+    def match(self, filters):
+        return self.base_bits(filters) & self.facet_bits(filters)
+
+    # ── sahifalash ────────────────────────────────────────────────────────
+
+    def _start(self, bits, cursor, offset):
+        """Sahifa qaysi bitdan boshlanadi: kursordan keyin yoki offset-chi mos bitdan."""
+        values = decode_cursor(cursor, len(DEFAULT_ORDERING))
+        if values is not None:
+            try:
+                key = (-_micros(datetime.fromisoformat(values[0])), -int(values[1]))
+            except (TypeError, ValueError):
+                key = None
+            if key is not None:
+                return bisect.bisect_right(self.keys, key)
+
+        start, skipped = 0, 0
+        while start < len(self.ids):
+            window = (bits >> start) & ((1 << SKIP_BITS) - 1)
+            found = window.bit_count()
+            if skipped + found > offset:
+                break
+            skipped += found
+            start += SKIP_BITS
+        window = bits >> start
+        while window and skipped < offset:
+            low = (window & -window).bit_length()
+            window >>= low
+            start += low
+            skipped += 1
+        return start
+
+    def page(self, bits, cursor='', offset=0, limit=PAGE_SIZE):
+        """(pk ro'yxati, keyingi kursor yoki '') — keyset_page bilan bir xil kursor formati."""
+        start = self._start(bits, cursor, offset)
+        window = bits >> start
+        positions = []
+        while window and len(positions) <= limit:
+            low = (window & -window).bit_length()
+            start += low
+            positions.append(start - 1)
+            window >>= low
+        if len(positions) <= limit:
+            return [self.ids[p] for p in positions], ''
+        positions = positions[:limit]
+        last = positions[-1]
+        return [self.ids[p] for p in positions], encode_cursor([self.created[last], self.ids[last]])
+
+    def with_ratings(self, ratings):
+        """Shu indeks, lekin reyting bitmapi bazadagi avg_rating dan qayta hisoblangan."""
+        index = copy.copy(self)
+        index.ratings = ratings
+        fresh = dict(Destination.objects.values_list('pk', 'avg_rating'))
+        index.rating = RangeBitmap([fresh.get(pk, old) for pk, old in zip(self.ids, self.rating.values)])
+        return index
+
+    @classmethod
+    def build(cls, version, ratings=None):
+        rows = list(Destination.objects.order_by(*DEFAULT_ORDERING).values(
+            'pk', 'created_at', 'city__slug', 'country__slug', 'trip_type', 'duration', 'season',
+            'is_popular', 'price', 'avg_rating'))
+        activities = Destination.activities.through.objects.values_list('destination_id', 'activity__icon')
+        return cls(version, rows, activities, ratings)
+
+
+def get_filter_index(version=None, ratings=None):
+    """Joriy katalog versiyasi uchun indeks (kerak bo'lsa qayta quriladi)."""
+    global _current
+    if version is None:
+        version, ratings = catalog_versions()
+    elif ratings is None:
+        ratings = rating_version()
+    index = _current
+    if index is not None and index.version == version and index.ratings == ratings:
+        return index
+    with _lock:
+        index = _current
+        if index is None or index.version != version:
+            index = FilterIndex.build(version, ratings)
+        elif index.ratings != ratings:
+            index = index.with_ratings(ratings)   # faqat izohlar o'zgargan
+        _current = index
+    return index
+
+
+def warm_up():
+    """Worker ishga tushganda indeksni fonda quradi — birinchi foydalanuvchi kutmasin."""
+    def run():
+        try:
+            get_filter_index()
+        except Exception as e:
+            logger.warning(f"Filtr indeksini oldindan qurib bo'lmadi: {e}")
+
+    threading.Thread(target=run, name='filter-index-warmup', daemon=True).start()
+
+
+def hydrate(queryset, ids):
+    """Indeks bergan pk'lar tartibida obyektlar (o'chirilganlari tushib qoladi)."""
+    rows = queryset.in_bulk(ids)
+    return [rows[pk] for pk in ids if pk in rows]
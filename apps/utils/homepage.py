@@ -0,0 +1,125 @@
+"""
+Bosh sahifa bo'limlari (flash / trending / featured / eng yaxshi izohlar).
+
+Bosh sahifa — eng ko'p ochiladigan URL; har ochilishda 3 ta destination
+so'rovi + 3 ta count() + izohlar so'rovi bajarilardi. Endi:
+
+  • home_sections — bo'limlar tarkibi (id'lar va jami sonlar) Redis'da,
+    katalog va reyting versiyalari bo'yicha. Celery beat va katalog/flash sale o'zgarishi
+    (signal → precompute_home_sections) uni oldindan tayyorlab qo'yadi;
+    topilmasa so'rov ichida hisoblanadi;
+  • tarkib eng yaqin flash sale tugash vaqtigacha amal qiladi (`valid_until`)
+    — muddati o'tgan aksiya bo'limda qolib ketmaydi. Qolgan vaqt (taymer)
+    brauzerda `data-end` dan hisoblanadi, keshlangan sahifada ham to'g'ri;
+  • kartalar HTML'i apps/utils/cards.py keshidan olinadi;
+  • anonim foydalanuvchilar uchun butun sahifa (til bo'yicha) keshlanadi —
+    faqat CSRF token har so'rovga alohida qo'yiladi.
+"""
+import re
+
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.translation import get_language
+
+from apps.models import Destination, Review
+from apps.utils.cards import render_cards
+from apps.utils.catalog import listing_version
+
+SECTIONS_KEY = 'home:sections:{}'       # katalog.reyting versiyasi
+PAGE_KEY = 'home:page:{}:{}'            # katalog.reyting versiyasi, til
+SCHEDULED_KEY = 'home:sections:scheduled'
+SECTIONS_TTL = 60 * 60
+PAGE_TTL = 60 * 5
+SECTION_SIZE = 3
+CSRF_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = '__home_csrf_token__'
+
+
+def _section(queryset, exclude):
+    ids = list(queryset.exclude(pk__in=exclude).values_list('pk', flat=True)[:SECTION_SIZE])
+    return {'ids': ids, 'total': queryset.exclude(pk__in=exclude).count()}
+
+
+def build_home_sections():
+    """Bo'limlar tarkibini bazadan hisoblaydi (id'lar Destination.Meta.ordering tartibida)."""
+    now = timezone.now()
+    flash_qs = Destination.objects.filter(is_flash_sale=True, flash_sale_end__gt=now, discount_percentage__gt=0)
+    flash = _section(flash_qs, ())
+    trending = _section(Destination.objects.filter(is_trending=True), flash['ids'])
+    featured = _section(Destination.objects.filter(is_featured=True), flash['ids'] + trending['ids'])
+    reviews = list(Review.objects.filter(is_visible=True, rating__gte=4).order_by(
+        '-rating', '-helpful_count', '-created_at').values_list('pk', flat=True)[:SECTION_SIZE])
+
+    # birinchi tugaydigan aksiyagacha — undan keyin flash bo'limi (va jami son) o'zgaradi
+    ends = flash_qs.order_by('flash_sale_end').values_list('flash_sale_end', flat=True).first()
+    return {'flash': flash, 'trending': trending, 'featured': featured, 'reviews': reviews, 'valid_until': ends}
+
+
+def refresh_home_sections(version=None):
+    version = listing_version() if version is None else version
+    sections = build_home_sections()
+    cache.set(SECTIONS_KEY.format(version), sections, SECTIONS_TTL)
+    return sections
+
+
+def home_sections():
+    """Joriy katalog versiyasi uchun bo'limlar (eskirgan / topilmagan bo'lsa qayta hisoblanadi)."""
+    version = listing_version()
+    sections = cache.get(SECTIONS_KEY.format(version))
+    if sections is None or (sections['valid_until'] and sections['valid_until'] <= timezone.now()):
+        sections = refresh_home_sections(version)
+    return sections
+
+
+def home_context(request):
+    """HomeTemplateView konteksti: bo'limlar kartalari va izohlar (bitta destination so'rovi)."""
+    sections = home_sections()
+    now = timezone.now()
+    ids = [pk for name in ('flash', 'trending', 'featured') for pk in sections[name]['ids']]
+    rows = Destination.objects.for_cards().in_bulk(ids)
+
+    context = {}
+    for name in ('flash', 'trending', 'featured'):
+        destinations = [rows[pk] for pk in sections[name]['ids'] if pk in rows]
+        if name == 'flash':
+            # tarkib keshdan — aksiya ayni damda tugagan bo'lishi mumkin
+            destinations = [d for d in destinations if d.flash_sale_end and d.flash_sale_end > now]
+        context[f'{name}_destinations'] = destinations
+        context[f'{name}_cards'] = render_cards(destinations, request, variant=name)
+        context[f'{name}_total'] = sections[name]['total']
+
+    reviews = Review.objects.select_related('user', 'destination').in_bulk(sections['reviews'])
+    context['top_reviews'] = [reviews[pk] for pk in sections['reviews'] if pk in reviews]
+    return context
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# ANONIM SAHIFA KESHI
+# ───────────────────────────────────────────────────────────────────────────
+
+def page_key():
+    """Render qilishdan OLDIN olinadi — render paytida katalog o'zgarsa eski HTML yangi kalitga yozilmaydi."""
+    return PAGE_KEY.format(listing_version(), get_language())
+
+
+def _page_ttl():
+    sections = cache.get(SECTIONS_KEY.format(listing_version()))
+    valid_until = sections and sections['valid_until']
+    if not valid_until:
+        return PAGE_TTL
+    return max(0, min(PAGE_TTL, int((valid_until - timezone.now()).total_seconds())))
+
+
+def cached_page(request, key):
+    """Keshlangan HTML (CSRF token shu so'rovniki bilan) yoki None."""
+    html = cache.get(key)
+    if html is None:
+        return None
+    return html.replace(CSRF_PLACEHOLDER, get_token(request))
+
+
+def store_page(key, html):
+    ttl = _page_ttl()
+    if ttl:
+        cache.set(key, CSRF_RE.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', html), ttl)
@@ -0,0 +1,365 @@
+"""
+Katalogni ommaviy import qilish (JSON / CSV, seed buyruqlari).
+
+Seed buyruqlari destinationlarni bittalab save() qilib, rasmlarni ketma-ket
+yuklab olardi va har birini modelning WebP yo'li orqali o'tkazardi. Endi:
+
+  • destinationlar, teg / activity bog'lanishlari va chipta turlari —
+    bulk_create bilan (so'rovlar soni yozuvlar soniga bog'liq emas);
+  • rasmlar cheklangan oqimlar pulida parallel yuklab olinadi (bitta
+    requests.Session — ulanishlar qayta ishlatiladi) yoki mahalliy papkadan
+    olinadi (tarmoqsiz ham ishlaydi); WebP + variantlar jarayonlar pulida,
+    yuklab olish bilan bir vaqtda tayyorlanadi;
+  • bulk yozuvlar signal chiqarmaydi — muqova rasmi, qidiruv indeksi,
+    kartalar / katalog versiyasi, o'xshashlik indeksi va bosh sahifa oxirida
+    bir marta yangilanadi;
+  • idempotent: mavjud slug o'tkazib yuboriladi (rasmi yo'q bo'lsa rasm qo'shiladi).
+
+Yozuv formati (JSON ro'yxat yoki {"destinations": [...]}; CSV — bir qator bitta yozuv):
+
+    {"name": "...", "city": "Samarkand", "country": "Uzbekistan",    # country ixtiyoriy
+     "price": 40, "trip_type": "cultural", ...,                       # Destination ustunlari
+     "tags": ["History"], "activities": ["Photography"],
+     "images": ["https://...", "registan.jpg", ["url1", "url2"]],    # ichki ro'yxat — muqobil manbalar
+     "ticket_types": [{"name": "Adult", "price": 40}]}
+
+CSV da ro'yxatlar `|` bilan ajratiladi, ticket_types — JSON matn.
+"""
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from tempfile import NamedTemporaryFile
+
+import requests
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.text import slugify
+from requests.adapters import HTTPAdapter
+
+from apps.models import Activity, City, Country, Destination, Tag, TicketType
+from apps.models.destinations import DestinationImage
+from apps.utils.cards import bump_card_versions
+from apps.utils.catalog import bump_catalog_version
+from apps.utils.search import refresh_search_index
+from apps.utils.uplode_image import render_image, store_rendered, upload_to_image
+
+logger = logging.getLogger(__name__)
+
+LIST_FIELDS = ('tags', 'activities', 'images')
+RELATED_KEYS = ('city', 'country', 'tags', 'activities', 'images', 'ticket_types')
+SKIP_COLUMNS = {'id', 'slug', 'city', 'country', 'created_at', 'updated_at'}
+TICKET_SKIP_COLUMNS = {'id', 'destination', 'order', 'created_at', 'updated_at'}
+BATCH_SIZE = 500
+MIN_IMAGE_BYTES = 2000          # bundan kichik javob — xato sahifasi / bo'sh rasm
+USER_AGENT = 'Mozilla/5.0 (TravelHub importer)'
+
+
+def _norm(s):
+    """Nomni solishtirish uchun normalizatsiya: kichik harf + ortiqcha bo'shliqsiz."""
+    return " ".join(str(s).lower().split())
+
+
+def load_records(path):
+    """JSON yoki CSV fayldan yozuvlar ro'yxati."""
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            return [_csv_record(row) for row in csv.DictReader(f)]
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return data['destinations'] if isinstance(data, dict) else data
+
+
+def _csv_record(row):
+    record = {key: value for key, value in row.items() if key and value not in (None, '')}
+    for key in LIST_FIELDS:
+        if key in record:
+            record[key] = [item.strip() for item in record[key].split('|') if item.strip()]
+    if 'ticket_types' in record:
+        record['ticket_types'] = json.loads(record['ticket_types'])
+    return record
+
+
+class ImportReport:
+    """Import natijasi: sonlar, bosqichlar vaqti va tezlik."""
+
+    def __init__(self):
+        self.created = self.skipped = self.failed = 0
+        self.links = self.tickets = 0
+        self.images = self.image_errors = 0
+        self.bytes = 0
+        self.errors = []
+        self.timings = {}
+        self.created_ids = []
+        self._started = time.perf_counter()
+
+    def fail(self, name, error):
+        self.failed += 1
+        self.errors.append(f"{name}: {error}")
+
+    def phase(self, name, started):
+        self.timings[name] = time.perf_counter() - started
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._started
+
+    def lines(self):
+        elapsed = max(self.elapsed, 1e-6)
+        image_time = max(self.timings.get('images', 0), 1e-6)
+        megabytes = self.bytes / 1024 / 1024
+        phases = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items())
+        return [
+            f"Destination: +{self.created}  (mavjud: {self.skipped}, xato: {self.failed})",
+            f"Bog'lanishlar: {self.links} teg/activity, {self.tickets} chipta turi",
+            f"Rasmlar: {self.images} ta ({self.image_errors} xato), {megabytes:.1f} MB",
+            f"Vaqt: {elapsed:.2f}s  ({phases})",
+            f"Tezlik: {self.created / elapsed:.1f} destination/s, "
+            f"{self.images / image_time:.1f} rasm/s, {megabytes / image_time:.2f} MB/s",
+        ]
+
+
+class CatalogueImporter:
+    """
+    download_workers — bir vaqtda yuklab olinadigan rasmlar (ulanishlar puli ham shu o'lchamda);
+    process_workers — WebP tayyorlovchi jarayonlar (None — CPU soni);
+    image_dir — nisbiy rasm yo'llari shu papkadan olinadi; offline=True — URL manbalar o'tkazib yuboriladi.
+    """
+
+    def __init__(self, image_dir=None, download_workers=8, process_workers=None, offline=False, timeout=15,
+                 with_images=True):
+        self.image_dir = image_dir
+        self.download_workers = download_workers
+        self.process_workers = process_workers
+        self.offline = offline
+        self.timeout = timeout
+        self.with_images = with_images
+
+    def run(self, records):
+        report = ImportReport()
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            created, image_jobs = self._create_destinations(list(records), report)
+        report.created_ids = [d.pk for d in created]
+        report.phase('destinations', started)
+
+        touched = set(report.created_ids)
+        if self.with_images and image_jobs:
+            started = time.perf_counter()
+            touched |= self._import_images(image_jobs, report)
+            report.phase('images', started)
+
+        started = time.perf_counter()
+        self._refresh(report.created_ids, sorted(touched))
+        report.phase('indexes', started)
+        return report
+
+    # ── destinationlar ────────────────────────────────────────────────────
+
+    def _create_destinations(self, records, report):
+        cities = {}
+        for city in City.objects.select_related('country'):
+            cities.setdefault(_norm(city.name), city)
+            if city.country:
+                cities.setdefault((_norm(city.name), _norm(city.country.name)), city)
+        countries = {_norm(country.name): country for country in Country.objects.all()}
+        tags = {_norm(name): pk for pk, name in Tag.objects.values_list('pk', 'name')}
+        activities = {_norm(name): pk for pk, name in Activity.objects.values_list('pk', 'name')}
+        fields = {f.name: f for f in Destination._meta.concrete_fields if f.name not in SKIP_COLUMNS}
+        ticket_fields = {f.name: f for f in TicketType._meta.concrete_fields if f.name not in TICKET_SKIP_COLUMNS}
+
+        slugs = {slugify(record.get('name') or '') for record in records}
+        existing = dict(Destination.objects.filter(slug__in=slugs).values_list('slug', 'pk'))
+        has_images = set(DestinationImage.objects.filter(
+            destination_id__in=existing.values()).values_list('destination_id', flat=True))
+
+        pending, image_jobs, seen = [], [], set()
+        for record in records:
+            name = record.get('name') or ''
+            slug = slugify(name)
+            if not slug:
+                report.fail(name or '?', "nom yo'q")
+                continue
+            if slug in existing or slug in seen:
+                report.skipped += 1
+                pk = existing.get(slug)
+                # Oldingi import rasmsiz tugagan bo'lsa — rasmlarini qo'shamiz
+                if pk and pk not in has_images and record.get('images'):
+                    image_jobs.append((pk, slug, record['images']))
+                    has_images.add(pk)
+                continue
+            try:
+                destination, tickets = self._build(record, slug, cities, countries, fields, ticket_fields)
+            except (KeyError, ValueError, TypeError, ValidationError) as e:
+                report.fail(name, e)
+                continue
+            seen.add(slug)
+            pending.append((destination, record, tickets))
+
+        created = Destination.objects.bulk_create([d for d, _, _ in pending], batch_size=BATCH_SIZE)
+
+        links = []
+        for destination, record, _ in pending:
+            for through, lookup, column, key in ((Destination.tags.through, tags, 'tag_id', 'tags'),
+                                                 (Destination.activities.through, activities, 'activity_id',
+                                                  'activities')):
+                for value in record.get(key) or ():
+                    if _norm(value) in lookup:
+                        links.append(through(destination_id=destination.pk, **{column: lookup[_norm(value)]}))
+        for through in (Destination.tags.through, Destination.activities.through):
+            through.objects.bulk_create([link for link in links if isinstance(link, through)],
+                                        batch_size=BATCH_SIZE, ignore_conflicts=True)
+        report.links = len(links)
+
+        tickets = [TicketType(destination_id=destination.pk, order=i, **ticket)
+                   for destination, _, values in pending
+                   for i, ticket in enumerate(values)]
+        TicketType.objects.bulk_create(tickets, batch_size=BATCH_SIZE)
+        report.tickets = len(tickets)
+
+        report.created = len(created)
+        image_jobs += [(d.pk, d.slug, record['images']) for d, record, _ in pending if record.get('images')]
+        return created, image_jobs
+
+    @staticmethod
+    def _build(record, slug, cities, countries, fields, ticket_fields):
+        """(Destination, chipta turlari ro'yxati) — xato yozuv ValueError / ValidationError beradi."""
+        # Bir xil nomli shaharlar bo'lishi mumkin — davlat berilgan bo'lsa avval u bilan qidiriladi
+        city = record.get('country') and cities.get((_norm(record['city']), _norm(record['country'])))
+        city = city or cities.get(_norm(record['city']))
+        if city is None:
+            raise ValueError(f"shahar topilmadi: {record['city']}")
+        country = countries.get(_norm(record['country'])) if record.get('country') else city.country
+
+        values = {}
+        for key, value in record.items():
+            if key in RELATED_KEYS:
+                continue
+            if key not in fields:
+                raise ValueError(f"noma'lum ustun: {key}")
+            values[key] = fields[key].to_python(value)
+
+        tickets = []
+        for ticket in record.get('ticket_types') or ():
+            if not isinstance(ticket, dict) or not ticket.get('name'):
+                raise ValueError(f"chipta turi noto'g'ri: {ticket}")
+            unknown = set(ticket) - set(ticket_fields)
+            if unknown:
+                raise ValueError(f"chipta turida noma'lum ustun: {', '.join(sorted(unknown))}")
+            tickets.append({key: ticket_fields[key].to_python(value) for key, value in ticket.items()})
+
+        # Chipta turlari berilgan bo'lsa narx — eng arzon pullik chipta (Destination.update_min_price kabi)
+        prices = [t['price'] for t in tickets if (t.get('price') or 0) > 0]
+        if prices and 'price' not in record:
+            values['price'] = min(prices)
+        return Destination(city=city, country=country, slug=slug, **values), tickets
+
+    # ── rasmlar ───────────────────────────────────────────────────────────
+
+    def _session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.download_workers, pool_maxsize=self.download_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = USER_AGENT
+        return session
+
+    def _process_pool(self):
+        # Celery prefork worker'ida (daemon jarayon) bola jarayon ochib bo'lmaydi — bitta oqimda ishlaymiz
+        if multiprocessing.current_process().daemon:
+            return ThreadPoolExecutor(max_workers=1)
+        return ProcessPoolExecutor(max_workers=self.process_workers)
+
+    def _fetch(self, session, sources):
+        """Birinchi ishlagan manba: (fayl yo'li, vaqtinchalikmi, bayt) yoki (None, False, 0)."""
+        for source in sources:
+            if source.startswith(('http://', 'https://')):
+                if self.offline:
+                    continue
+                try:
+                    response = session.get(source, timeout=self.timeout)
+                except requests.RequestException as e:
+                    logger.debug(f"Rasm yuklab olinmadi {source}: {e}")
+                    continue
+                if response.status_code != 200 or len(response.content) < MIN_IMAGE_BYTES:
+                    continue
+                with NamedTemporaryFile(suffix='.img', delete=False) as f:
+                    f.write(response.content)
+                return f.name, True, len(response.content)
+            path = os.path.join(self.image_dir, source) if self.image_dir else source
+            if os.path.isfile(path):
+                return path, False, os.path.getsize(path)
+        return None, False, 0
+
+    def _import_images(self, jobs, report):
+        """Yuklab olish (oqimlar) -> WebP + variantlar (jarayonlar) -> storage -> bitta bulk_create.
+
+        Tayyor render darhol storage'ga yoziladi — xotirada faqat ishlanayotgan rasmlar turadi.
+        """
+        storage = DestinationImage._meta.get_field('image').storage
+        rows, touched = [], set()
+        session = self._session()
+        with ThreadPoolExecutor(max_workers=self.download_workers) as downloads, self._process_pool() as pool:
+            fetches, renders = {}, {}
+            for destination_id, slug, sources in jobs:
+                for order, entry in enumerate(sources):
+                    alternatives = [entry] if isinstance(entry, str) else list(entry)
+                    fetches[downloads.submit(self._fetch, session, alternatives)] = (destination_id, slug, order)
+
+            running = set(fetches)
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in fetches:
+                        path, temporary, size = future.result()
+                        job = fetches.pop(future)
+                        if path is None:
+                            report.image_errors += 1
+                            continue
+                        report.bytes += size
+                        render = pool.submit(render_image, path)
+                        renders[render] = (*job, path, temporary)
+                        running.add(render)
+                        continue
+
+                    destination_id, slug, order, path, temporary = renders.pop(future)
+                    try:
+                        rendered = future.result()
+                    except Exception as e:
+                        report.image_errors += 1
+                        logger.warning(f"Rasmni o'qib bo'lmadi {slug} #{order}: {e}")
+                        continue
+                    finally:
+                        if temporary:
+                            os.unlink(path)
+                    name = upload_to_image(DestinationImage(), f"{slug}-{order}.webp")
+                    rows.append(DestinationImage(destination_id=destination_id, order=order, image_variants=True,
+                                                 image=store_rendered(storage, name, rendered)))
+                    touched.add(destination_id)
+        session.close()
+
+        DestinationImage.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        report.images = len(rows)
+        return touched
+
+    # ── indekslar ─────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _refresh(created_ids, touched_ids):
+        """bulk_create signal chiqarmaydi — signallar qiladigan ishni bir marta bajaramiz."""
+        from apps.tasks import schedule_home_sections, update_similar_destinations_index
+
+        if not touched_ids:
+            return
+        Destination.objects.filter(pk__in=touched_ids).refresh_cover_images()
+        if created_ids:
+            refresh_search_index(created_ids)
+        bump_card_versions(touched_ids)
+        bump_catalog_version()
+        schedule_home_sections()
+        if created_ids:
+            update_similar_destinations_index.delay(created_ids)
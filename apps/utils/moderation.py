@@ -0,0 +1,163 @@
+"""
+Izoh moderatsiyasining lokal bosqichi — Gemini'ga bormasdan oldin.
+
+  • normalize_review_text / review_text_hash — bir xil matn (tahrir qilib qayta
+    yuborilgan izoh, turli manzillarga tarqatilgan spam) bitta hash beradi;
+  • cached_verdict / remember_verdict — shu hash va manzil bo'yicha oldingi AI
+    qarori keshda (relevantlik qoidasi manzilga bog'liq);
+  • prefilter_review — havola/spam, aniq so'kinishlar (uz/ru/en) va uzunlik
+    tekshiruvi. Faqat aniq holatlarni (<1 ms) o'zi hal qiladi: noaniq so'zlar
+    (ism, qo'shma so'z, qisqa ildiz) va ma'nosiz ko'ringan matn None qaytarib
+    AI'ga yuboriladi.
+"""
+import hashlib
+import re
+import unicodedata
+
+from django.core.cache import cache
+
+VERDICT_KEY = 'moderation:verdict:{}:{}'     # matn hash, manzil nomi hash
+VERDICT_TTL = 60 * 60 * 24 * 30         # 30 kun
+
+MIN_LENGTH = 2
+MAX_LINKS = 1                           # 2+ havola — reklama
+SHORT_WORDS = 6                         # shundan kam so'zli ijobiy izoh lokal qabul qilinadi
+
+# ─── So'kinishlar ─────────────────────────────────────────────────────────
+# PROFANITY_WORDS — boshqa ma'nosi yo'q to'liq so'zlar: lokal rad etiladi.
+# AMBIGUOUS_* — ism ("Dick"), qo'shma so'z ("idiot-proof") yoki oddiy so'zning
+# boshi bo'lishi mumkin ("sikayat"): lokal qaror chiqarilmaydi, AI hal qiladi.
+PROFANITY_WORDS = {
+    # en
+    'fuck', 'fucks', 'fucked', 'fucker', 'fuckers', 'fucking', 'motherfucker', 'motherfuckers',
+    'shit', 'shitty', 'bullshit', 'asshole', 'assholes', 'cunt', 'cunts', 'whore', 'whores', 'slut', 'sluts',
+    # ru
+    'хуй', 'хуя', 'хуйня', 'хуево', 'хуёво', 'пизда', 'пиздец', 'блядь', 'блять', 'бляди', 'ебать',
+    'ебаный', 'ёбаный', 'ебанный', 'заебал', 'заебали', 'мудак', 'мудаки', 'пидор', 'пидорас',
+    'долбоеб', 'долбоёб', 'гандон', 'шлюха',
+    # uz
+    'qotaq', "qo'taq", 'dalbayob', 'jalab', 'blyad', 'blyat', 'pizdes', 'pizdets',
+}
+AMBIGUOUS_WORDS = {
+    'dick', 'bastard', 'idiot', 'bitch', 'retard',
+    'сука', 'бля', 'говно', 'дерьмо', 'тварь', 'урод',
+    'ahmoq', 'haromi', 'itvachcha', 'qanjiq', 'xuy', 'suka',
+}
+AMBIGUOUS_ROOTS = (
+    'fuck', 'motherfuck', 'хуй', 'хуе', 'хуё', 'пизд', 'ебан', 'ёбан', 'ебат', 'заеб', 'выеб', 'бляд',
+    'мудил', 'пидар', 'шлюх', 'sik', 'pizd',
+)
+
+# ─── Qisqa va zararsiz ijobiy izohlar (uz/ru/en) ──────────────────────────
+POSITIVE_WORDS = {
+    "zo'r", 'zor', 'juda', 'yaxshi', 'ajoyib', 'chiroyli', 'gozal', "go'zal", 'joy', 'manzil',
+    'sayohat', 'rahmat', 'tavsiya', 'qilaman', 'yoqdi', 'menga', 'ekan', 'super', 'zo`r', 'ham',
+    'great', 'good', 'nice', 'amazing', 'awesome', 'beautiful', 'lovely', 'wonderful', 'excellent',
+    'perfect', 'place', 'trip', 'very', 'really', 'recommend', 'loved', 'love', 'it', 'this', 'a',
+    'the', 'was', 'is', 'so', 'and', 'thanks', 'view', 'views', 'best', 'fantastic', 'highly',
+    'отлично', 'отличное', 'хорошо', 'хорошее', 'красиво', 'красивое', 'прекрасно', 'супер',
+    'место', 'очень', 'понравилось', 'рекомендую', 'спасибо', 'классно', 'и', 'все', 'всё',
+}
+
+URL_RE = re.compile(
+    r'(https?://|www\.|t\.me/|wa\.me/|\b[\w-]+\.(?:com|ru|uz|net|org|io|xyz|top|info|biz|shop|site)\b)',
+    re.IGNORECASE)
+CONTACT_RE = re.compile(r'[\w.+-]+@[\w-]+\.\w+|\+\d[\d\s()-]{7,}\d|\b\d{9,}\b')   # email, telefon
+# chiziqcha so'z ichida qoladi: "idiot-proof" — bitta so'z
+WORD_RE = re.compile(r"[^\W\d_]+(?:['`ʻʼ’-][^\W\d_]+)*")
+
+# leetspeak — "sh1t", "f.u.c.k" kabi niqoblarni ochish uchun (faqat harf + niqob belgisi aralash bo'lakda)
+LEET = str.maketrans({'0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't', '@': 'a', '$': 's',
+                      '.': '', '_': ''})
+LEET_CHARS = set('013457@$._')
+CHUNK_PUNCTUATION = '.,!?;:"()[]«»…'
+
+
+def normalize_review_text(text):
+    """Hash uchun normal ko'rinish: NFKC, kichik harf, tinish belgilarsiz, bitta bo'shliq."""
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    return ' '.join(re.sub(r"[^\w'`ʻʼ’]+", ' ', text).split())
+
+
+def review_text_hash(text):
+    return hashlib.sha256(normalize_review_text(text).encode('utf-8')).hexdigest()
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# QARORLAR KESHI
+# ───────────────────────────────────────────────────────────────────────────
+
+def _verdict_key(text_hash, destination_name):
+    # AI qarori manzilga bog'liq (X uchun "mavzudan tashqari" matn Y uchun o'rinli bo'lishi mumkin) —
+    # shuning uchun qabul ham, rad ham faqat o'sha manzil uchun qayta ishlatiladi.
+    # Manzilga bog'liq bo'lmagan spam / haqoratni prefilter_review har qanday manzil uchun ushlaydi.
+    destination_hash = hashlib.sha256(normalize_review_text(destination_name).encode('utf-8')).hexdigest()[:16]
+    return VERDICT_KEY.format(text_hash, destination_hash)
+
+
+def cached_verdict(text_hash, destination_name):
+    """Shu matn va shu manzil uchun oldingi AI qarori yoki None."""
+    hit = cache.get(_verdict_key(text_hash, destination_name))
+    if hit is None:
+        return None
+    return hit['is_safe'], hit['reason']
+
+
+def remember_verdict(text_hash, destination_name, is_safe, reason):
+    """AI qarorini keshga yozadi (tizim xatolari yozilmaydi — keyingi safar qayta tekshiriladi)."""
+    if str(reason).startswith('SYSTEM_'):
+        return
+    cache.set(_verdict_key(text_hash, destination_name), {'is_safe': is_safe, 'reason': reason}, VERDICT_TTL)
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# LOKAL PRE-FILTER
+# ───────────────────────────────────────────────────────────────────────────
+
+def _unmasked_words(lowered):
+    """Harf bilan leet belgisi aralash bo'laklarning ochilgan ko'rinishi ("sh1t" → "shit")."""
+    for chunk in lowered.split():
+        chunk = chunk.strip(CHUNK_PUNCTUATION)
+        if any(ch.isalpha() for ch in chunk) and any(ch in LEET_CHARS for ch in chunk):
+            yield chunk.translate(LEET)
+
+
+def _has_profanity(words):
+    return any(word.replace('`', "'") in PROFANITY_WORDS for word in words)
+
+
+def _has_ambiguous_word(words):
+    for word in words:
+        plain = word.replace('`', "'")
+        if plain in AMBIGUOUS_WORDS or plain.startswith(AMBIGUOUS_ROOTS):
+            return True
+    return False
+
+
+def prefilter_review(text):
+    """
+    Aniq holatlar uchun (is_safe, reason), noaniq matn uchun None (AI hal qiladi).
+    """
+    stripped = (text or '').strip()
+    if len(stripped) < MIN_LENGTH:
+        return False, "SYSTEM_REJECT: Izoh bo'sh"
+
+    lowered = unicodedata.normalize('NFKC', stripped).casefold()
+    words = WORD_RE.findall(lowered)
+
+    unmasked = list(_unmasked_words(lowered))
+    if _has_profanity(words) or _has_profanity(unmasked):
+        return False, "Izohda haqoratli yoki odobsiz so'zlar bor"
+    if _has_ambiguous_word(words) or _has_ambiguous_word(unmasked):
+        return None
+
+    links = URL_RE.findall(lowered)
+    without_links = URL_RE.sub(' ', lowered)
+    if len(links) > MAX_LINKS or (links and len(WORD_RE.findall(without_links)) < 4):
+        return False, "Izoh havola yoki reklamadan iborat (spam)"
+    if CONTACT_RE.search(without_links) and len(words) < 12:
+        return False, "Izohda kontakt ma'lumotlari bor (reklama)"
+
+    if words and len(words) < SHORT_WORDS and all(w.replace('`', "'") in POSITIVE_WORDS for w in words):
+        return True, "Auto Approved"
+    return None
@@ -0,0 +1,121 @@
+"""
+Destination lentalari uchun keyset (cursor) paginatsiya.
+
+"Load more" har bosilganda `OFFSET n` + alohida `count()` qilinardi — pastga
+tushgan sari sekinlashardi (baza tashlab yuboriladigan qatorlarni ham o'qiydi).
+Endi:
+
+  • keyset_page — keyingi sahifa oldingi sahifaning oxirgi qatoridan boshlanadi
+    (`WHERE (created_at, id) < (...)`), chuqurlikka bog'liq emas. Kursor —
+    saralash kaliti + id, base64 JSON (mijoz uchun shaffof emas);
+  • has_more — limit + 1 qator o'qib aniqlanadi, count() kerak emas;
+  • offset_page — moslik bahosi (float ifoda) bo'yicha saralangan qidiruv
+    natijalari uchun: float kursorda JSON orqali aniq qaytmaydi (teng bahoda
+    qatorlar tushib qoladi yoki takrorlanadi), shuning uchun kursor — o'rin;
+  • cached_count — jami son filtrlar imzosi bo'yicha bir marta hisoblanadi va
+    katalog versiyasi o'zgarguncha keshdan olinadi.
+
+Kursorsiz `offset` (eski mijozlar, bosh sahifadagi birinchi "load more")
+hamon ishlaydi.
+"""
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from apps.utils.catalog import listing_version
+
+PAGE_SIZE = 6
+DEFAULT_ORDERING = ('-created_at', '-pk')
+COUNT_KEY = 'feed:count:{}:{}'          # katalog.reyting versiyasi, filtrlar imzosi hashi
+COUNT_TTL = 60 * 10
+PAGE_PARAMS = ('offset', 'cursor')      # imzoga kirmaydi
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), default=_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Kursor qiymatlari yoki None (bo'sh / buzilgan kursor — birinchi sahifa)."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def _after(ordering, values):
+    """Leksikografik "shu qatordan keyin" sharti: a < x OR (a = x AND b > y) ..."""
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+def keyset_page(queryset, cursor='', offset=0, limit=PAGE_SIZE, ordering=DEFAULT_ORDERING):
+    """
+    Bitta sahifa: (qatorlar ro'yxati, keyingi kursor yoki '').
+    Saralash oxirida har doim unikal maydon (pk) bo'lishi kerak.
+    """
+    queryset = queryset.order_by(*ordering)
+    values = decode_cursor(cursor, len(ordering))
+    if values is not None:
+        rows = list(queryset.filter(_after(ordering, values))[:limit + 1])
+    else:
+        rows = list(queryset[offset:offset + limit + 1])
+
+    if len(rows) <= limit:
+        return rows, ''
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, field.lstrip('-')) for field in ordering)
+
+
+def offset_page(queryset, cursor='', offset=0, limit=PAGE_SIZE, ordering=DEFAULT_ORDERING):
+    """
+    keyset_page bilan bir xil natija, lekin OFFSET bilan — hisoblangan float (search_rank)
+    bo'yicha keyset qilib bo'lmaydi. Qidiruv natijalari cheklangan, chuqur sahifa bo'lmaydi.
+    Kursor — keyingi sahifa boshlanadigan o'rin.
+    """
+    values = decode_cursor(cursor, 1)
+    if values is not None and isinstance(values[0], int) and values[0] >= 0:
+        offset = values[0]
+    rows = list(queryset.order_by(*ordering)[offset:offset + limit + 1])
+    if len(rows) <= limit:
+        return rows, ''
+    return rows[:limit], encode_cursor([offset + limit])
+
+
+def cached_count(queryset, request, name):
+    """
+    Lentaning jami soni — filtrlar (GET parametrlari, sahifa parametrlarisiz)
+    va til bo'yicha keshlanadi; katalog yoki reytinglar o'zgarsa kalit o'zi eskiradi.
+    """
+    params = sorted((k, v) for k, v in request.GET.lists() if k not in PAGE_PARAMS)
+    signature = json.dumps([name, getattr(request, 'LANGUAGE_CODE', ''), params])
+    key = COUNT_KEY.format(listing_version(), hashlib.md5(signature.encode('utf-8')).hexdigest())
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, COUNT_TTL)
+    return total
@@ -0,0 +1,80 @@
+"""
+Destination reyting agregatlari — ko'rinadigan izohlar soni va yig'indilari.
+
+  • apply_review_change — bitta izoh o'zgarganda (yangi / ko'rinishi yoki bahosi
+    o'zgardi / o'chirildi) farqni F() bilan bitta UPDATE'da qo'shadi, O(1);
+  • recompute_rating_aggregates — bulk yozuvlardan keyin (signal chiqmaydi)
+    berilgan destinationlar uchun izohlardan qayta hisoblaydi;
+  • seed_rating_fields — seed buyruqlari uchun izchil (soni + yig'indi) qiymatlar.
+
+Soni sifatida mavjud `visible_reviews_count` ishlatiladi; o'rtacha reyting
+`avg_rating` ustunida saqlanadi (indeks bilan — reyting filtri uchun).
+"""
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from apps.models import Destination, Review
+
+# Destination ustuni -> Review maydoni
+RATING_SUMS = {
+    'rating_sum': 'rating',
+    'service_sum': 'service_quality',
+    'cleanliness_sum': 'cleanliness',
+    'facilities_sum': 'facilities',
+    'location_sum': 'location_rating',
+    'value_sum': 'value_for_money',
+}
+REVIEW_FIELDS = tuple(RATING_SUMS.values())
+
+
+def review_contribution(review):
+    """Izohning agregatlarga hissasi ({maydon: baho}) yoki None (ko'rinmaydi)."""
+    if review is None or not review['is_visible']:
+        return None
+    return {field: review[field] or 0 for field in REVIEW_FIELDS}
+
+
+def apply_review_change(destination_id, old, new):
+    """
+    old / new — review_contribution() natijasi (None — hisobga kirmaydi).
+    Farqni bitta UPDATE bilan qo'shadi; o'rtacha ham shu UPDATE'da qayta hisoblanadi.
+    """
+    if not destination_id or old == new:
+        return
+    old, new = old or {}, new or {}
+    count_delta = bool(new) - bool(old)
+    deltas = {column: new.get(field, 0) - old.get(field, 0) for column, field in RATING_SUMS.items()}
+
+    # UPDATE'ning o'ng tomoni eski qiymatlarni ko'radi — shuning uchun farq ikkala joyda qo'shiladi
+    new_count = F('visible_reviews_count') + count_delta
+    Destination.objects.filter(pk=destination_id).update(
+        visible_reviews_count=new_count,
+        avg_rating=Case(
+            When(visible_reviews_count__gt=-count_delta,
+                 then=Cast(F('rating_sum') + deltas['rating_sum'], FloatField()) / new_count),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+        **{column: F(column) + delta for column, delta in deltas.items() if delta},
+    )
+
+
+def recompute_rating_aggregates(destination_ids):
+    """Berilgan destinationlar agregatlarini ko'rinadigan izohlardan qayta hisoblaydi (bitta UPDATE)."""
+    visible = Review.objects.filter(destination=OuterRef('pk'), is_visible=True).order_by().values('destination')
+
+    def aggregate(expression, default=0):
+        return Coalesce(Subquery(visible.annotate(value=expression).values('value')), Value(default))
+
+    Destination.objects.filter(pk__in=list(destination_ids)).update(
+        visible_reviews_count=aggregate(Count('id')),
+        avg_rating=aggregate(Avg('rating'), 0.0),
+        **{column: aggregate(Sum(field)) for column, field in RATING_SUMS.items()},
+    )
+
+
+def seed_rating_fields(count, average):
+    """Soxta katalog uchun: `count` ta izoh, o'rtacha `average` bo'lgandek izchil qiymatlar."""
+    total = round(count * average)
+    return {'visible_reviews_count': count, 'avg_rating': total / count if count else 0.0,
+            **{column: total for column in RATING_SUMS}}
@@ -0,0 +1,134 @@
+"""
+Destination'lar bo'yicha to'liq matnli qidiruv (DestinationSearchIndex).
+
+  • refresh_search_index — berilgan destinationlar qatorlarini qayta yozadi
+    (signallar Celery task orqali chaqiradi; None — butun katalog);
+  • search_destinations — queryset'ni qidiruv so'zi bo'yicha filtrlaydi.
+    PostgreSQL'da: tsvector + GIN (har so'z prefiks sifatida — "samar" →
+    "Samarqand"), topilmasa pg_trgm o'xshashligi (xato yozilgan so'z), natija
+    ts_rank + trigram o'xshashligi bo'yicha saralanadi. Boshqa bazalarda
+    (lokal sqlite) — indeks matni ustida icontains.
+
+Indeks barcha tarjimalarni (name_en/uz/ru, location, shahar/davlat nomlari)
+bitta qatorda saqlaydi — so'rov qaysi tilda yozilishidan qat'i nazar topiladi
+va har tugma bosilishida Destination/City/Country JOIN qilinmaydi.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Q, Value
+
+from apps.models import Destination
+from apps.models.search import DestinationSearchIndex
+from apps.recommendations.gazetteer import TOKEN_RE, normalize
+
+LANGUAGES = ('en', 'uz', 'ru')
+CONFIG = 'simple'            # o'zbekcha uchun stemmer yo'q — so'zlar o'zgarishsiz indekslanadi
+MAX_TERMS = 6
+TRIGRAM_MIN_LENGTH = 4       # qisqa so'rovlarda trigram juda ko'p shovqin beradi
+BATCH_SIZE = 500
+RANKED_ORDERING = ('-search_rank', 'pk')   # float baho — sahifalar offset_page bilan (keyset emas)
+
+NAME_FIELDS = ['name'] + [f'name_{lang}' for lang in LANGUAGES]
+PLACE_FIELDS = ([f'city__name_{lang}' for lang in LANGUAGES]
+                + [f'country__name_{lang}' for lang in LANGUAGES]
+                + [f'city__country__name_{lang}' for lang in LANGUAGES])
+LOCATION_FIELDS = [f'location_{lang}' for lang in LANGUAGES]
+
+
+def fold(text):
+    """Indeks va so'rov uchun bir xil ko'rinish: kichik harf, tutuq belgisisiz ("o'zbek" → "ozbek")."""
+    return normalize(text).replace("'", '')
+
+
+def search_terms(q):
+    return TOKEN_RE.findall(fold(q))[:MAX_TERMS]
+
+
+def _join(values):
+    seen = []
+    for value in values:
+        value = fold(value).strip()
+        if value and value not in seen:
+            seen.append(value)
+    return ' '.join(seen)
+
+
+def _is_postgres():
+    return connection.vendor == 'postgresql'
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# INDEKSNI YANGILASH
+# ───────────────────────────────────────────────────────────────────────────
+
+def _index_rows(destination_ids):
+    rows = Destination.objects.filter(pk__in=destination_ids).values(
+        'pk', *NAME_FIELDS, *PLACE_FIELDS, *LOCATION_FIELDS)
+    for row in rows:
+        names = _join(row[f] for f in NAME_FIELDS)
+        places = _join(row[f] for f in PLACE_FIELDS)
+        yield DestinationSearchIndex(
+            destination_id=row['pk'], names=names, places=places,
+            document=_join([names, places, *(row[f] for f in LOCATION_FIELDS)]),
+        )
+
+
+def _refresh_batch(destination_ids):
+    rows = list(_index_rows(destination_ids))
+    with transaction.atomic():
+        DestinationSearchIndex.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['destination'],
+            update_fields=['names', 'places', 'document', 'updated_at'])
+        if _is_postgres():
+            DestinationSearchIndex.objects.filter(destination_id__in=destination_ids).update(
+                search_vector=(SearchVector('names', weight='A', config=CONFIG)
+                               + SearchVector('places', weight='B', config=CONFIG)
+                               + SearchVector('document', weight='D', config=CONFIG)))
+    return len(rows)
+
+
+def refresh_search_index(destination_ids=None):
+    """
+    Indeks qatorlarini qayta yozadi. O'chirilgan destinationlar qatori CASCADE
+    bilan o'zi o'chadi. Qaytaradi: yangilangan qatorlar soni.
+    """
+    if destination_ids is None:
+        destination_ids = Destination.objects.order_by('pk').values_list('pk', flat=True)
+    destination_ids = list(destination_ids)
+    return sum(_refresh_batch(destination_ids[i:i + BATCH_SIZE])
+               for i in range(0, len(destination_ids), BATCH_SIZE))
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# QIDIRUV
+# ───────────────────────────────────────────────────────────────────────────
+
+def search_destinations(queryset, q, ranked=False):
+    """
+    Destination queryset'ini q bo'yicha filtrlaydi (barcha so'zlar mos kelishi kerak).
+    ranked=True — `search_rank` annotatsiyasi bilan moslik bo'yicha saralaydi.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return queryset.none()
+
+    if not _is_postgres():
+        for term in terms:
+            queryset = queryset.filter(search_index__document__contains=term)
+        if ranked:
+            queryset = queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).order_by(*RANKED_ORDERING)
+        return queryset
+
+    text = ' '.join(terms)
+    query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config=CONFIG)
+    condition = Q(search_index__search_vector=query)
+    if len(text) >= TRIGRAM_MIN_LENGTH:
+        condition |= Q(search_index__document__trigram_word_similar=text)
+    queryset = queryset.filter(condition)
+
+    if ranked:
+        queryset = queryset.annotate(
+            search_rank=(SearchRank(F('search_index__search_vector'), query)
+                         + TrigramWordSimilarity(text, 'search_index__document'))
+        ).order_by(*RANKED_ORDERING)
+    return queryset
@@ -1,8 +1,14 @@
+import os
 from datetime import datetime
+from io import BytesIO
+from tempfile import NamedTemporaryFile
 
 from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.validators import RegexValidator
 from django.db.models.fields.files import ImageFieldFile
+from PIL import Image, ImageOps
 
 uz_phone_validator = RegexValidator(
     regex=r'^(\+998|998)?[0-9]{9}$',
@@ -21,3 +27,111 @@ def upload_to_image(obj, filename: str):
     date_path = datetime.now().strftime("%Y/%m/%d")
 
     return f"{_name}/{date_path}/{filename}"
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# RASMLARNI QAYTA ISHLASH (WebP + variantlar)
+# ───────────────────────────────────────────────────────────────────────────
+# Yuklangan fayl so'rov ichida o'zgartirilmaydi — saqlanadi va Celery task
+# (apps.tasks.process_uploaded_image) uni shu yerdagi funksiyalar bilan qayta ishlaydi:
+#   • fayl storage'dan vaqtinchalik faylga bo'laklab ko'chiriladi (xotirada butun nusxa yo'q);
+#   • JPEG `draft()` bilan kerakli o'lchamga yaqin masshtabda (1/2, 1/4, 1/8) dekod qilinadi,
+#     asl rasm MAX_IMAGE_SIDE bilan cheklanadi;
+#   • rasm bir marta dekod qilinadi, asosiy WebP va variantlar (card / thumb / hero) undan ketma-ket
+#     tayyorlanadi (Celery prefork worker'i daemon jarayon — unda jarayonlar puli ochib bo'lmaydi).
+# Ro'yxatlar (kartalar, wishlist, bronlar, qidiruv, email) asl rasmni emas, kichik variantni
+# ishlatadi. Variant nomi asl fayl nomidan kelib chiqadi: `dir/name.webp` -> `dir/name_card.webp`,
+# shuning uchun uni saqlash uchun alohida ustun kerak emas.
+
+IMAGE_VARIANTS = {
+    'thumb': ((160, 160), True),     # (o'lcham, kesib to'ldirish) — qidiruv, trip planner
+    'card': ((640, 420), True),      # kartalar, wishlist, bronlar
+    'hero': ((1600, 900), False),    # sahifa boshidagi katta rasm — faqat kichraytiriladi
+}
+VARIANT_QUALITY = 80
+MAX_IMAGE_SIDE = 2560               # asosiy rasm shu o'lchamdan katta saqlanmaydi
+IMAGE_QUALITY = 85
+CHUNK_SIZE = 256 * 1024
+
+
+def variant_name(name: str, variant: str) -> str:
+    base, _ = os.path.splitext(name)
+    return f"{base}_{variant}.webp"
+
+
+def variant_url(name: str, variant: str, storage=default_storage) -> str:
+    return storage.url(variant_name(name, variant)) if name else ''
+
+
+def _open_rgb(path: str, size: tuple) -> Image.Image:
+    with Image.open(path) as img:
+        if img.format == 'JPEG':
+            # DCT darajasida kichraytirib o'qish — 24 Mpx rasm to'liq dekod qilinmaydi
+            img.draft('RGB', size)
+        return img.convert('RGB')
+
+
+def _encode(img: Image.Image, variant: str | None) -> bytes:
+    """Dekod qilingan rasmdan bitta WebP: variant=None — asosiy rasm, aks holda IMAGE_VARIANTS dagi o'lcham."""
+    size, crop = ((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), False) if variant is None else IMAGE_VARIANTS[variant]
+    if crop:
+        img = ImageOps.fit(img, size, Image.Resampling.LANCZOS)
+    else:
+        img = img.copy()
+        img.thumbnail(size, Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    img.save(buffer, format="WEBP", quality=IMAGE_QUALITY if variant is None else VARIANT_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def render_image(path: str) -> dict:
+    """Asosiy rasm (kalit None) va barcha variantlar — rasm bir marta dekod qilinadi, ketma-ket."""
+    img = _open_rgb(path, (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+    return {job: _encode(img, job) for job in (None, *IMAGE_VARIANTS)}
+
+
+def _download(storage, name: str) -> str:
+    """Storage'dagi faylni bo'laklab vaqtinchalik faylga ko'chiradi, yo'lini qaytaradi."""
+    with storage.open(name) as src, NamedTemporaryFile(suffix=os.path.splitext(name)[1], delete=False) as dst:
+        for chunk in src.chunks(CHUNK_SIZE):
+            dst.write(chunk)
+    return dst.name
+
+
+def _replace(storage, name: str, data: bytes) -> None:
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(data))
+
+
+def process_stored_image(storage, name: str) -> str:
+    """
+    Storage'dagi rasmni WebP ga o'tkazadi va variantlarini yozadi, yangi fayl nomini qaytaradi.
+    Asl fayl o'chirilmaydi — bazadagi nom almashtirilib commit bo'lgandan keyin chaqiruvchi o'chiradi.
+    """
+    path = _download(storage, name)
+    try:
+        rendered = render_image(path)
+    finally:
+        os.unlink(path)
+    return store_rendered(storage, name, rendered)
+
+
+def store_rendered(storage, name: str, rendered: dict) -> str:
+    """render_image() natijasini `name` (.webp kengaytmasi bilan) va uning variantlari sifatida yozadi."""
+    new_name = storage.save(f"{os.path.splitext(name)[0]}.webp", ContentFile(rendered[None]))
+    for variant in IMAGE_VARIANTS:
+        _replace(storage, variant_name(new_name, variant), rendered[variant])
+    return new_name
+
+
+def build_variants(storage, name: str) -> None:
+    """Mavjud (allaqachon WebP) rasm uchun faqat variantlar (build_image_variants buyrug'i)."""
+    path = _download(storage, name)
+    try:
+        side = max(max(size) for size, _ in IMAGE_VARIANTS.values())
+        img = _open_rgb(path, (side, side))
+        for variant in IMAGE_VARIANTS:
+            _replace(storage, variant_name(name, variant), _encode(img, variant))
+    finally:
+        os.unlink(path)
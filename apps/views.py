@@ -4,7 +4,6 @@ import threading
 import urllib.parse
 import uuid
 
-import math
 import requests
 import time
 from django.contrib import messages
@@ -15,7 +14,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction, IntegrityError
-from django.db.models import F, Q, Prefetch, Count, Avg, Min, Max, Sum
+from django.db.models import F, Q, Prefetch, Count, Avg, Sum
 from django.forms.models import model_to_dict
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render, reverse
@@ -39,7 +38,14 @@ from apps.models.trip_plan import TripPlan, TripPlanItem
 from apps.models.notifications import NotificationSetting
 from datetime import timedelta
 from apps.models.categories import City, Region
-from apps.tasks import moderate_review_task
+from apps.tasks import schedule_review_moderation
+from apps.utils.autocomplete import autocomplete
+from apps.utils.cards import render_cards
+from apps.utils.facets import catalogue_bounds, facet_counts, filter_destinations, parse_filters
+from apps.utils.filter_index import get_filter_index, hydrate
+from apps.utils.homepage import cached_page, home_context, page_key, store_page
+from apps.utils.pagination import DEFAULT_ORDERING, cached_count, keyset_page, offset_page
+from apps.utils.search import RANKED_ORDERING, search_destinations
 from apps.utils.send_email import send_user_email
 from apps.utils.tokens import account_activation_token
 from root import settings
@@ -54,82 +60,44 @@ class FilterDestinationsTemplateView(TemplateView):
         context = super().get_context_data(**kwargs)
         request = self.request
 
-        # 🚀 1. N+1 NING OLDINI OLISH: Reytingni shu yerda hisoblaymiz (Annotate)
-        qs = Destination.objects.select_related('city', 'city__country').prefetch_related(
-            'tags', 'images', 'activities'
-        ).annotate(
-            # Bazadan o'rtacha reytingni bitta so'rovda qo'shib olamiz
-            db_avg_rating=Avg('reviews__rating', filter=Q(reviews__is_visible=True))
-        )
-
-        city_slug = request.GET.get('city')
-        if city_slug:
-            qs = qs.filter(city__slug=city_slug)
-
-        country_slug = request.GET.get('country')
-        if country_slug:
-            qs = qs.filter(country__slug=country_slug)
-
-        q = request.GET.get('q', '').strip()
-        if q:
-            qs = qs.filter(
-                Q(name__icontains=q) |
-                Q(location__icontains=q) |
-                Q(city__name__icontains=q) |
-                Q(country__name__icontains=q)
-            )
-
-        min_price = request.GET.get('min_price')
-        max_price = request.GET.get('max_price')
-        if min_price and max_price:
-            qs = qs.filter(price__gte=min_price, price__lte=max_price)
+        # 🚀 1. N+1 NING OLDINI OLISH: faqat karta ustunlari (reyting Destination.avg_rating da, reviews JOIN yo'q);
+        # teg/rasmlar faqat keshda topilmagan kartalar uchun yuklanadi (render_cards)
+        qs = Destination.objects.for_cards()
 
-        trip_types = request.GET.get('type')
-        if trip_types:
-            qs = qs.filter(trip_type__in=trip_types.split(','))
+        # Filtr holati bir marta o'qiladi — sidebar sonlari (facets) ham aynan shu shartlardan hisoblanadi
+        filters = parse_filters(request.GET)
 
-        duration = request.GET.get('duration')
-        if duration:
-            qs = qs.filter(duration=duration)
-
-        seasons = request.GET.get('season')
-        if seasons:
-            qs = qs.filter(season__in=seasons.split(','))
-
-        activities = request.GET.get('activity')
-        if activities:
-            qs = qs.filter(activities__icon__in=activities.split(','))
-
-        popular = request.GET.get('popular')
-        if popular == '1':
-            qs = qs.filter(is_popular=True)
-
-        ratings = request.GET.get('rating')
-        if ratings:
-            rating_list = [int(r) for r in ratings.split(',') if r.isdigit()]
-            if rating_list:
-                min_rating = min(rating_list)
-                # 🚀 Annotate qilingan tayyor maydondan foydalanamiz
-                qs = qs.filter(db_avg_rating__gte=min_rating)
-
-        # Dublikatlarni tozalaymiz (Activities Multiple-join qilingani uchun kerak)
-        qs = qs.distinct()
-
-        # 🚀 2. PAGINATION (Faqat 6 tasini kesib olish)
-        total_count = qs.count()
+        # 🚀 2. PAGINATION: keyset (cursor) — chuqur sahifalarda ham OFFSET yo'q
         try:
             offset = int(request.GET.get('offset', 0))
         except ValueError:
             offset = 0
+        cursor = request.GET.get('cursor', '')
+
+        if not filters['q']:
+            # Bitmap indeks: filtrlar xotirada kesishadi, baza faqat 6 ta kartani yuklaydi
+            index = get_filter_index()
+            matched = index.match(filters)
+            ids, next_cursor = index.page(matched, cursor, offset)
+            destinations = hydrate(qs, ids)
+            total_count = matched.bit_count()
+        else:
+            # Qidiruv so'zi bor — moslik bo'yicha saralash bazada (tsvector + trigram);
+            # jami son filtrlar imzosi bo'yicha bir marta hisoblanib keshlanadi
+            qs = filter_destinations(qs, filters, ranked=True)
+            total_count = cached_count(qs, request, 'filter_destinations')
+            destinations, next_cursor = offset_page(qs, cursor, offset, ordering=RANKED_ORDERING)
 
-        limit = 6
-        destinations = qs[offset:offset + limit]
-
-        # Natijalarni yuborish
+        # Natijalarni yuborish (kartalar keshlangan bo'laklardan)
         context['destinations'] = destinations
+        context['cards'] = render_cards(destinations, request, show_compare=True)
+        if not offset and not cursor:
+            # Birinchi sahifada sidebar sonlari ham yuboriladi (keshlanadi)
+            context['facets'] = facet_counts(filters)
         context['total'] = total_count
-        context['shown'] = offset + destinations.count()
-        context['has_more'] = (offset + limit) < total_count
+        context['shown'] = offset + len(destinations)
+        context['has_more'] = bool(next_cursor)
+        context['next_cursor'] = next_cursor
         context['now'] = timezone.now()
         context['show_compare'] = True  # Compare faqat destinations sahifasida
 
@@ -892,6 +860,7 @@ class SubmitReviewView(LoginRequiredMixin, View):
                             'visited_at': form.cleaned_data.get('visited_at'),
                             'is_visible': False,
                             'is_verified': False,
+                            'is_pending_moderation': True,
                             'author_name': request.user.get_full_name().strip() or request.user.username,
                             'author_country': getattr(request.user, 'country', None),
                         }
@@ -930,10 +899,8 @@ class SubmitReviewView(LoginRequiredMixin, View):
                         method=request.method
                     )
 
-                    # AI'ga yuborish
-                    transaction.on_commit(
-                        lambda: moderate_review_task.delay(review.id, destination.name)
-                    )
+                    # AI'ga yuborish (oyna ichidagi izohlar bitta batch so'rov bilan tekshiriladi)
+                    transaction.on_commit(schedule_review_moderation)
 
                 messages.info(request, "Izohingiz qabul qilindi. AI uni tekshirmoqda...", extra_tags='info')
             else:
@@ -1045,14 +1012,6 @@ class DestinationDetailView(DetailView):
     queryset = Destination.objects.select_related('city', 'country').prefetch_related(
         'images', 'tags', 'activities', 'time_slots', 'faqs', 'ticket_types',
         Prefetch('reviews', queryset=Review.objects.select_related('user', 'author_country').filter(is_visible=True)),
-    ).annotate(
-        db_avg_rating=Avg('reviews__rating', filter=Q(reviews__is_visible=True)),
-        db_avg_service=Avg('reviews__service_quality', filter=Q(reviews__is_visible=True)),
-        db_avg_cleanliness=Avg('reviews__cleanliness', filter=Q(reviews__is_visible=True)),
-        db_avg_facilities=Avg('reviews__facilities', filter=Q(reviews__is_visible=True)),
-        db_avg_access=Avg('reviews__location_rating', filter=Q(reviews__is_visible=True)),
-        db_avg_value=Avg('reviews__value_for_money', filter=Q(reviews__is_visible=True)),
-        reviews_count=Count('reviews', filter=Q(reviews__is_visible=True)),
     )
 
     def get_context_data(self, **kwargs):
@@ -1066,13 +1025,17 @@ class DestinationDetailView(DetailView):
             key=lambda r: (-r.helpful_count, -r.created_at.timestamp(), -r.rating)
         )[:10]
 
-        # 2. O'XSHASH MANZILLAR — rating annotate qilingan holda
-        context['similar_destinations'] = Destination.objects.filter(
-            city=destination.city,
-        ).exclude(id=destination.id).prefetch_related('images').annotate(
-            db_avg_rating=Avg('reviews__rating', filter=Q(reviews__is_visible=True)),
-            reviews_count=Count('reviews', filter=Q(reviews__is_visible=True)),
-        )[:5]
+        # 2. O'XSHASH MANZILLAR — kontent embedding indeksidan (reyting ustunlari tayyor)
+        from apps.recommendations.similar import similar_destinations
+        similar_qs = Destination.objects.prefetch_related('images')
+        similar_ids = similar_destinations([destination.id], k=5)
+        if similar_ids is None:                      # indeks hali qurilmagan — shu shahardagilar
+            context['similar_destinations'] = similar_qs.filter(
+                city=destination.city,
+            ).exclude(id=destination.id)[:5]
+        else:
+            by_id = {d.id: d for d in similar_qs.filter(id__in=similar_ids)}
+            context['similar_destinations'] = [by_id[i] for i in similar_ids if i in by_id]
 
         context['today'] = timezone.now().date()
 
@@ -1099,71 +1062,25 @@ class DestinationDetailView(DetailView):
 class HomeTemplateView(TemplateView):
     template_name = 'apps/home.html'
 
+    def get(self, request, *args, **kwargs):
+        # 🚀 Anonim (va kutilayotgan xabarsiz) so'rovlar uchun sahifa bir xil — til bo'yicha keshdan
+        if request.user.is_authenticated or len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+
+        key = page_key()
+        html = cached_page(request, key)
+        if html is not None:
+            return HttpResponse(html)
+        response = super().get(request, *args, **kwargs)
+        response.render()
+        store_page(key, response.content.decode())
+        return response
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        now = timezone.now()
-
-        flash_qs = Destination.objects.filter(
-            is_flash_sale=True,
-            flash_sale_end__gt=now,
-            discount_percentage__gt=0
-        ).select_related('city').prefetch_related('tags', 'images', 'reviews').annotate(
-            reviews_count=Count('reviews', filter=Q(reviews__is_visible=True)),
-            db_avg_rating=Avg('reviews__rating', filter=Q(reviews__is_visible=True)),
-        ).only(
-            'slug', 'name', 'location', 'short_description',
-            'hotels_count', 'duration', 'price', 'price_label',
-            'discount_percentage', 'flash_sale_end',
-            'is_flash_sale', 'city__name', 'has_flights',
-            'latitude', 'longitude',
-        )
-        context['flash_total'] = flash_qs.count()
-        flash_batch = list(flash_qs[:3])
-        context['flash_destinations'] = flash_batch
-        flash_ids = {d.id for d in flash_batch}
-
-        trending_qs = Destination.objects.filter(
-            is_trending=True
-        ).exclude(
-            id__in=flash_ids
-        ).select_related('city').prefetch_related('tags', 'images', 'reviews').annotate(
-            reviews_count=Count('reviews', filter=Q(reviews__is_visible=True)),
-            db_avg_rating=Avg('reviews__rating', filter=Q(reviews__is_visible=True)),
-        ).only(
-            'slug', 'name', 'location', 'short_description',
-            'hotels_count', 'duration', 'price_label',
-            'price', 'discount_percentage', 'has_flights', 'city__name',
-            'latitude', 'longitude',
-        )
-        context['trending_total'] = trending_qs.count()
-        trending_batch = list(trending_qs[:3])
-        context['trending_destinations'] = trending_batch
-        trending_ids = {d.id for d in trending_batch}
-
-        featured_qs = Destination.objects.filter(
-            is_featured=True
-        ).exclude(
-            id__in=flash_ids | trending_ids
-        ).select_related('city').prefetch_related('tags', 'images', 'activities', 'reviews').annotate(
-            reviews_count=Count('reviews', filter=Q(reviews__is_visible=True)),
-            db_avg_rating=Avg('reviews__rating', filter=Q(reviews__is_visible=True)),
-        ).only(
-            'slug', 'package_type', 'name', 'location',
-            'short_description', 'duration', 'price_label', 'price',
-            'discount_percentage', 'hotels_count', 'restaurants_count',
-            'has_flights', 'city__name',
-            'latitude', 'longitude',
-        )
-        context['featured_total'] = featured_qs.count()
-        context['featured_destinations'] = featured_qs[:3]
-
-        context['top_reviews'] = Review.objects.filter(
-            is_visible=True,
-            rating__gte=4
-        ).select_related(
-            'user', 'destination'
-        ).order_by('-rating', '-helpful_count', '-created_at')[:3]
-
+        # Bo'limlar tarkibi Celery beat / signal orqali oldindan hisoblangan (apps/utils/homepage.py),
+        # kartalar — keshlangan bo'laklar; reyting Destination ustunlarida
+        context.update(home_context(self.request))
         return context
 
 
@@ -1173,14 +1090,11 @@ class LoadMoreDestinationsView(View):
         offset = int(request.GET.get('offset', 0))
         city_slug = request.GET.get('city', '')  # Shahar bo'yicha filtr
         now = timezone.now()
+        ordering = DEFAULT_ORDERING
+        paginate = keyset_page
 
-        # Sayohatlarni optimizatsiya qilingan holda olish (Baza yukini kamaytirish)
-        queryset = Destination.objects.select_related('city', 'city__country').prefetch_related(
-            'tags', 'images', 'reviews', 'activities'
-        ).annotate(
-            reviews_count=Count('reviews', filter=Q(reviews__is_visible=True)),
-            avg_rating=Avg('reviews__rating', filter=Q(reviews__is_visible=True))
-        )
+        # Sayohatlarni optimizatsiya qilingan holda olish: karta proyeksiyasi (teg/rasmlar — keshda yo'q kartalarga)
+        queryset = Destination.objects.for_cards()
 
         if section == 'flash':
             destinations = queryset.filter(
@@ -1188,15 +1102,12 @@ class LoadMoreDestinationsView(View):
                 flash_sale_end__gt=now,
                 discount_percentage__gt=0
             )
-            template_name = 'apps/partials/_flash_card.html'
 
         elif section == 'featured':
             destinations = queryset.filter(is_featured=True)
-            template_name = 'apps/partials/_featured_card.html'
 
         elif section == 'trending':
             destinations = queryset.filter(is_trending=True)
-            template_name = 'apps/partials/_trending_card.html'
 
         # 🚀 YANGI: Umumiy ro'yxat va shahar/qidiruv bo'yicha filtr
         else:
@@ -1206,39 +1117,32 @@ class LoadMoreDestinationsView(View):
             q = request.GET.get('q', '').strip()
             if q:
                 # distinct() + annotate() PostgreSQL da xatolik beradi
-                # FK joinlar duplicate yaratmaydi, shuning uchun distinct kerak emas
-                destinations = destinations.filter(
-                    Q(name__icontains=q) |
-                    Q(location__icontains=q) |
-                    Q(city__name__icontains=q) |
-                    Q(country__name__icontains=q)
-                )
-            template_name = 'apps/partials/destination_cards.html'
+                # search_index — OneToOne, duplicate yaratmaydi, shuning uchun distinct kerak emas
+                destinations = search_destinations(destinations, q, ranked=True)
+                ordering = RANKED_ORDERING
+                paginate = offset_page          # float moslik bahosi bo'yicha keyset qilib bo'lmaydi
 
-        total = destinations.count()
-        # Bir safarda 6 ta element yuklash (Frontendga moslab)
-        limit = 6
-        batch = destinations[offset: offset + limit]
-        has_more = (offset + limit) < total
+        # Bir safarda 6 ta element (keyset, qidiruvda — offset paginatsiya); jami son keshdan
+        total = cached_count(destinations, request, f'load_more:{section}')
+        batch, next_cursor = paginate(destinations, request.GET.get('cursor', ''), offset, ordering=ordering)
+        has_more = bool(next_cursor)
 
-        # HTML bo'lagini render qilish
+        # HTML bo'lagini yig'ish — har karta bir marta render qilinib keshlanadi (apps/utils/cards.py)
         if section in ('flash', 'featured', 'trending'):
-            html = "".join([
-                render_to_string(template_name, {'destination': d, 'now': timezone.now()}, request=request)
-                for d in batch
-            ])
+            html = "".join(render_cards(batch, request, variant=section))
         else:
-            html = render_to_string(template_name, {
+            html = render_to_string('apps/partials/destination_cards.html', {
                 'destinations': batch,
+                'cards': render_cards(batch, request, show_compare=True),
                 'now': timezone.now(),
                 'total': total,
                 'shown': offset + len(batch),
                 'has_more': has_more,
+                'next_cursor': next_cursor,
                 'show_compare': True,  # Compare faqat destinations ro'yxatida
             }, request=request)
 
-        # batch hajmi — sliced queryset.count() emas, xavfsiz yo'l
-        batch_size = len(list(batch)) if not hasattr(batch, '_result_cache') or batch._result_cache is None else len(batch._result_cache)
+        batch_size = len(batch)
 
         accept_json = 'application/json' in request.headers.get('accept', '') or 'api' in request.path
 
@@ -1250,13 +1154,15 @@ class LoadMoreDestinationsView(View):
         response = HttpResponse(html)
         response['X-Has-More'] = str(has_more).lower()
         response['X-Total'] = str(total)
-        response['X-Next-Offset'] = str(offset + limit)
+        response['X-Next-Offset'] = str(offset + batch_size)
+        response['X-Next-Cursor'] = next_cursor
 
         if accept_json:
             return JsonResponse({
                 'html': html,
                 'count': batch_size,
                 'has_more': has_more,
+                'next_cursor': next_cursor,
                 'total': total
             })
 
@@ -1295,18 +1201,15 @@ class DestinationsListView(ListView):
         # Activities modelidan faqat nom va ikonkalarni olamiz
         context['activities'] = Activity.objects.only('name', 'icon')
 
-        # 🚀 4. DINAMIK NARX (Eng zo'r SQL yondashuv)
-        # 10 000 ta obyekti aylanib chiqmasdan, to'g'ridan-to'g'ri bazaga "Menga faqat eng arzon va eng qimmatni ber" deb bitta so'rov yuboramiz
-        price_agg = Destination.objects.aggregate(
-            min_p=Min('price'),
-            max_p=Max('price')
-        )
-        context['min_price'] = math.floor(price_agg['min_p'] or 0)
-        context['max_price'] = math.ceil(price_agg['max_p'] or 5000)
+        # 🚀 4. DINAMIK NARX: eng arzon / eng qimmat — katalog versiyasi bo'yicha keshlanadi
+        bounds = catalogue_bounds()
+        context['min_price'] = bounds['min_price']
+        context['max_price'] = bounds['max_price']
 
-        # 5. JAMI STATISTIKA (Faqatgina sonini hisoblaydi, barcha ob'ektlarni olmaydi)
+        # 5. FASET SONLARI: har filtr qiymati uchun son — hammasi bitta so'rovda (keshlanadi)
+        context['facets'] = facet_counts(parse_filters(self.request.GET))
         context['initial_count'] = 0
-        context['total_count'] = Destination.objects.count()
+        context['total_count'] = context['facets']['total']
 
         return context
 
@@ -1351,27 +1254,19 @@ class DestinationByCityView(View):
     def get(self, request):
         city_slug = request.GET.get('city')
         offset = int(request.GET.get('offset', 0))
-        limit = 6
 
-        all_destinations = Destination.objects.filter(city__slug=city_slug).select_related(
-            'city', 'city__country'
-        ).prefetch_related(
-            'tags', 'images', 'reviews', 'activities'
-        ).annotate(
-            reviews_count=Count('reviews', filter=Q(reviews__is_visible=True)),
-            avg_rating=Avg('reviews__rating', filter=Q(reviews__is_visible=True))
-        )
+        all_destinations = Destination.objects.for_cards().filter(city__slug=city_slug)
 
-        total = all_destinations.count()
-        destinations = all_destinations[offset:offset + limit]
-        has_more = (offset + limit) < total
-        shown = offset + destinations.count()
+        total = cached_count(all_destinations, request, 'destinations_by_city')
+        destinations, next_cursor = keyset_page(all_destinations, request.GET.get('cursor', ''), offset)
 
         return render(request, 'apps/partials/destination_cards.html', {
             'destinations': destinations,
+            'cards': render_cards(destinations, request, show_compare=True),
             'total': total,
-            'has_more': has_more,
-            'shown': shown,
+            'has_more': bool(next_cursor),
+            'shown': offset + len(destinations),
+            'next_cursor': next_cursor,
             'now': timezone.now(),
             'show_compare': True,  # Compare faqat destinations sahifasida
         })
@@ -1765,17 +1660,22 @@ class RecommendationTemplateView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         from apps.recommendations import ai
-        from apps.recommendations.engine import RecommendationEngine, TRIP_TYPE_LABELS
+        from apps.recommendations.bundle import get_bundle
+        from apps.recommendations.engine import TRIP_TYPE_LABELS
 
-        engine = RecommendationEngine(user=self.request.user)
-        taste = engine.taste_dna()
-        top_picks = engine.top_picks(6)
+        # Engine natijasi foydalanuvchi bo'yicha keshlangan (tarix/katalog versiyasiga bog'langan)
+        bundle = get_bundle(self.request.user)
+        taste = bundle['taste']
+        top_picks = bundle['top_picks']
 
-        # Gemini: AI portreti + pitchlar (xato/sekinlik bo'lsa shablonli matn qoladi).
+        # Gemini: AI portreti + pitchlar faqat KESHDAN — sahifa LLM'ni kutmaydi.
+        # Keshda bo'lmasa shablonli matn ko'rsatiladi, AI matni Celery'da yoziladi
+        # va front-end uni ai-text endpointidan olib almashtiradi.
         # Portretni AI haqiqatan almashtirdimi — yorliqni to'g'ri ko'rsatish uchun belgilab qo'yamiz.
         template_portrait = taste['portrait']
-        ai.enrich(taste, top_picks)
+        ready = ai.enrich(taste, top_picks, cached_only=True)
         taste['ai_portrait'] = taste['portrait'] != template_portrait
+        context['ai_pending'] = not ready and ai.schedule_enrichment(self.request.user, top_picks)
 
         # filtr tugmalari — Top Picks'da aslida bor trip_type'lardan tuziladi
         seen = []
@@ -1790,28 +1690,33 @@ class RecommendationTemplateView(TemplateView):
         context['taste'] = taste
         context['season_label'] = taste['season_label']
         context['top_picks'] = top_picks
+        context['because_saved'] = bundle['because_saved']
+        context['also_loved'] = bundle['also_loved']
+        context['season_picks'] = bundle['season_picks']
+        context['hidden_gems'] = bundle['hidden_gems']
+        return context
 
-        # Bo'limlar orasida bir joy takrorlanmasin: har bir bo'lim o'zidan
-        # oldingilarda ko'rsatilgan destinationlarni o'tkazib yuboradi.
-        shown = {p['d'].id for p in top_picks}
-
-        because_saved = engine.because_you_saved(exclude_ids=shown)
-        if because_saved:
-            shown |= {c['d'].id for c in because_saved['items']}
-
-        also_loved = engine.travelers_also_loved(8, exclude_ids=shown)
-        shown |= {c['d'].id for c in also_loved}
 
-        season_picks = engine.perfect_for_season(8, exclude_ids=shown)
-        shown |= {c['d'].id for c in season_picks}
+class RecommendationAiTextView(View):
+    """Tayyor AI portreti + pitchlar (faqat keshdan) — sahifa ochilgandan keyin front-end so'raydi."""
 
-        hidden_gems = engine.hidden_gems(8, exclude_ids=shown)
+    def get(self, request, *args, **kwargs):
+        from apps.recommendations import ai
+        from apps.recommendations.bundle import get_bundle
 
-        context['because_saved'] = because_saved
-        context['also_loved'] = also_loved
-        context['season_picks'] = season_picks
-        context['hidden_gems'] = hidden_gems
-        return context
+        bundle = get_bundle(request.user)
+        taste = bundle['taste']
+        top_picks = bundle['top_picks']
+        template_portrait = taste['portrait']
+        template_pitches = {p['d'].id: p['ai_pitch'] for p in top_picks}
+        ready = ai.enrich(taste, top_picks, cached_only=True)
+        # qisman tayyor bo'lsa ham bor matn qaytariladi — qolgani keyingi so'rovda
+        return JsonResponse({
+            'ready': ready,
+            'portrait': taste['portrait'] if taste['portrait'] != template_portrait else '',
+            'pitches': {str(p['d'].id): p['ai_pitch'] for p in top_picks
+                        if p['ai_pitch'] != template_pitches[p['d'].id]},
+        })
 
 
 class RecommendationAiSearchView(View):
@@ -1824,12 +1729,16 @@ class RecommendationAiSearchView(View):
 
         from apps.recommendations import ai
         from apps.recommendations.engine import RecommendationEngine
-
-        filters = ai.parse_search_query(query)          # None → Gemini ishlamadi
+        from apps.recommendations.gazetteer import is_confident, parse_query
+
+        # Avval mahalliy parser (tarmoqsiz); Gemini faqat so'rov yaxshi tanilmasa chaqiriladi
+        filters, confidence = parse_query(query)
+        ai_used = False
+        if not is_confident(confidence):
+            ai_filters = ai.parse_search_query(query)   # None → Gemini ishlamadi, mahalliy natija qoladi
+            if ai_filters is not None:
+                filters, ai_used = ai_filters, True
         engine = RecommendationEngine(user=request.user)
-        ai_used = filters is not None
-        if filters is None:                             # zaxira: mahalliy parser
-            filters = engine.fallback_parse(query)
         cards = engine.search(filters, n=6)
 
         html = ''.join(
@@ -2155,7 +2064,6 @@ class DashboardTemplateView(LoginRequiredMixin, TemplateView):
 
     @staticmethod
     def _trip_card(booking, today):
-        first_img = booking.destination.images.first()
         if booking.tickets_data:
             guests = ', '.join(f"{qty} {name}" for name, qty in booking.tickets_data.items())
         else:
@@ -2164,7 +2072,7 @@ class DashboardTemplateView(LoginRequiredMixin, TemplateView):
         country = booking.destination.country
         return {
             'obj': booking,
-            'image_url': first_img.image.url if first_img else None,
+            'image_url': booking.destination.cover_card_url or None,
             'flag': country.flag if country and country.flag else '📍',
             'guests': guests,
             'days_until': days_until,
@@ -2214,8 +2122,7 @@ class DashboardTemplateView(LoginRequiredMixin, TemplateView):
 
         bookings = (Booking.objects
                     .filter(user=user)
-                    .select_related('destination', 'destination__city', 'destination__country')
-                    .prefetch_related('destination__images'))
+                    .select_related('destination', 'destination__city', 'destination__country'))
 
         active_bookings = bookings.exclude(status=Booking.Status.CANCELLED)
         paid_bookings = bookings.filter(is_paid=True)
@@ -2291,8 +2198,7 @@ class DashboardTemplateView(LoginRequiredMixin, TemplateView):
         # ── Wishlist ──
         wishlist_qs = (Wishlist.objects
                        .filter(user=user)
-                       .select_related('destination', 'destination__city', 'destination__country')
-                       .prefetch_related('destination__images'))
+                       .select_related('destination', 'destination__city', 'destination__country'))
         wishlist_count = wishlist_qs.count()
         wishlist_items = [w.destination for w in wishlist_qs[:4]]
 
@@ -2396,8 +2302,7 @@ class MyBookingsApiView(LoginRequiredMixin, View):
 
         base_qs = (Booking.objects
                    .filter(user=request.user)
-                   .select_related('destination', 'destination__city')
-                   .prefetch_related('destination__images'))
+                   .select_related('destination', 'destination__city'))
 
         if search:
             base_qs = base_qs.filter(
@@ -2443,8 +2348,7 @@ class MyBookingsApiView(LoginRequiredMixin, View):
         bookings_data = []
 
         for b in page_obj:
-            first_img = b.destination.images.first()
-            image_url = first_img.image.url if first_img else None
+            image_url = b.destination.cover_card_url or None
 
             can_free_cancel = False
             cancellation_text = ''
@@ -2542,7 +2446,6 @@ class WishlistTemplateView(LoginRequiredMixin, TemplateView):
             Wishlist.objects
             .filter(user=self.request.user)
             .select_related('destination', 'destination__city', 'destination__country')
-            .prefetch_related('destination__images')
             .order_by('-created_at')
         )
         destinations = [i.destination for i in items]
@@ -2573,16 +2476,22 @@ class WishlistTemplateView(LoginRequiredMixin, TemplateView):
             for k in season_map
         ]
 
-        # Similar destinations — same trip_type, not already wishlisted
-        wishlist_trip_types = list({d.trip_type for d in destinations if d.trip_type})
-        similar_destinations = (
-            Destination.objects
-            .filter(trip_type__in=wishlist_trip_types)
-            .exclude(id__in=wishlisted_ids)
-            .select_related('city', 'country')
-            .prefetch_related('images')
-            .order_by('-is_trending', '-is_featured')[:5]
-        ) if wishlist_trip_types else []
+        # Similar destinations — wishlist'ning o'rtacha embeddingiga eng yaqinlar
+        from apps.recommendations.similar import similar_destinations as find_similar
+        similar_qs = Destination.objects.select_related('city', 'country')
+        similar_ids = find_similar(wishlisted_ids, k=5) if wishlisted_ids else []
+        if similar_ids is None:
+            # indeks hali qurilmagan — same trip_type, not already wishlisted
+            wishlist_trip_types = list({d.trip_type for d in destinations if d.trip_type})
+            similar_destinations = (
+                similar_qs
+                .filter(trip_type__in=wishlist_trip_types)
+                .exclude(id__in=wishlisted_ids)
+                .order_by('-is_trending', '-is_featured')[:5]
+            ) if wishlist_trip_types else []
+        else:
+            by_id = {d.id: d for d in similar_qs.filter(id__in=similar_ids)}
+            similar_destinations = [by_id[i] for i in similar_ids if i in by_id]
 
         # Active price alerts for this user's wishlist destinations
         active_alert_slugs = set(
@@ -2624,8 +2533,7 @@ class ToggleWishlistView(View):
                 'wishlist_count': Wishlist.objects.filter(user=request.user).count(),
             })
 
-        first_image = destination.images.first()
-        image_url = request.build_absolute_uri(first_image.image.url) if first_image else ''
+        image_url = request.build_absolute_uri(destination.cover_card_url) if destination.cover_image else ''
         detail_url = request.build_absolute_uri(
             f'/{request.LANGUAGE_CODE}/destination-detail/{destination.slug}/'
         )
@@ -2939,9 +2847,6 @@ class CompareDestinationsView(View):
             slug__in=slug_list
         ).select_related('city', 'city__country').prefetch_related(
             'images', 'tags', 'activities', 'flights', 'hotels', 'ticket_types'
-        ).annotate(
-            reviews_count=Count('reviews', filter=Q(reviews__is_visible=True)),
-            avg_rating=Avg('reviews__rating', filter=Q(reviews__is_visible=True))
         )
 
         data = []
@@ -3013,84 +2918,33 @@ class GlobalSearchView(View):
         if len(q) < 1:
             return JsonResponse({'results': [], 'count': 0, 'query': q})
 
-        results = []
-
         lang = request.LANGUAGE_CODE or 'en'
 
-        # Regions
-        for r in Region.objects.filter(name__icontains=q).annotate(
-            country_count=Count('countries', filter=Q(countries__is_active=True))
-        )[:3]:
-            results.append({
-                'type': 'region',
-                'slug': r.slug,
-                'title': r.name,
-                'subtitle': '',
-                'image': '',
-                'count': r.country_count,
-                'count_label': 'countries',
-                'url': f'/{lang}/destinations/',
-            })
-
-        # Countries
-        for c in Country.objects.filter(name__icontains=q, is_active=True).select_related('region').annotate(
-            city_count=Count('cities')
-        )[:3]:
-            results.append({
-                'type': 'country',
-                'slug': c.slug,
-                'code': c.code,
-                'region_slug': c.region.slug if c.region else '',
-                'title': c.name,
-                'subtitle': (c.flag or '') + (' ' + c.region.name if c.region else ''),
-                'image': '',
-                'count': c.city_count,
-                'count_label': 'cities',
-                'url': f'/{lang}/destinations/?country={c.slug}&country_name={c.name}',
-            })
+        # 🚀 Process ichidagi prefiks indeksdan — bazaga so'rov yo'q (apps.utils.autocomplete)
+        results = [dict(r) for r in autocomplete(q, lang)]
 
-        # Cities
-        for city in City.objects.filter(name__icontains=q).select_related('country', 'country__region').annotate(
-            dest_count=Count('destinations')
-        )[:4]:
-            img_url = request.build_absolute_uri(city.image.url) if city.image else ''
-            results.append({
-                'type': 'city',
-                'slug': city.slug,
-                'country_code': city.country.code if city.country else '',
-                'region_slug': city.country.region.slug if city.country and city.country.region else '',
-                'title': city.name,
-                'subtitle': city.country.name if city.country else '',
-                'image': img_url,
-                'count': city.dest_count,
-                'count_label': 'destinations',
-                'url': f'/{lang}/destinations/?city={city.slug}&city_name={city.name}',
-            })
-
-        # Destinations
-        destinations = (
-            Destination.objects
-            .filter(
-                Q(name__icontains=q) |
-                Q(location__icontains=q)
+        # Hech narsa topilmasa (xato yozilgan so'z) — qidiruv indeksining trigram o'xshashligi
+        if not results:
+            destinations = (
+                search_destinations(Destination.objects.all(), q, ranked=True)
+                .select_related('city')[:6]
             )
-            .select_related('city', 'country')
-            .prefetch_related('images')[:6]
-        )
-        for d in destinations:
-            first_img = d.images.first()
-            img_url = request.build_absolute_uri(first_img.image.url) if first_img and first_img.image else ''
-            results.append({
-                'type': 'destination',
-                'slug': d.slug,
-                'title': d.name,
-                'subtitle': d.location or (d.city.name if d.city else ''),
-                'image': img_url,
-                'price': d.discounted_price or 0,
-                'rating': d.rating or 0,
-                'count': None,
-                'url': f'/{lang}/destination-detail/{d.slug}/',
-            })
+            for d in destinations:
+                results.append({
+                    'type': 'destination',
+                    'slug': d.slug,
+                    'title': d.name,
+                    'subtitle': d.location or (d.city.name if d.city else ''),
+                    'image': d.cover_thumb_url,
+                    'price': d.discounted_price or 0,
+                    'rating': d.rating or 0,
+                    'count': None,
+                    'url': f'/{lang}/destination-detail/{d.slug}/',
+                })
+
+        for r in results:
+            if r['image']:
+                r['image'] = request.build_absolute_uri(r['image'])
 
         return JsonResponse({'results': results, 'count': len(results), 'query': q})
 
@@ -3101,14 +2955,12 @@ class GlobalSearchView(View):
 
 def _item_to_dict(item):
     dest = item.destination
-    img = dest.images.first()
-    img_url = img.image.url if img and img.image else ''
     location = dest.location or (dest.city.name if dest.city else '')
     return {
         'slug': dest.slug,
         'name': dest.name,
         'price': dest.discounted_price,
-        'image': img_url,
+        'image': dest.cover_card_url,
         'url': f'/destination-detail/{dest.slug}/',
         'location': location,
         'day_number': item.day_number,
@@ -3122,7 +2974,7 @@ def _plan_to_dict(plan):
         'name': plan.name,
         'description': plan.description,
         'start_date': str(plan.start_date) if plan.start_date else None,
-        'items': [_item_to_dict(it) for it in plan.items.select_related('destination', 'destination__city').prefetch_related('destination__images').all()],
+        'items': [_item_to_dict(it) for it in plan.items.select_related('destination', 'destination__city').all()],
     }
 
 
@@ -3138,7 +2990,6 @@ class TripPlannerTemplateView(LoginRequiredMixin, TemplateView):
                 'items',
                 'items__destination',
                 'items__destination__city',
-                'items__destination__images',
             )
         )
         plans_data = [_plan_to_dict(p) for p in plans]
@@ -3146,18 +2997,16 @@ class TripPlannerTemplateView(LoginRequiredMixin, TemplateView):
         wishlist_dests = list(
             Wishlist.objects.filter(user=self.request.user)
             .select_related('destination', 'destination__city')
-            .prefetch_related('destination__images')
             .order_by('destination__name')
         )
         wishlist_data = []
         for w in wishlist_dests:
             d = w.destination
-            img = d.images.first()
             wishlist_data.append({
                 'slug': d.slug,
                 'name': d.name,
                 'price': d.discounted_price,
-                'image': img.image.url if img and img.image else '',
+                'image': d.cover_card_url,
                 'location': d.location or (d.city.name if d.city else ''),
             })
 
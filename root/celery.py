@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from celery.schedules import crontab
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'root.settings')
@@ -30,6 +31,26 @@ app.conf.beat_schedule = {
         'task': 'booking_completed_task',
         'schedule': 3600.0,  # har soatda — sayohat vaqti o'tganlarni COMPLETED ga o'tkazadi
     },
+    'rebuild-item-similarity-index': {
+        'task': 'rebuild_item_similarity_index',
+        'schedule': 21600.0,  # har 6 soatda — tavsiya collaborative indeksi
+    },
+    'rebuild-similar-destinations-index': {
+        'task': 'rebuild_similar_destinations_index',
+        'schedule': 86400.0,  # har kuni — "o'xshash joylar" indeksi (kunduzi inkremental yangilanadi)
+    },
+    'pregenerate-recommendation-pitches': {
+        'task': 'pregenerate_recommendation_pitches',
+        'schedule': crontab(hour=3, minute=30),  # har tunda — ommabop ta'm guruhlari uchun AI pitchlar
+    },
+    'precompute-home-sections': {
+        'task': 'precompute_home_sections',
+        'schedule': 300.0,  # har 5 daqiqada — bosh sahifa bo'limlari Redis'da doim tayyor turadi
+    },
+    'moderate-pending-reviews': {
+        'task': 'moderate_reviews_batch_task',
+        'schedule': 300.0,  # har 5 daqiqada — rejalashtirilgan batch yo'qolsa ham kutayotgan izohlar qolib ketmaydi
+    },
 }
 
 
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'root.settings')
 
 application = get_wsgi_application()
+
+# Header qidiruvi va filtr indekslarini worker ishga tushishi bilan fonda yuklab qo'yamiz
+from apps.utils import autocomplete, filter_index  # noqa: E402
+
+autocomplete.warm_up()
+filter_index.warm_up()